@@ -0,0 +1,50 @@
+"""
+Publishing of real-time project events to the `ProjectConsumer` group.
+Events are JSON encoded once at publish time, consumers forward the
+pre-encoded frame to their WebSocket unchanged.
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Consumer handler forwarding pre-encoded frames (`ProjectConsumer.broadcast_frame`)
+FRAME_MESSAGE_TYPE = "broadcast.frame"
+
+
+def project_group_name(project_id):
+    # Group names can only contain ASCII letters, numbers, hyphens, and underscores.
+    return f"project_{project_id}"
+
+
+def encode_event(event_type, **data):
+    """
+    Encode an event as the text frame sent to WebSocket clients.
+    """
+    return json.dumps({"type": event_type, **data}, cls=DjangoJSONEncoder)
+
+
+def frame_message(frame, seq=None):
+    """
+    Channel layer message carrying a pre-encoded frame, and the sequence number
+    of outbox events (see apps.common.outbox).
+    """
+    return {"type": FRAME_MESSAGE_TYPE, "text": frame, "seq": seq}
+
+
+async def abroadcast_to_project(project_id, event_type, **data):
+    channel_layer = get_channel_layer()
+    await channel_layer.group_send(
+        project_group_name(project_id),
+        frame_message(encode_event(event_type, **data)),
+    )
+
+
+def broadcast_to_project(project_id, event_type, **data):
+    """
+    Send an event to every WebSocket client connected to the project.
+    e.g. broadcast_to_project(project.id, "task_created", task=serializer.data)
+    """
+    async_to_sync(abroadcast_to_project)(project_id, event_type, **data)
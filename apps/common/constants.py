@@ -3,3 +3,4 @@ TASK_NOT_FOUND = "Task does not exist for given project"
 COMMENT_NOT_FOUND = "Comment does not exist for given task and project"
 
 PERMISSION_DENIED = "You are not allowed to perform this action"
+PRECONDITION_FAILED = "The resource was modified, fetch it again before updating"
@@ -1,11 +1,19 @@
 import json
+from urllib.parse import parse_qs
 
 from channels.generic.websocket import WebsocketConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from django.utils import timezone
-from apps.v1.projects.models import Project
-from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from apps.common.broadcast import (
+    FRAME_MESSAGE_TYPE,
+    encode_event,
+    project_group_name,
+)
+from apps.common import outbox
+from apps.common.executor import database_sync_to_async
+from apps.common.presence import registry as presence
+from apps.common.throttling import TokenBucket
+from apps.v1.projects import membership
 
 
 class ProjectConsumer(AsyncWebsocketConsumer):
@@ -13,8 +21,15 @@ class ProjectConsumer(AsyncWebsocketConsumer):
     AsyncWebsocketConsumer to handle real-time updates for a specific project.
     Users connect to a project-specific channel layer group.
     Handles task creation, updates, comments, and user activity within the project.
+    Clients reconnecting with `?since=<seq>` first receive the events they missed,
+    or a `resync_required` event when those are no longer in the replay log.
+    Client messages are rate limited per connection and user activity is coalesced
+    (see apps.common.presence).
     """
 
+    # Sequence number of the last replayed event, live events up to it are dropped
+    replayed_seq = 0
+
     async def connect(self):
         """
         Handles WebSocket connection requests.
@@ -25,8 +40,7 @@ class ProjectConsumer(AsyncWebsocketConsumer):
         self.project_id = self.scope["url_route"]["kwargs"]["project_id"]
 
         # Create a group name for this project
-        # Group names can only contain ASCII letters, numbers, hyphens, and underscores.
-        self.project_group_name = f"project_{self.project_id}"
+        self.project_group_name = project_group_name(self.project_id)
 
         # Get the user from the scope (authenticated by your JWT middleware)
         user = self.scope["user"]
@@ -41,12 +55,22 @@ class ProjectConsumer(AsyncWebsocketConsumer):
                 self.project_group_name, self.channel_name
             )
 
+            self.inbound_bucket = TokenBucket(
+                settings.WS_INBOUND_RATE, settings.WS_INBOUND_BURST
+            )
+            presence.join(self.project_id, self.channel_name)
+
             # Accept the WebSocket connection
             await self.accept()
             print(
                 f"WebSocket connected: User {user.username} ({user.id}) joined project group {self.project_group_name}"
             )
 
+            # Joined the group before replaying, so no event is missed in between
+            since = self.get_since()
+            if since is not None:
+                await self.replay_events(since)
+
         else:
             # If not authenticated or not a project member, close the connection
             print(
@@ -62,6 +86,7 @@ class ProjectConsumer(AsyncWebsocketConsumer):
         Removes the user's channel from the project group.
         """
         print(f"WebSocket disconnected with code: {close_code}")
+        presence.leave(self.project_id, self.channel_name)
         # Leave the project group
         if self.channel_layer is not None:
             await self.channel_layer.group_discard(
@@ -72,7 +97,11 @@ class ProjectConsumer(AsyncWebsocketConsumer):
         """
         Handles receiving messages from the WebSocket.
         (Optional: Can be used for client-to-server messages, e.g., user activity indicators)
+        Messages over the connection rate limit are dropped.
         """
+        if not self.inbound_bucket.consume():
+            return
+
         text_data_json = json.loads(text_data)
         message_type = text_data_json.get("type")
         user = self.scope["user"]
@@ -98,98 +127,92 @@ class ProjectConsumer(AsyncWebsocketConsumer):
         #     task_id = text_data_json.get('task_id')
         #     await self.mark_comments_as_read(user, task_id)
 
+    async def dispatch(self, message):
+        """
+        Forwards pre-encoded frames without closing old database connections
+        first, which costs a hop to the sync thread per event and connection.
+        """
+        if message["type"] == FRAME_MESSAGE_TYPE:
+            await self.broadcast_frame(message)
+        else:
+            await super().dispatch(message)
+
     # --- Handlers for messages received from the Channel Layer Group ---
     # These methods are called when a message is sent to the project group
     # using channel_layer.group_send({'type': 'method_name', ...})
 
-    async def task_created(self, event):
+    async def broadcast_frame(self, event):
         """
-        Handles messages indicating a new task was created in the project.
-        Sends the new task data to connected clients.
-        Expected event structure: {'type': 'task_created', 'task': serialized_task_data}
+        Handles events published to the project group (see apps.common.broadcast),
+        e.g. task_created, task_updated, comment_added and user_activity.
+        The event is encoded once by the publisher, the frame is forwarded unchanged.
+        Expected event structure: {'type': 'broadcast.frame', 'text': encoded_event}
         """
-        task_data = event["task"]
-        payload = {"type": "task_created", "task": task_data}
-        await self.send(text_data=json.dumps(payload, cls=DjangoJSONEncoder))
-        print(f"Sent task_created message to group {self.project_group_name}")
+        seq = event.get("seq")
+        if seq is not None and seq <= self.replayed_seq:
+            return
+        await self.send(text_data=event["text"])
 
-    async def task_updated(self, event):
-        """
-        Handles messages indicating a task in the project was updated.
-        Sends the updated task data to connected clients.
-        Expected event structure: {'type': 'task_updated', 'task': serialized_task_data}
-        """
-        task_data = event["task"]
-        payload = {"type": "task_updated", "task": task_data}
-        await self.send(text_data=json.dumps(payload, cls=DjangoJSONEncoder))
-        print(f"Sent task_updated message to group {self.project_group_name}")
+    # --- Helper Methods (for handling client messages or database interaction) ---
 
-    async def comment_added(self, event):
+    async def handle_user_activity(self, user, activity_content, task_id):
         """
-        Handles messages indicating a new comment was added to a task in the project.
-        Sends the new comment data to connected clients.
-        Expected event structure: {'type': 'comment_added', 'comment': serialized_comment_data}
+        Processes user activity messages received from the client and broadcasts them,
+        at most once per coalescing window for the same user, task and activity.
+        An update dropped in the window is broadcast at its end if still current.
         """
-        comment_data = event["comment"]
-        payload = {"type": "comment_added", "comment": comment_data}
-        await self.send(
-            await self.send(text_data=json.dumps(payload, cls=DjangoJSONEncoder))
-        )
-        print(f"Sent comment_added message to group {self.project_group_name}")
-
-    async def user_activity_message(self, event):
-        """
-        Handles user activity messages broadcast within the project group.
-        Sends the activity data back to the WebSocket.
-        Expected event structure: {'type': 'user_activity_message', 'user_id': ..., 'username': ..., 'activity': ..., 'task_id': ..., 'timestamp': ...}
-        """
-        # Send the activity data back to the WebSocket
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "user_activity",
-                    "user_id": event["user_id"],
-                    "username": event["username"],
-                    "activity": event["activity"],
-                    "task_id": event.get("task_id"),  # task_id might be optional
-                    "timestamp": event["timestamp"],
-                }
+        # You might want to validate the activity_content or task_id here
+        if activity_content not in ["typing", "viewing"]:
+            return
+
+        task_id = str(task_id) if task_id else None
+        if presence.update(
+            self.project_id, self.channel_name, user, task_id, activity_content
+        ):
+            await presence.broadcast_activity(
+                self.project_id,
+                presence.get_activity(self.project_id, self.channel_name, task_id),
+                task_id,
             )
-        )
-        print(
-            f"Sent user activity '{event.get('activity')}' from {event.get('username')} to WebSocket in group {self.project_group_name}"
-        )
+        else:
+            presence.flush_later(self.project_id, self.channel_name, task_id)
 
-    # --- Helper Methods (for handling client messages or database interaction) ---
+    def get_since(self):
+        """
+        Sequence number of the last event received by the client, from `?since=`.
+        """
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        try:
+            return int(query["since"][0])
+        except (KeyError, ValueError):
+            return None
 
-    async def handle_user_activity(self, user, activity_content, task_id):
+    async def replay_events(self, since):
         """
-        Processes user activity messages received from the client and broadcasts them.
+        Sends the events published after `since`, or `resync_required` with the
+        current sequence number when the client must re-fetch the project state.
         """
-        # You might want to validate the activity_content or task_id here
-        if activity_content in ["typing", "viewing"]:
-            await self.channel_layer.group_send(
-                self.project_group_name,
-                {
-                    "type": "user_activity_message",  # This calls the user_activity_message method
-                    "user_id": str(user.id),
-                    "username": user.username,
-                    "activity": activity_content,
-                    "task_id": str(task_id) if task_id else None,
-                    "timestamp": timezone.now().isoformat(),
-                },
+        events = await database_sync_to_async(outbox.replay_events)(
+            self.project_id, since
+        )
+        if events is None:
+            last_seq = await database_sync_to_async(outbox.get_last_seq)(
+                self.project_id
             )
+            self.replayed_seq = last_seq
+            await self.send(text_data=encode_event("resync_required", seq=last_seq))
+            return
+
+        for seq, frame in events:
+            await self.send(text_data=frame)
+            self.replayed_seq = seq
 
     @database_sync_to_async
     def is_project_member(self, user, project_id):
         """
         Checks if the given user is a member of the project with the given ID.
-        Runs database query asynchronously.
+        Uses the cached membership lookup, runs database query asynchronously on cache miss.
         """
         if user.is_anonymous:
             return False
-        try:
-            project = Project.objects.get(id=project_id)
-            return project.members.filter(id=user.id).exists()
-        except Project.DoesNotExist:
-            return False
+        return membership.is_project_member(user.id, project_id)
@@ -0,0 +1,151 @@
+"""
+Thread pool running the database work of async code: consumers, the outbox
+dispatcher and the async read views (see `apps.common.views.AsyncReadViewMixin`).
+
+asgiref runs thread sensitive `sync_to_async` calls made outside of a request
+in a single thread for the whole process, and those made during a request in
+a thread created for that request, which opens its own database connection.
+On the ASGI server event loop, which `DatabaseExecutorMiddleware` binds the
+executor to, calls through `database_sync_to_async` run on
+`DATABASE_EXECUTOR_THREADS` long-lived threads instead, whose connections are
+reused within `DATABASE_CONN_MAX_AGE`, whatever the `CONN_MAX_AGE` of the
+request threads. On other event loops, e.g. those of
+`async_to_sync` in tests, WSGI or management commands, they run as thread
+sensitive `sync_to_async` calls: in the calling sync thread, within its
+transaction.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+
+class DatabaseExecutor:
+    """
+    Bounded thread pool with usage metrics, see `stats()`. Calls wait in the
+    queue while all threads are busy, the queue wait tells when to add threads.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._loop = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.running = 0
+        self.max_queued = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers,
+                    thread_name_prefix="database",
+                    initializer=self._init_thread,
+                )
+            return self._executor
+
+    def _init_thread(self):
+        # The settings dict is shared by the connections of all threads
+        connection.settings_dict = {
+            **connection.settings_dict,
+            "CONN_MAX_AGE": settings.DATABASE_CONN_MAX_AGE,
+        }
+
+    def _run(self, submitted_at, func, *args, **kwargs):
+        started_at = time.perf_counter()
+        waited = started_at - submitted_at
+        with self._lock:
+            self.running += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        # As channels.db.DatabaseSyncToAsync, connections outliving
+        # CONN_MAX_AGE or broken are closed around each call
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_seconds += time.perf_counter() - started_at
+
+    def bind(self):
+        """
+        Run the calls made from the running event loop, the server's, on the pool.
+        """
+        self._loop = asyncio.get_running_loop()
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            return await sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
+
+        executor = self.get_executor()
+        with self._lock:
+            self.submitted += 1
+            queued = self.submitted - self.completed - self.running
+            self.max_queued = max(self.max_queued, queued)
+        context = contextvars.copy_context()
+        call = functools.partial(
+            context.run, self._run, time.perf_counter(), func, *args, **kwargs
+        )
+        return await loop.run_in_executor(executor, call)
+
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                "threads": self.max_workers,
+                "running": self.running,
+                "queued": self.submitted - self.completed - self.running,
+                "max_queued": self.max_queued,
+                "completed": completed,
+                "avg_wait_ms": (
+                    round(self.wait_seconds / completed * 1000, 3) if completed else 0
+                ),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "avg_run_ms": (
+                    round(self.run_seconds / completed * 1000, 3) if completed else 0
+                ),
+            }
+
+
+executor = DatabaseExecutor(settings.DATABASE_EXECUTOR_THREADS)
+
+
+def database_sync_to_async(func):
+    """
+    `channels.db.database_sync_to_async` running on `executor`.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await executor.run(func, *args, **kwargs)
+
+    return wrapper
+
+
+class DatabaseExecutorMiddleware:
+    """
+    ASGI middleware binding the database executor to the server event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        executor.bind()
+        return await self.app(scope, receive, send)
@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, partial
+
+import bleach
+import markdown
+from bleach.linkifier import LinkifyFilter
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import TextField
+from django.db.models.signals import post_save
+from django.dispatch import Signal
+from markdownfield.models import EXTENSION_CONFIGS, EXTENSIONS, MarkdownField
+from markdownfield.util import blacklist_link, format_link
+
+from apps.common.cache import MISSING, LRUCache
+
+# Bump when the rendering changes in a way not captured by `renderer_version`,
+# then run `manage.py rerender_markdown`.
+RENDERER_VERSION = 1
+
+# Rendered HTML keyed by (renderer version, content hash)
+render_cache = LRUCache(settings.MARKDOWN_RENDER_CACHE_SIZE)
+
+# Sent once a deferred rendering is stored, with the `instance_pk`, `field` and `html`
+markdown_rendered = Signal()
+# Sent by `manage.py rerender_markdown` with the `pks` of re-rendered instances
+markdown_rerendered = Signal()
+
+# Instance attribute holding the content of the fields left to render after save
+PENDING_ATTR = "_pending_markdown"
+
+logger = logging.getLogger(__name__)
+
+
+def renderer_version(validator):
+    """
+    Identifies the rendering of a validator: any change of the markdown
+    extensions, library versions or sanitizing rules gives a new version.
+    """
+    css_properties = (
+        sorted(validator.css_sanitizer.allowed_css_properties)
+        if validator.css_sanitizer
+        else None
+    )
+    signature = repr(
+        (
+            RENDERER_VERSION,
+            markdown.__version__,
+            bleach.__version__,
+            EXTENSIONS,
+            sorted(EXTENSION_CONFIGS.items()),
+            sorted(validator.allowed_tags),
+            sorted(
+                (tag, sorted(attrs)) for tag, attrs in validator.allowed_attrs.items()
+            ),
+            css_properties,
+            validator.sanitize,
+            validator.linkify,
+        )
+    )
+    return hashlib.sha256(signature.encode()).hexdigest()[:16]
+
+
+def render_markdown(text, validator):
+    """
+    Renders markdown to sanitized HTML, as `markdownfield.models.MarkdownField`.
+    """
+    dirty = markdown.markdown(
+        text=text or "", extensions=EXTENSIONS, extension_configs=EXTENSION_CONFIGS
+    )
+    if not validator.sanitize:
+        return dirty
+
+    filters = []
+    if validator.linkify:
+        filters = [
+            partial(LinkifyFilter, callbacks=[format_link, blacklist_link]),
+        ]
+    cleaner = bleach.Cleaner(
+        tags=validator.allowed_tags,
+        attributes=validator.allowed_attrs,
+        css_sanitizer=validator.css_sanitizer,
+        filters=filters,
+    )
+    return cleaner.clean(dirty)
+
+
+def render_cache_key(text, version):
+    return (version, hashlib.sha256((text or "").encode()).hexdigest())
+
+
+def cached_render_markdown(text, validator, version=None):
+    """
+    `render_markdown` through the LRU cache, identical content is rendered once.
+    """
+    key = render_cache_key(text, version or renderer_version(validator))
+    html = render_cache.get(key)
+    if html is MISSING:
+        html = render_markdown(text, validator)
+        render_cache.set(key, html)
+    return html
+
+
+def is_rendering_pending(instance):
+    """
+    Whether some markdown of the instance is still being rendered.
+    """
+    return any(
+        getattr(instance, field.rendered_field) is None
+        for field in instance._meta.concrete_fields
+        if isinstance(field, CachedMarkdownField) and field.rendered_field
+    )
+
+
+def store_rendering(model, pk, field_name, text):
+    """
+    Renders the content saved for a deferred field and stores the HTML, unless
+    the content changed in the meantime (its own rendering is on the way).
+    """
+    field = model._meta.get_field(field_name)
+    html = field.render(text)
+    with transaction.atomic():
+        updated = model._base_manager.filter(pk=pk, **{field.attname: text}).update(
+            **{field.rendered_field: html}
+        )
+        if updated:
+            markdown_rendered.send(sender=model, instance_pk=pk, field=field, html=html)
+
+
+class MarkdownRenderer:
+    """
+    Thread pool rendering deferred markdown fields once the saving transaction
+    commits, renders in the committing thread with `MARKDOWN_RENDER_WORKERS = 0`.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, model, pk, field_name, text):
+        if not settings.MARKDOWN_RENDER_WORKERS:
+            store_rendering(model, pk, field_name, text)
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    settings.MARKDOWN_RENDER_WORKERS,
+                    thread_name_prefix="markdown-render",
+                )
+        self._executor.submit(self._render, model, pk, field_name, text)
+
+    def _render(self, *args):
+        close_old_connections()
+        try:
+            store_rendering(*args)
+        except Exception:
+            # Left pending, `manage.py rerender_markdown` renders it
+            logger.exception("Failed to render markdown of %s %s", args[0], args[1])
+        finally:
+            close_old_connections()
+
+
+renderer = MarkdownRenderer()
+
+
+class CachedMarkdownField(MarkdownField):
+    """
+    MarkdownField rendering through the content hash cache (see `render_cache`).
+    With `MARKDOWN_RENDER_ASYNC`, content of at least `MARKDOWN_RENDER_ASYNC_MIN_LENGTH`
+    characters which is not cached is rendered by `renderer` after commit, the
+    rendered field is null until then.
+    """
+
+    @cached_property
+    def renderer_version(self):
+        return renderer_version(self.validator)
+
+    def render(self, text):
+        return cached_render_markdown(text, self.validator, self.renderer_version)
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        # Historical models of migrations are skipped
+        if self.rendered_field and cls.__module__ != "__fake__":
+            post_save.connect(self.schedule_rendering, sender=cls, weak=False)
+
+    def defer_rendering(self, text):
+        return (
+            settings.MARKDOWN_RENDER_ASYNC
+            and len(text or "") >= settings.MARKDOWN_RENDER_ASYNC_MIN_LENGTH
+            and render_cache.get(render_cache_key(text, self.renderer_version))
+            is MISSING
+        )
+
+    def pre_save(self, model_instance, add):
+        # MarkdownField.pre_save renders on every save, bypass it
+        value = TextField.pre_save(self, model_instance, add)
+        if not self.rendered_field:
+            return value
+
+        if self.defer_rendering(value):
+            setattr(model_instance, self.rendered_field, None)
+            model_instance.__dict__.setdefault(PENDING_ATTR, {})[self.name] = value
+        else:
+            setattr(model_instance, self.rendered_field, self.render(value))
+        return value
+
+    def schedule_rendering(self, sender, instance, **kwargs):
+        pending = instance.__dict__.get(PENDING_ATTR, {})
+        if self.name not in pending:
+            return
+        text = pending.pop(self.name)
+        transaction.on_commit(
+            partial(renderer.submit, sender, instance.pk, self.name, text)
+        )
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.common.models import OutboxEvent
+from apps.common.outbox import prune_events, send_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish outbox events left undispatched by the server and delete "
+        "dispatched events older than OUTBOX_RETENTION or out of the "
+        "OUTBOX_REPLAY_SIZE latest events of their project. "
+        "Requires a channel layer shared between processes (e.g. Redis)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=30,
+            help="Only publish events pending for at least this many seconds, "
+            "newer events are still being dispatched by the server.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep running, publishing pending events every this many "
+            "seconds. Relays the events of WSGI servers, with --grace 0.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.dispatch(options["grace"])
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
+
+    def dispatch(self, grace):
+        now = timezone.now()
+        pending = OutboxEvent.objects.filter(
+            dispatched_at__isnull=True,
+            created_at__lte=now - timedelta(seconds=grace),
+        ).order_by("id")
+
+        dispatched = 0
+        while batch := list(pending[: settings.OUTBOX_BATCH_SIZE]):
+            send_events(batch)
+            dispatched += len(batch)
+
+        deleted = prune_events(settings.OUTBOX_RETENTION, settings.OUTBOX_REPLAY_SIZE)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dispatched {dispatched} outbox events, deleted {deleted}."
+            )
+        )
@@ -0,0 +1,129 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from apps.common.fields import CachedMarkdownField, markdown_rerendered
+
+
+def markdown_fields(labels=None):
+    """
+    (model, field) of every CachedMarkdownField with a rendered field,
+    optionally restricted to the given "app_label.Model" labels.
+    """
+    models = (
+        [apps.get_model(label) for label in labels] if labels else apps.get_models()
+    )
+    return [
+        (model, field)
+        for model in models
+        for field in model._meta.concrete_fields
+        if isinstance(field, CachedMarkdownField) and field.rendered_field
+    ]
+
+
+def render_chunk(model_label, field_name, rows):
+    """
+    Renders a chunk of (pk, text, rendered) rows, returns the (pk, html) which
+    differ from the stored rendering. Runs in the worker processes.
+    """
+    field = apps.get_model(model_label)._meta.get_field(field_name)
+    changed = []
+    for pk, text, rendered in rows:
+        html = field.render(text)
+        if html != rendered:
+            changed.append((pk, html))
+    return changed
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render the stored HTML of markdown fields, in chunks across a process "
+        "pool. Run after changing the markdown renderer or validators."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Models to re-render as app_label.Model, defaults to all models.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Worker processes, 1 renders in the command process.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fields = markdown_fields(options["models"])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+
+        workers = max(options["workers"] or 1, 1)
+        self.max_in_flight = workers * 2
+        executor = None
+        if workers > 1:
+            # Forked workers must not share the database connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(workers, initializer=django.setup)
+
+        try:
+            for model, field in fields:
+                updated = self.rerender(model, field, options["chunk_size"], executor)
+                self.stdout.write(
+                    f"{model._meta.label}.{field.name}: {updated} rows updated"
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS("Markdown re-rendered."))
+
+    def chunks(self, model, field, chunk_size):
+        # Keyset pagination on the primary key, soft deleted rows included
+        queryset = model._base_manager.order_by("pk").values_list(
+            "pk", field.attname, field.rendered_field
+        )
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(page[:chunk_size])
+            if not rows:
+                return
+            yield rows
+            last_pk = rows[-1][0]
+
+    def save(self, model, field, changed):
+        with transaction.atomic():
+            model._base_manager.bulk_update(
+                [model(pk=pk, **{field.rendered_field: html}) for pk, html in changed],
+                [field.rendered_field],
+            )
+            markdown_rerendered.send(sender=model, pks=[pk for pk, _ in changed])
+        return len(changed)
+
+    def rerender(self, model, field, chunk_size, executor):
+        label = model._meta.label
+        if executor is None:
+            return sum(
+                self.save(model, field, render_chunk(label, field.name, rows))
+                for rows in self.chunks(model, field, chunk_size)
+            )
+
+        # Bounded number of chunks in flight, rows are read and written here
+        updated = 0
+        pending = set()
+        for rows in self.chunks(model, field, chunk_size):
+            pending.add(executor.submit(render_chunk, label, field.name, rows))
+            if len(pending) >= self.max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                updated += sum(self.save(model, field, f.result()) for f in done)
+        for future in pending:
+            updated += self.save(model, field, future.result())
+        return updated
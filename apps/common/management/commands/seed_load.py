@@ -0,0 +1,470 @@
+import itertools
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import DateField, DateTimeField, UUIDField
+from django.utils import timezone
+
+from apps.common.models import CustomUser
+from apps.v1.comments.models import Comment, TaskReadMarker
+from apps.v1.projects.models import Project, ProjectInvitation, ProjectMembership
+from apps.v1.search.index import create_index, drop_index
+from apps.v1.tasks.models import Task
+
+WORDS = (
+    "login page export report invoice dashboard crash timeout upload avatar "
+    "search filter sort email notification webhook token session cache query "
+    "button modal layout mobile safari chrome api endpoint migration release "
+    "deploy rollback latency memory leak retry queue worker schedule backup"
+).split()
+
+TEXT_TEMPLATES = (
+    "The **{0}** {1} fails when the {2} is empty.",
+    "## Steps\n\n1. Open the {0} {1}\n2. Click *{2}*\n3. Wait for the {3}\n\n"
+    "Expected the {1} to load, got a `{4}` error instead.",
+    "Looks like a {0} issue, see `{1}_{2}.log`:\n\n```\n{3} {4} failed\n```",
+    "- [ ] {0} {1}\n- [ ] {2} {3}\n- [x] {4}\n\nhttps://example.com/{0}/{2}",
+    "> {0} {1} {2}\n\nCan't reproduce, the {3} works on {4} for me.",
+)
+
+
+def zipf_cum_weights(size, skew):
+    """
+    Cumulative weights of `random.choices` where the n-th item is picked
+    1/n**skew as often as the first one, a skew of 0 is uniform.
+    """
+    return list(itertools.accumulate(1 / rank**skew for rank in range(1, size + 1)))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def column_adapter(field):
+    """
+    Converts values of the field to their database representation, as
+    `get_db_prep_save` does without its per value overhead. None when the
+    value is passed as is.
+    """
+    target = field.target_field if field.is_relation else field
+    if isinstance(target, UUIDField) and not connection.features.has_native_uuid_field:
+        return lambda value: value.hex if value is not None else None
+    if isinstance(target, DateTimeField):
+        return connection.ops.adapt_datetimefield_value
+    if isinstance(target, DateField):
+        return connection.ops.adapt_datefield_value
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset for benchmarks and load tests: users, "
+        "projects, memberships, invitations, tasks with markdown descriptions, "
+        "comments and read markers, inserted in chunks. Tasks and comments are "
+        "spread over projects with a Zipf skew, so a few hot projects hold most "
+        "of them. The same options and seed give the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--projects", type=int, default=1_000)
+        parser.add_argument(
+            "--members", type=int, default=20, help="Members per project."
+        )
+        parser.add_argument(
+            "--invitations",
+            type=int,
+            default=2,
+            help="Pending invitations per project.",
+        )
+        parser.add_argument("--tasks", type=int, default=200_000)
+        parser.add_argument("--comments", type=int, default=1_000_000)
+        parser.add_argument(
+            "--read-ratio",
+            type=float,
+            default=0.3,
+            help="Share of the project members with a read marker on each task.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of the project sizes, 0 for uniform.",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="Rows are created over that period."
+        )
+        parser.add_argument(
+            "--text-variants",
+            type=int,
+            default=256,
+            help="Distinct markdown texts, each one is rendered once.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=10_000)
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Prefix of the usernames and project titles.",
+        )
+        parser.add_argument(
+            "--password", default="tickethub", help="Password of every user."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.prefix = options["prefix"]
+        self.chunk_size = max(options["chunk_size"], 1)
+        self.validate()
+
+        self.now = timezone.now()
+        self.period = timedelta(days=options["days"]).total_seconds()
+        self.texts = [
+            self.rng.choice(TEXT_TEMPLATES).format(*self.rng.sample(WORDS, 5))
+            for _ in range(max(options["text_variants"], 1))
+        ]
+
+        started_at = time.perf_counter()
+        reindex = connection.vendor == "sqlite"
+        if reindex:
+            with connection.cursor() as cursor:
+                # Indexing the rows once loaded is much faster than the triggers
+                drop_index(cursor)
+                # Random UUID keys hit every page of the indexes, keep them in
+                # memory (256 MiB, for this connection only)
+                cursor.execute(f"PRAGMA cache_size = -{256 * 1024}")
+        models = [
+            CustomUser,
+            Project,
+            ProjectMembership,
+            ProjectInvitation,
+            Task,
+            Comment,
+            TaskReadMarker,
+        ]
+        try:
+            with self.deferred_indexes(models):
+                total = self.load()
+        finally:
+            if reindex:
+                self.reindex()
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} rows generated in {elapsed:.1f}s "
+                f"({total / elapsed:,.0f} rows/s)."
+            )
+        )
+
+    def load(self):
+        total = 0
+        total += self.insert(
+            CustomUser,
+            ["id", "username", "email", "password", "first_name", "date_joined"],
+            self.make_users(),
+        )
+        total += self.insert(
+            Project,
+            ["id", "title", "description", "status", "created_at", "updated_at"],
+            self.make_projects(),
+        )
+        total += self.insert(
+            ProjectMembership,
+            ["id", "user", "project", "role", "date_joined"]
+            + ["created_at", "updated_at"],
+            self.make_memberships(),
+        )
+        total += self.insert(
+            ProjectInvitation,
+            ["id", "user", "project", "invited_by", "sent_at"]
+            + ["created_at", "updated_at"],
+            self.make_invitations(),
+        )
+        total += self.insert(
+            Task,
+            ["id", "project", "creator", "assignee", "title", "description"]
+            + ["description_rendered", "status", "due_date"]
+            + ["created_at", "updated_at"],
+            self.make_tasks(),
+        )
+        total += self.insert(
+            Comment,
+            ["id", "task", "author", "content", "content_rendered"]
+            + ["created_at", "updated_at"],
+            self.make_comments(),
+        )
+        total += self.insert(
+            TaskReadMarker,
+            ["id", "user", "task", "last_read_at", "created_at", "updated_at"],
+            self.make_read_markers(),
+        )
+        return total
+
+    def validate(self):
+        options = self.options
+        counts = ("users", "projects", "members", "invitations", "tasks", "comments")
+        if any(options[name] < 0 for name in counts):
+            raise CommandError("Counts can't be negative.")
+        if options["members"] + options["invitations"] > options["users"]:
+            raise CommandError("--members and --invitations exceed --users.")
+        if options["projects"] and not options["members"]:
+            raise CommandError("Projects need at least one member.")
+        if options["tasks"] and not options["projects"]:
+            raise CommandError("Tasks need at least one project.")
+        if options["comments"] and not options["tasks"]:
+            raise CommandError("Comments need at least one task.")
+        if not 0 <= options["read_ratio"] <= 1:
+            raise CommandError("--read-ratio must be between 0 and 1.")
+        if CustomUser.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(
+                f"Users prefixed {self.prefix}_ exist, pass another --prefix."
+            )
+
+    def insert(self, model, field_names, rows):
+        """
+        Inserts the rows, tuples of values of the given fields, in chunks of
+        one `executemany` per transaction. The other columns get their default.
+        Models are not instantiated: no save(), signals nor pre_save().
+        """
+        fields = [model._meta.get_field(name) for name in field_names]
+        defaults = [
+            field for field in model._meta.concrete_fields if field not in fields
+        ]
+        default_values = [
+            field.get_db_prep_save(field.get_default(), connection)
+            for field in defaults
+        ]
+        adapters = [column_adapter(field) for field in fields]
+        quote = connection.ops.quote_name
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ", ".join(quote(field.column) for field in fields + defaults),
+            ", ".join(["%s"] * (len(fields) + len(defaults))),
+        )
+
+        count = 0
+        started_at = time.perf_counter()
+        for chunk in chunked(rows, self.chunk_size):
+            params = [
+                [
+                    adapter(value) if adapter else value
+                    for adapter, value in zip(adapters, row)
+                ]
+                + default_values
+                for row in chunk
+            ]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+            count += len(chunk)
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            f"{model._meta.label}: {count} rows in {elapsed:.1f}s "
+            f"({count / max(elapsed, 1e-9):,.0f} rows/s)"
+        )
+        return count
+
+    @contextmanager
+    def deferred_indexes(self, models):
+        """
+        Drops the `Meta.indexes` of the models while loading, building an index
+        once is much faster than updating it on every insert.
+        """
+        # Only used to write the SQL, entering it is not possible in a transaction
+        editor = connection.schema_editor()
+        quote = connection.ops.quote_name
+        indexes = [(model, index) for model in models for index in model._meta.indexes]
+        with connection.cursor() as cursor:
+            for model, index in indexes:
+                cursor.execute(
+                    editor.sql_delete_index
+                    % {"table": quote(model._meta.db_table), "name": quote(index.name)}
+                )
+        try:
+            yield
+        finally:
+            started_at = time.perf_counter()
+            with connection.cursor() as cursor:
+                for model, index in indexes:
+                    cursor.execute(str(index.create_sql(model, editor)))
+            elapsed = time.perf_counter() - started_at
+            self.stdout.write(f"{len(indexes)} indexes rebuilt in {elapsed:.1f}s")
+
+    def reindex(self):
+        started_at = time.perf_counter()
+        with connection.cursor() as cursor:
+            with transaction.atomic():
+                create_index(cursor)
+            # Planner statistics of the new data
+            cursor.execute("ANALYZE")
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(f"Search index and statistics rebuilt in {elapsed:.1f}s")
+
+    def rendered_texts(self, model, field_name):
+        """
+        (text, html) of the markdown texts, rendered once for the field.
+        """
+        field = model._meta.get_field(field_name)
+        return [(text, field.render(text)) for text in self.texts]
+
+    def random_time(self, after=None):
+        start = after or self.now - timedelta(seconds=self.period)
+        return start + (self.now - start) * self.rng.random()
+
+    def new_id(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def make_users(self):
+        password = make_password(self.options["password"])
+        self.user_ids = []
+        for i in range(self.options["users"]):
+            user_id = self.new_id()
+            self.user_ids.append(user_id)
+            yield (
+                user_id,
+                f"{self.prefix}_{i}",
+                f"{self.prefix}_{i}@example.com",
+                password,
+                self.rng.choice(WORDS).title(),
+                self.random_time(),
+            )
+
+    def make_projects(self):
+        self.project_ids = []
+        for i in range(self.options["projects"]):
+            project_id = self.new_id()
+            self.project_ids.append(project_id)
+            created_at = self.random_time()
+            yield (
+                project_id,
+                f"{self.prefix} project {i}",
+                self.rng.choice(self.texts),
+                (
+                    Project.ProjectStatus.ARCHIVED
+                    if self.rng.random() < 0.05
+                    else Project.ProjectStatus.ACTIVE
+                ),
+                created_at,
+                created_at,
+            )
+
+    def make_memberships(self):
+        # Indexes in `user_ids` of the members of each project, admin first
+        self.members = []
+        for project_id in self.project_ids:
+            members = self.rng.sample(
+                range(len(self.user_ids)), self.options["members"]
+            )
+            self.members.append(members)
+            for position, user in enumerate(members):
+                joined_at = self.random_time()
+                yield (
+                    self.new_id(),
+                    self.user_ids[user],
+                    project_id,
+                    (
+                        ProjectMembership.ProjectRole.ADMIN
+                        if position == 0
+                        else ProjectMembership.ProjectRole.MEMBER
+                    ),
+                    joined_at,
+                    joined_at,
+                    joined_at,
+                )
+
+    def make_invitations(self):
+        for project_id, members in zip(self.project_ids, self.members):
+            invited = set(members)
+            for _ in range(self.options["invitations"]):
+                user = self.rng.randrange(len(self.user_ids))
+                while user in invited:
+                    user = self.rng.randrange(len(self.user_ids))
+                invited.add(user)
+                sent_at = self.random_time()
+                yield (
+                    self.new_id(),
+                    self.user_ids[user],
+                    project_id,
+                    self.user_ids[members[0]],
+                    sent_at,
+                    sent_at,
+                    sent_at,
+                )
+
+    def make_tasks(self):
+        # Indexes in `tasks` of the tasks of each project, and the (id,
+        # project index, created_at) of every task
+        self.project_tasks = [[] for _ in self.project_ids]
+        self.tasks = []
+        texts = self.rendered_texts(Task, "description")
+        statuses = Task.TaskStatus.values
+        projects = range(len(self.project_ids))
+        cum_weights = zipf_cum_weights(len(self.project_ids), self.options["skew"])
+        for i in range(self.options["tasks"]):
+            project = self.rng.choices(projects, cum_weights=cum_weights)[0]
+            members = self.members[project]
+            task_id = self.new_id()
+            created_at = self.random_time()
+            due_date = None
+            if self.rng.random() < 0.3:
+                due_date = (created_at + timedelta(days=self.rng.randint(1, 90))).date()
+            self.project_tasks[project].append(len(self.tasks))
+            self.tasks.append((task_id, project, created_at))
+            yield (
+                task_id,
+                self.project_ids[project],
+                self.user_ids[self.rng.choice(members)],
+                self.user_ids[self.rng.choice(members)],
+                f"{self.rng.choice(WORDS).title()} {self.rng.choice(WORDS)} {i}",
+                *self.rng.choice(texts),
+                self.rng.choice(statuses),
+                due_date,
+                created_at,
+                self.random_time(after=created_at),
+            )
+
+    def make_comments(self):
+        # Projects get comments in proportion to their tasks, hot ones dominate
+        texts = self.rendered_texts(Comment, "content")
+        projects = range(len(self.project_ids))
+        cum_weights = list(itertools.accumulate(map(len, self.project_tasks)))
+        for _ in range(self.options["comments"]):
+            project = self.rng.choices(projects, cum_weights=cum_weights)[0]
+            task_id, _, task_created_at = self.tasks[
+                self.rng.choice(self.project_tasks[project])
+            ]
+            created_at = self.random_time(after=task_created_at)
+            yield (
+                self.new_id(),
+                task_id,
+                self.user_ids[self.rng.choice(self.members[project])],
+                *self.rng.choice(texts),
+                created_at,
+                created_at,
+            )
+
+    def make_read_markers(self):
+        ratio = self.options["read_ratio"]
+        for task_id, project, created_at in self.tasks:
+            members = self.members[project]
+            # Rounded up or down at random, so small projects get markers too
+            count = min(int(len(members) * ratio + self.rng.random()), len(members))
+            for user in self.rng.sample(members, count):
+                read_at = self.random_time(after=created_at)
+                yield (
+                    self.new_id(),
+                    self.user_ids[user],
+                    task_id,
+                    read_at,
+                    read_at,
+                    read_at,
+                )
@@ -0,0 +1,61 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def delete_outbox_events(apps, schema_editor):
+    # Events recorded before sequence numbers were introduced can't be replayed.
+    apps.get_model("common", "OutboxEvent").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0002_outboxevent"),
+        ("projects", "0009_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_outbox_events, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="ProjectEventSequence",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="event_sequence",
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("last_seq", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name="outboxevent",
+            name="group",
+        ),
+        migrations.AddField(
+            model_name="outboxevent",
+            name="project",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="outbox_events",
+                to="projects.project",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="outboxevent",
+            name="seq",
+            field=models.PositiveBigIntegerField(),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name="outboxevent",
+            constraint=models.UniqueConstraint(
+                fields=("project", "seq"), name="common_outbox_project_seq_uniq"
+            ),
+        ),
+    ]
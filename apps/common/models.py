@@ -4,6 +4,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser
 
+from apps.common.broadcast import project_group_name
+
 
 # Create your models here.
 class BaseModel(models.Model):
@@ -22,3 +24,58 @@ class CustomUser(AbstractUser):
     profile_picture = models.ImageField(
         _("profile picture"), upload_to="profile_pictures/", blank=True, null=True
     )
+
+
+class ProjectEventSequence(models.Model):
+    """
+    Last sequence number assigned to a project's real-time events.
+    """
+
+    project = models.OneToOneField(
+        "projects.Project",
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="event_sequence",
+    )
+    last_seq = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Event sequence of {self.project_id}: {self.last_seq}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Real-time project event recorded in the same transaction as the change it
+    describes. Published to the project group after commit (see apps.common.outbox)
+    and kept as the replay log of reconnecting clients.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    project = models.ForeignKey(
+        "projects.Project", on_delete=models.CASCADE, related_name="outbox_events"
+    )
+    seq = models.PositiveBigIntegerField()  # Monotonic within the project
+    frame = models.TextField()  # JSON encoded event sent to WebSocket clients
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "seq"], name="common_outbox_project_seq_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(dispatched_at__isnull=True),
+                name="common_outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Outbox event {self.seq} of project {self.project_id}"
+
+    @property
+    def group(self):
+        return project_group_name(self.project_id)
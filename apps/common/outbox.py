@@ -0,0 +1,196 @@
+"""
+Transactional outbox for real-time project events.
+
+`publish_project_event` stores the encoded event in the same transaction as the
+change it describes. Once the transaction commits the event is handed to the
+`OutboxDispatcher`, an asyncio task running on the ASGI server event loop which
+publishes queued events to the channel layer in batches. Request handlers never
+wait on the channel layer and events of rolled back transactions are never sent.
+
+Events not dispatched by the server are published by the `dispatch_outbox`
+management command: those committed while no dispatcher runs in the process
+(WSGI, management commands, ASGI before the first request) and those still
+queued when the process exited. WSGI deployments run it as a relay,
+`dispatch_outbox --interval 1 --grace 0`.
+
+Events are numbered per project, the latest `OUTBOX_REPLAY_SIZE` events form the
+replay log sent to WebSocket clients reconnecting with `?since=<seq>`.
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.common.broadcast import encode_event, frame_message
+from apps.common.executor import database_sync_to_async
+from apps.common.models import OutboxEvent, ProjectEventSequence
+
+logger = logging.getLogger(__name__)
+
+
+def publish_project_event(project_id, event_type, **data):
+    """
+    Record an event for the project WebSocket group, sent after the current
+    transaction commits.
+    e.g. publish_project_event(project.id, "task_created", task=serializer.data)
+    """
+    with transaction.atomic():
+        seq = next_event_seq(project_id)
+        event = OutboxEvent.objects.create(
+            project_id=project_id,
+            seq=seq,
+            frame=encode_event(event_type, seq=seq, **data),
+        )
+    transaction.on_commit(lambda: dispatcher.enqueue(event))
+    return event
+
+
+def next_event_seq(project_id):
+    # The row lock orders concurrent publishers, sequence numbers are assigned
+    # in commit order.
+    sequence, _ = ProjectEventSequence.objects.select_for_update().get_or_create(
+        project_id=project_id
+    )
+    sequence.last_seq += 1
+    sequence.save(update_fields=["last_seq"])
+    return sequence.last_seq
+
+
+def get_last_seq(project_id):
+    return (
+        ProjectEventSequence.objects.filter(project_id=project_id)
+        .values_list("last_seq", flat=True)
+        .first()
+        or 0
+    )
+
+
+def replay_events(project_id, since):
+    """
+    (seq, frame) of the project events published after `since`, in order.
+    Returns None when some of them are no longer in the replay log.
+    """
+    events = list(
+        OutboxEvent.objects.filter(project_id=project_id, seq__gt=since)
+        .order_by("seq")
+        .values_list("seq", "frame")[: settings.OUTBOX_REPLAY_SIZE + 1]
+    )
+    if not events:
+        # Nothing missed, unless the client is ahead of the log (e.g. reset database)
+        return [] if since == get_last_seq(project_id) else None
+    if events[0][0] != since + 1 or len(events) > settings.OUTBOX_REPLAY_SIZE:
+        return None
+    return events
+
+
+def prune_events(retention, replay_size):
+    """
+    Delete dispatched events older than `retention` seconds or out of the
+    replay log of their project. Returns the number of deleted events.
+    """
+    deleted, _ = (
+        OutboxEvent.objects.filter(dispatched_at__isnull=False)
+        .filter(
+            Q(dispatched_at__lt=timezone.now() - timedelta(seconds=retention))
+            | Q(seq__lte=F("project__event_sequence__last_seq") - replay_size)
+        )
+        .delete()
+    )
+    return deleted
+
+
+def mark_dispatched(events):
+    OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+        dispatched_at=timezone.now()
+    )
+
+
+async def asend_events(events):
+    # Sent one by one, in order, so clients receive events in commit order.
+    channel_layer = get_channel_layer()
+    for event in events:
+        await channel_layer.group_send(
+            event.group, frame_message(event.frame, seq=event.seq)
+        )
+
+
+def send_events(events):
+    """
+    Publish events to the channel layer and mark them dispatched.
+    """
+    async_to_sync(asend_events)(events)
+    mark_dispatched(events)
+
+
+class OutboxDispatcher:
+    """
+    Publishes committed outbox events from the ASGI server event loop.
+    Started on the first ASGI request (see `OutboxDispatcherMiddleware`), until then
+    (management commands, tests, WSGI) events are left to `dispatch_outbox`,
+    writes never wait on the channel layer.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self):
+        return (
+            self._task is not None
+            and not self._task.done()
+            and not self._loop.is_closed()
+        )
+
+    def start(self):
+        """
+        Start dispatching on the running event loop, no-op when already running.
+        """
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = self._loop.create_task(self._run())
+
+    def enqueue(self, event):
+        if not self.running:
+            return
+        # Called from the request worker thread, hand over to the event loop.
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def _run(self):
+        while True:
+            events = [await self._queue.get()]
+            while len(events) < self.batch_size and not self._queue.empty():
+                events.append(self._queue.get_nowait())
+            try:
+                await asend_events(events)
+                await database_sync_to_async(mark_dispatched)(events)
+            except Exception:
+                # Left undispatched, picked up by the `dispatch_outbox` command.
+                logger.exception("Failed to dispatch %d outbox events", len(events))
+
+
+dispatcher = OutboxDispatcher(batch_size=settings.OUTBOX_BATCH_SIZE)
+
+
+class OutboxDispatcherMiddleware:
+    """
+    ASGI middleware starting the outbox dispatcher on the server event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        dispatcher.start()
+        return await self.app(scope, receive, send)
@@ -0,0 +1,179 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    LimitOffsetPagination,
+    _reverse_ordering,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Cursor pagination on created_at, newest first, with the page size settings
+    of the API. The cursor holds the created_at of the page boundary, so every
+    page is an index range scan on (..., created_at, id) without OFFSET scan or
+    COUNT(*). Rows created at the same instant are skipped with an offset,
+    which shifts when a row is inserted among them: lists paginate with
+    `KeysetCursorPagination`, which holds the id as well.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class KeysetCursorPagination(CreatedAtCursorPagination):
+    """
+    Cursor (keyset) pagination on (field, id), with the field chosen by the
+    view's `get_ordering()` (e.g. "-due_date"), newest first by default.
+    The cursor holds both values of the page boundary, so the field may be
+    neither unique nor non-null. Nulls sort first, as in SQLite indexes.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "get_ordering", lambda: self.ordering[0])()
+        return (ordering, "-id" if ordering.startswith("-") else "id")
+
+    def _get_position_from_instance(self, instance, ordering):
+        value = getattr(instance, ordering[0].lstrip("-"))
+        return json.dumps([None if value is None else str(value), str(instance.pk)])
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            value, pk = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=cursor.reverse, position=(value, pk))
+
+    def encode_cursor(self, cursor):
+        # Positions are unique, there is never an offset
+        return super().encode_cursor(cursor._replace(offset=0))
+
+    def keyset_filter(self, queryset, position, reverse):
+        """
+        Rows after the position in the direction of the query. The redundant
+        range on the field lets the database seek in the (..., field, id) index.
+        """
+        value, pk = position
+        field = self.ordering[0].lstrip("-")
+        descending = self.ordering[0].startswith("-") != reverse
+        nullable = queryset.model._meta.get_field(field).null
+
+        if value is None:
+            # Among the nulls, after them ascending
+            after = Q(
+                **{f"{field}__isnull": True, "pk__lt" if descending else "pk__gt": pk}
+            )
+            return after if descending else after | Q(**{f"{field}__isnull": False})
+        if descending:
+            after = Q(**{f"{field}__lte": value}) & (
+                Q(**{f"{field}__lt": value}) | Q(pk__lt=pk)
+            )
+            return after | Q(**{f"{field}__isnull": True}) if nullable else after
+        return Q(**{f"{field}__gte": value}) & (
+            Q(**{f"{field}__gt": value}) | Q(pk__gt=pk)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset with a keyset filter on (field, id)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (
+            (self.cursor.reverse, self.cursor.position)
+            if self.cursor
+            else (False, None)
+        )
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(queryset, position, reverse))
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        following = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page)
+            else None
+        )
+        current = None if position is None else json.dumps(position)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = current is not None, current
+            self.has_previous, self.previous_position = following is not None, following
+        else:
+            self.has_next, self.next_position = following is not None, following
+            self.has_previous, self.previous_position = current is not None, current
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class OldestFirstCursorPagination(KeysetCursorPagination):
+    """
+    Cursor (keyset) pagination on (created_at, id), oldest first.
+    """
+
+    ordering = ("created_at", "id")
+
+
+class UncountedLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit-offset pagination without COUNT(*), for results which are expensive
+    to count such as full-text matches. One row past the page is fetched to
+    tell whether there is a next page.
+    """
+
+    default_limit = 20
+    max_limit = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        rows = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[: self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        del response_schema["properties"]["count"]
+        response_schema["required"].remove("count")
+        return response_schema
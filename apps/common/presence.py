@@ -0,0 +1,177 @@
+"""
+Presence of project members (who is viewing or typing on which task) for
+`ProjectConsumer`.
+
+Activity updates are coalesced per user and task: at most one update per
+`PRESENCE_COALESCE_INTERVAL` is broadcast to the project group. An update
+dropped in the window is broadcast at its end when it is still the current
+activity, so the last change of a burst is not lost. Projects with connected
+clients also receive a `presence_snapshot` event every
+`PRESENCE_SNAPSHOT_INTERVAL` listing the current activity per task, so clients
+catch up on the coalesced updates.
+
+State is kept in process while snapshots go to the project group, so presence
+supports a single server process: with several, each one would send snapshots
+of its own connections only.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.common.broadcast import abroadcast_to_project
+
+
+class PresenceRegistry:
+    """
+    Activity of the connections of each project, used from the event loop only.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        # project_id -> {(channel_name, task_id): activity}
+        self._activities = defaultdict(dict)
+        # (project_id, user_id, task_id, activity) -> time of the last broadcast
+        self._broadcast_at = {}
+        # project_id -> connected channel names
+        self._connections = defaultdict(set)
+        self._snapshot_tasks = {}
+        # (project_id, user_id, task_id, activity) -> pending trailing broadcast
+        self._flush_tasks = {}
+
+    def join(self, project_id, channel_name):
+        """
+        Registers a connection, starts the project snapshots on the first one.
+        """
+        self._connections[project_id].add(channel_name)
+        task = self._snapshot_tasks.get(project_id)
+        if task is None or task.done():
+            self._snapshot_tasks[project_id] = asyncio.get_running_loop().create_task(
+                self._broadcast_snapshots(project_id)
+            )
+
+    def leave(self, project_id, channel_name):
+        """
+        Forgets a connection and its activity, stops the project snapshots
+        after the last one.
+        """
+        self._connections[project_id].discard(channel_name)
+        activities = self._activities[project_id]
+        for key in [key for key in activities if key[0] == channel_name]:
+            del activities[key]
+
+        if not self._connections[project_id]:
+            del self._connections[project_id]
+            self._activities.pop(project_id, None)
+            self._broadcast_at = {
+                key: at
+                for key, at in self._broadcast_at.items()
+                if key[0] != project_id
+            }
+            task = self._snapshot_tasks.pop(project_id, None)
+            if task is not None:
+                task.cancel()
+            for key in [key for key in self._flush_tasks if key[0] == project_id]:
+                self._flush_tasks.pop(key).cancel()
+
+    def update(self, project_id, channel_name, user, task_id, activity):
+        """
+        Records the activity of a user on a task.
+        Returns False when an update was already broadcast in the coalescing window.
+        """
+        now = self.clock()
+        self._activities[project_id][(channel_name, task_id)] = {
+            "user_id": str(user.id),
+            "username": user.username,
+            "activity": activity,
+            "at": now,
+        }
+
+        key = (project_id, str(user.id), task_id, activity)
+        broadcast_at = self._broadcast_at.get(key)
+        if broadcast_at is not None and now - broadcast_at < (
+            settings.PRESENCE_COALESCE_INTERVAL
+        ):
+            return False
+        self._broadcast_at[key] = now
+        return True
+
+    def flush_later(self, project_id, channel_name, task_id):
+        """
+        Broadcasts the activity of the connection on the task, dropped by
+        `update`, at the end of the coalescing window if it is still current.
+        """
+        activity = self._activities[project_id][(channel_name, task_id)]
+        key = (project_id, activity["user_id"], task_id, activity["activity"])
+        task = self._flush_tasks.get(key)
+        if task is None or task.done():
+            delay = self._broadcast_at[key] + settings.PRESENCE_COALESCE_INTERVAL
+            self._flush_tasks[key] = asyncio.get_running_loop().create_task(
+                self._flush(key, channel_name, delay - self.clock())
+            )
+
+    async def _flush(self, key, channel_name, delay):
+        await asyncio.sleep(delay)
+        project_id, _, task_id, activity = key
+        current = self._activities.get(project_id, {}).get((channel_name, task_id))
+        if current is not None and current["activity"] == activity:
+            self._broadcast_at[key] = self.clock()
+            await self.broadcast_activity(project_id, current, task_id)
+
+    async def broadcast_activity(self, project_id, activity, task_id):
+        """
+        Sends a `user_activity` event for an activity recorded by `update`.
+        """
+        await abroadcast_to_project(
+            project_id,
+            "user_activity",
+            user_id=activity["user_id"],
+            username=activity["username"],
+            activity=activity["activity"],
+            task_id=task_id,
+            timestamp=timezone.now().isoformat(),
+        )
+
+    def get_activity(self, project_id, channel_name, task_id):
+        return self._activities[project_id][(channel_name, task_id)]
+
+    def snapshot(self, project_id):
+        """
+        Current activity per task, {task_id: [{user_id, username, activity}]}.
+        Activity older than `PRESENCE_TTL` is dropped.
+        """
+        expires_at = self.clock() - settings.PRESENCE_TTL
+        activities = self._activities.get(project_id, {})
+        expired = [key for key, value in activities.items() if value["at"] < expires_at]
+        for key in expired:
+            del activities[key]
+
+        tasks = defaultdict(dict)
+        for (_, task_id), value in sorted(
+            activities.items(), key=lambda item: item[1]["at"]
+        ):
+            # Latest activity of users connected more than once
+            tasks[task_id][value["user_id"]] = {
+                "user_id": value["user_id"],
+                "username": value["username"],
+                "activity": value["activity"],
+            }
+        return {task_id: list(users.values()) for task_id, users in tasks.items()}
+
+    async def _broadcast_snapshots(self, project_id):
+        previous = None
+        while True:
+            await asyncio.sleep(settings.PRESENCE_SNAPSHOT_INTERVAL)
+            snapshot = self.snapshot(project_id)
+            # Idle projects are skipped, after a last snapshot clearing the presence
+            if snapshot or previous:
+                await abroadcast_to_project(
+                    project_id, "presence_snapshot", tasks=snapshot
+                )
+            previous = snapshot
+
+
+registry = PresenceRegistry()
@@ -0,0 +1,151 @@
+import copy
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from apps.common.fields import is_rendering_pending
+
+
+class LazyLoadingError(Exception):
+    """
+    Raised when a serializer queries the DB for a relation which was not eager loaded.
+    """
+
+
+@contextmanager
+def forbid_queries(label):
+    """
+    Raise LazyLoadingError for any query executed within the block.
+    """
+
+    def blocker(execute, sql, params, many, context):
+        raise LazyLoadingError(
+            f"{label} executed a query while serializing, "
+            f"declare the relation in its eager loading plan instead: {sql}"
+        )
+
+    with connection.execute_wrapper(blocker):
+        yield
+
+
+class EagerLoadingMixin:
+    """
+    Serializer mixin to declare the relations to load along with the queryset.
+    Generic views using `EagerLoadingViewMixin` apply the plan automatically.
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def eager_load(cls, queryset, context=None):
+        """
+        prefetch data from DB to avoid N+1 queries.
+        Only the relations of fields which get serialized are loaded.
+        """
+        sources = cls.get_serialized_sources(context)
+        select_related = [
+            lookup
+            for lookup in cls.select_related_fields
+            if lookup.split("__")[0] in sources
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        # Prefetch objects are mutated while prefetching, use a copy of the declared ones
+        prefetch_related = [
+            copy.copy(lookup) if isinstance(lookup, Prefetch) else lookup
+            for lookup in cls.prefetch_related_fields
+            if cls._lookup_path(lookup).split("__")[0] in sources
+        ]
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    @classmethod
+    def get_serialized_fields(cls, context=None):
+        """
+        Fields which the serializer outputs for the given context.
+        """
+        return cls(context=context or {}).fields
+
+    @classmethod
+    def get_serialized_sources(cls, context=None):
+        """
+        Model attributes read by the fields which the serializer outputs.
+        """
+        return {
+            field.source.split(".")[0]
+            for field in cls.get_serialized_fields(context).values()
+        }
+
+    @staticmethod
+    def _lookup_path(lookup):
+        return lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+
+    def to_representation(self, instance):
+        if self.context.get("forbid_lazy_loading"):
+            with forbid_queries(type(self).__name__):
+                return super().to_representation(instance)
+        return super().to_representation(instance)
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets and opt-in relations on read requests.
+    `?fields=id,title` restricts the output to the given fields, and
+    `expandable_fields` are only output when requested with `?expand=comments`.
+    Only applies to the top level serializer, nested serializers are left untouched.
+    """
+
+    expandable_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+
+        requested, expanded = self._get_requested_fields()
+        return {
+            name: field
+            for name, field in fields.items()
+            if (name in expanded if name in self.expandable_fields else True)
+            and (requested is None or name in requested or name in expanded)
+        }
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def _get_requested_fields(self):
+        """
+        Return the requested fields (None when not restricted) and expanded fields.
+        """
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return None, set()
+
+        requested = _split_param(request.query_params.get("fields"))
+        expanded = _split_param(request.query_params.get("expand"))
+        return requested or None, expanded & set(self.expandable_fields)
+
+
+class MarkdownRenderingMixin(serializers.Serializer):
+    """
+    Serializer mixin adding `rendering_pending`, true while the markdown of the
+    instance is rendered in the background (the rendered fields are null).
+    """
+
+    rendering_pending = serializers.SerializerMethodField()
+
+    def get_rendering_pending(self, obj):
+        return is_rendering_pending(obj)
+
+
+def _split_param(value):
+    return {item.strip() for item in (value or "").split(",") if item.strip()}
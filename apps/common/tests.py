@@ -0,0 +1,1157 @@
+import asyncio
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.models import Count, F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from apps.common.broadcast import abroadcast_to_project, encode_event
+from apps.common.models import CustomUser, OutboxEvent, ProjectEventSequence
+from apps.common.cache import LRUCache
+from apps.common.executor import DatabaseExecutor
+from apps.common.fields import render_cache
+from apps.common.presence import PresenceRegistry
+from apps.common.throttling import TokenBucket
+from apps.common.views import response_cache
+from apps.common.outbox import (
+    OutboxDispatcher,
+    asend_events,
+    dispatcher,
+    prune_events,
+    publish_project_event,
+    replay_events,
+)
+from apps.v1.comments.models import Comment, TaskReadMarker
+from apps.v1.projects.membership import is_project_member, membership_cache
+from apps.v1.projects.models import Project, ProjectInvitation, ProjectMembership
+from apps.v1.projects.views import ProjectListView
+from apps.v1.search.models import SearchDocument
+from apps.v1.tasks.models import Task
+from config.routing import websocket_urlpatterns
+
+
+class ProjectConsumerTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+        self.project = Project.objects.create(title="Test project")
+        ProjectMembership.objects.create(user=self.user, project=self.project)
+
+    def get_communicator(self, user):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"ws/projects/{self.project.id}/"
+        )
+        communicator.scope["user"] = user
+        return communicator
+
+    async def test_broadcast_frame_is_forwarded(self):
+        communicator = self.get_communicator(self.user)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await abroadcast_to_project(
+            self.project.id, "task_created", task={"title": "Test task"}
+        )
+        frame = await communicator.receive_from()
+        self.assertEqual(
+            json.loads(frame), {"type": "task_created", "task": {"title": "Test task"}}
+        )
+        await communicator.disconnect()
+
+    async def test_broadcast_frame_skips_closing_old_connections(self):
+        communicator = self.get_communicator(self.user)
+        await communicator.connect()
+
+        with mock.patch("channels.consumer.aclose_old_connections") as close:
+            await abroadcast_to_project(self.project.id, "task_created", task={})
+            await communicator.receive_from()
+            close.assert_not_called()
+        await communicator.disconnect()
+
+    async def test_non_member_connection_is_rejected(self):
+        other_user = await CustomUser.objects.acreate(
+            username="jon_doe2", email="jon_doe2@domain.com"
+        )
+        communicator = self.get_communicator(other_user)
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4003)
+
+
+class OutboxTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+        self.project = Project.objects.create(title="Test project")
+        ProjectMembership.objects.create(user=self.user, project=self.project)
+
+    def get_communicator(self, query=""):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"ws/projects/{self.project.id}/{query}"
+        )
+        communicator.scope["user"] = self.user
+        return communicator
+
+    def test_event_dispatched_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            event = publish_project_event(self.project.id, "task_created", task={})
+        self.assertEqual(len(callbacks), 1)
+
+        with mock.patch.object(dispatcher, "enqueue") as enqueue:
+            callbacks[0]()
+        enqueue.assert_called_once_with(event)
+
+    def test_event_left_to_command_without_dispatcher(self):
+        with mock.patch("apps.common.outbox.send_events") as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                event = publish_project_event(self.project.id, "task_created", task={})
+        send.assert_not_called()
+        event.refresh_from_db()
+        self.assertIsNone(event.dispatched_at)
+
+        call_command("dispatch_outbox", "--grace=0", stdout=StringIO())
+        event.refresh_from_db()
+        self.assertIsNotNone(event.dispatched_at)
+
+    def test_event_discarded_on_rollback(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    publish_project_event(self.project.id, "task_created", task={})
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_task_create_records_event(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                f"/api/v1/projects/{self.project.id}/tasks/",
+                {"title": "Test", "description": "NEW", "project": self.project.id},
+            )
+        self.assertEqual(response.status_code, 201)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.group, f"project_{self.project.id}")
+        self.assertEqual(event.seq, 1)
+        self.assertEqual(json.loads(event.frame)["type"], "task_created")
+        self.assertEqual(json.loads(event.frame)["seq"], 1)
+
+    async def test_dispatcher_sends_events_in_order(self):
+        communicator = self.get_communicator()
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        dispatcher = OutboxDispatcher(batch_size=2)
+        dispatcher.start()
+        for i in range(3):
+            event = await OutboxEvent.objects.acreate(
+                project=self.project,
+                seq=i + 1,
+                frame=encode_event("task_updated", task={"position": i}),
+            )
+            dispatcher.enqueue(event)
+
+        for i in range(3):
+            frame = json.loads(await communicator.receive_from())
+            self.assertEqual(frame["task"]["position"], i)
+
+        dispatcher._task.cancel()
+        await communicator.disconnect()
+
+    def test_dispatch_outbox_command(self):
+        now = timezone.now()
+        expired = OutboxEvent.objects.create(
+            project=self.project,
+            seq=1,
+            frame="{}",
+            dispatched_at=now - timedelta(days=2),
+        )
+        pending = OutboxEvent.objects.create(project=self.project, seq=2, frame="{}")
+        OutboxEvent.objects.filter(id=pending.id).update(
+            created_at=now - timedelta(minutes=1)
+        )
+
+        call_command("dispatch_outbox", stdout=StringIO())
+
+        pending.refresh_from_db()
+        self.assertIsNotNone(pending.dispatched_at)
+        self.assertFalse(OutboxEvent.objects.filter(id=expired.id).exists())
+
+    def test_events_are_numbered_per_project(self):
+        other_project = Project.objects.create(title="Test project 2")
+        seqs = [
+            publish_project_event(project.id, "task_created", task={}).seq
+            for project in (self.project, self.project, other_project, self.project)
+        ]
+        self.assertEqual(seqs, [1, 2, 1, 3])
+
+    def test_replay_log_is_bounded(self):
+        for _ in range(5):
+            publish_project_event(self.project.id, "task_created", task={})
+        OutboxEvent.objects.update(dispatched_at=timezone.now())
+
+        self.assertEqual(prune_events(retention=60, replay_size=3), 2)
+        self.assertEqual(
+            [seq for seq, _ in replay_events(self.project.id, 2)], [3, 4, 5]
+        )
+        self.assertIsNone(replay_events(self.project.id, 1))
+        self.assertEqual(replay_events(self.project.id, 5), [])
+        self.assertIsNone(replay_events(self.project.id, 6))
+
+    async def test_reconnect_replays_missed_events(self):
+        for i in range(3):
+            await database_sync_to_async(publish_project_event)(
+                self.project.id, "task_updated", task={"position": i}
+            )
+
+        communicator = self.get_communicator(query="?since=1")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        frames = [json.loads(await communicator.receive_from()) for _ in range(2)]
+        self.assertEqual([frame["seq"] for frame in frames], [2, 3])
+
+        # Live delivery of an already replayed event is dropped
+        event = await OutboxEvent.objects.aget(seq=3)
+        await asend_events([event])
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_reconnect_out_of_replay_log_requires_resync(self):
+        for seq in (5, 6):
+            await OutboxEvent.objects.acreate(project=self.project, seq=seq, frame="{}")
+        await ProjectEventSequence.objects.acreate(project=self.project, last_seq=6)
+
+        communicator = self.get_communicator(query="?since=2")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        frame = json.loads(await communicator.receive_from())
+        self.assertEqual(frame, {"type": "resync_required", "seq": 6})
+        await communicator.disconnect()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTestCase(SimpleTestCase):
+    def test_rate_and_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+        self.assertEqual([bucket.consume() for _ in range(4)], [True] * 3 + [False])
+
+        clock.now = 1
+        self.assertEqual([bucket.consume() for _ in range(3)], [True, True, False])
+
+
+@override_settings(PRESENCE_COALESCE_INTERVAL=2, PRESENCE_TTL=30)
+class PresenceRegistryTestCase(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.registry = PresenceRegistry(clock=self.clock)
+        self.user = CustomUser(username="jon_doe")
+
+    def test_updates_are_coalesced(self):
+        update = self.registry.update
+        self.assertTrue(update("p1", "c1", self.user, "t1", "typing"))
+        self.assertFalse(update("p1", "c1", self.user, "t1", "typing"))
+        self.assertFalse(update("p1", "c2", self.user, "t1", "typing"))
+        self.assertTrue(update("p1", "c1", self.user, "t1", "viewing"))
+        self.assertTrue(update("p1", "c1", self.user, "t2", "typing"))
+
+        self.clock.now = 2
+        self.assertTrue(update("p1", "c1", self.user, "t1", "typing"))
+
+    def test_snapshot(self):
+        other_user = CustomUser(username="jon_doe2")
+        self.registry.update("p1", "c1", self.user, "t1", "viewing")
+        self.registry.update("p1", "c2", self.user, "t1", "typing")
+        self.registry.update("p1", "c3", other_user, "t2", "viewing")
+
+        snapshot = self.registry.snapshot("p1")
+        self.assertEqual([u["activity"] for u in snapshot["t1"]], ["typing"])
+        self.assertEqual([u["username"] for u in snapshot["t2"]], ["jon_doe2"])
+
+        self.clock.now = 31
+        self.assertEqual(self.registry.snapshot("p1"), {})
+
+
+class ProjectConsumerActivityTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+        self.project = Project.objects.create(title="Test project")
+        ProjectMembership.objects.create(user=self.user, project=self.project)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"ws/projects/{self.project.id}/"
+        )
+        communicator.scope["user"] = self.user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def send_activity(self, communicator, activity, task_id="t1"):
+        await communicator.send_json_to(
+            {"type": "user_activity", "content": activity, "task_id": task_id}
+        )
+
+    async def test_activity_is_coalesced(self):
+        communicator = await self.connect()
+        for _ in range(5):
+            await self.send_activity(communicator, "typing")
+
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame["type"], "user_activity")
+        self.assertEqual(frame["activity"], "typing")
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    @override_settings(PRESENCE_COALESCE_INTERVAL=0.2)
+    async def test_last_coalesced_activity_is_flushed(self):
+        communicator = await self.connect()
+        for activity in ("viewing", "typing", "viewing"):
+            await self.send_activity(communicator, activity)
+
+        frames = [await communicator.receive_json_from() for _ in range(2)]
+        self.assertEqual([frame["activity"] for frame in frames], ["viewing", "typing"])
+        # Dropped in the window, then sent at its end
+        self.assertTrue(await communicator.receive_nothing(timeout=0.05))
+        frame = await communicator.receive_json_from(timeout=1)
+        self.assertEqual(frame["type"], "user_activity")
+        self.assertEqual(frame["activity"], "viewing")
+        await communicator.disconnect()
+
+    @override_settings(WS_INBOUND_RATE=0, WS_INBOUND_BURST=2)
+    async def test_inbound_messages_are_rate_limited(self):
+        communicator = await self.connect()
+        for task_id in ("t1", "t2", "t3"):
+            await self.send_activity(communicator, "viewing", task_id)
+
+        frames = [await communicator.receive_json_from() for _ in range(2)]
+        self.assertEqual([frame["task_id"] for frame in frames], ["t1", "t2"])
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    @override_settings(PRESENCE_SNAPSHOT_INTERVAL=0.05)
+    async def test_presence_snapshot(self):
+        communicator = await self.connect()
+        await self.send_activity(communicator, "viewing")
+        await communicator.receive_json_from()
+
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame["type"], "presence_snapshot")
+        self.assertEqual(
+            frame["tasks"],
+            {
+                "t1": [
+                    {
+                        "user_id": str(self.user.id),
+                        "username": "jon_doe",
+                        "activity": "viewing",
+                    }
+                ]
+            },
+        )
+        await communicator.disconnect()
+
+
+class MarkdownRenderingTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+        self.project = Project.objects.create(title="Test project")
+        self.tasks = [
+            Task.objects.create(
+                project=self.project, title=f"Task {i}", description=f"Task *{i}*"
+            )
+            for i in range(5)
+        ]
+        for task in self.tasks:
+            Comment.objects.create(task=task, author=self.user, content="**LGTM**")
+        render_cache.clear()
+
+    def test_identical_content_is_rendered_once(self):
+        stats = render_cache.stats()
+        for task in self.tasks:
+            Comment.objects.create(task=task, author=self.user, content="*Bump*")
+
+        self.assertEqual(render_cache.stats()["misses"] - stats["misses"], 1)
+        self.assertEqual(render_cache.stats()["hits"] - stats["hits"], 4)
+
+    def assert_rerendered(self, *args):
+        Task.objects.update(description_rendered="")
+        Comment.objects.update(content_rendered="<p>stale</p>")
+
+        call_command("rerender_markdown", *args, "--chunk-size=2", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Task.objects.values_list("description_rendered", flat=True)),
+            [f"<p>Task <em>{i}</em></p>" for i in range(5)],
+        )
+        self.assertEqual(
+            set(Comment.objects.values_list("content_rendered", flat=True)),
+            {"<p><strong>LGTM</strong></p>"},
+        )
+
+    def test_rerender_command(self):
+        self.assert_rerendered("--workers=1")
+
+    def test_rerender_command_process_pool(self):
+        self.assert_rerendered("--workers=2")
+
+
+class LRUCacheTestCase(SimpleTestCase):
+    def test_eviction_by_weight(self):
+        cache = LRUCache(maxsize=10, maxweight=10, weigher=len)
+        cache.set("a", "xxxx")
+        cache.set("b", "xxxx")
+        cache.get("a")
+        cache.set("c", "xxxx")  # Evicts b, the least recently used
+
+        self.assertEqual(cache.get("b", None), None)
+        self.assertEqual(cache.get("a"), "xxxx")
+        self.assertEqual(cache.stats()["weight"], 8)
+
+        cache.set("d", "x" * 11)  # Larger than the cache, not stored
+        self.assertEqual(cache.get("d", None), None)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class DatabaseExecutorTestCase(TestCase):
+    def run_names(self, executor, bind):
+        async def run():
+            if bind:
+                executor.bind()
+            return await asyncio.gather(
+                *(
+                    executor.run(lambda: threading.current_thread().name)
+                    for _ in range(3)
+                )
+            )
+
+        with mock.patch("apps.common.executor.close_old_connections"):
+            return asyncio.run(run())
+
+    def test_run_in_pool(self):
+        executor = DatabaseExecutor(max_workers=2)
+        names = self.run_names(executor, bind=True)
+
+        self.assertTrue(all(name.startswith("database") for name in names))
+        stats = executor.stats()
+        self.assertEqual(stats["threads"], 2)
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(stats["queued"], 0)
+
+    def test_run_outside_server_loop(self):
+        executor = DatabaseExecutor(max_workers=2)
+        names = self.run_names(executor, bind=False)
+
+        self.assertFalse(any(name.startswith("database") for name in names))
+        self.assertEqual(executor.stats()["completed"], 0)
+
+    @override_settings(DATABASE_CONN_MAX_AGE=300)
+    def test_pool_connections_reused(self):
+        executor = DatabaseExecutor(max_workers=1)
+        request_max_age = connection.settings_dict["CONN_MAX_AGE"]
+
+        def get_connection():
+            connection.ensure_connection()
+            return connection.settings_dict["CONN_MAX_AGE"], connection.connection
+
+        async def run():
+            executor.bind()
+            first = await executor.run(get_connection)
+            second = await executor.run(get_connection)
+            await executor.run(lambda: connection.close())
+            return first, second
+
+        (max_age, first), (_, second) = asyncio.run(run())
+        executor.get_executor().shutdown()
+        self.assertEqual(max_age, 300)
+        self.assertIs(first, second)
+        # The connections of other threads keep CONN_MAX_AGE
+        self.assertEqual(connection.settings_dict["CONN_MAX_AGE"], request_max_age)
+
+    def test_asgi_request_connections_not_kept(self):
+        # Request threads under ASGI are not reused, the executor threads are
+        env = {**os.environ, "DATABASE_PROFILE": "production"}
+        env.pop("DATABASE_REQUEST_CONN_MAX_AGE", None)
+        script = (
+            "import {module}; from django.conf import settings; "
+            "print(settings.DATABASES['default']['CONN_MAX_AGE'], "
+            "settings.DATABASE_CONN_MAX_AGE)"
+        )
+        results = {
+            module: subprocess.run(
+                [sys.executable, "-c", script.format(module=module)],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.split()
+            for module in ["config.asgi", "config.wsgi"]
+        }
+        self.assertEqual(
+            results, {"config.asgi": ["0", "600"], "config.wsgi": ["600", "600"]}
+        )
+
+    def test_async_read_views(self):
+        # Sync views unless served by config.asgi
+        view = resolve("/api/v1/projects/").func
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+
+        with override_settings(ASYNC_READ_VIEWS=True):
+            view = ProjectListView.as_view()
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertIs(view.view_class, ProjectListView)
+
+        user = CustomUser.objects.create(username="jon_doe", email="jon_doe@domain.com")
+        project = Project.objects.create(title="Test project")
+        ProjectMembership.objects.create(user=user, project=project)
+        request = APIRequestFactory().get("/api/v1/projects/")
+        force_authenticate(request, user=user)
+        # Off the server event loop, in this thread and its transaction
+        response = async_to_sync(view)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["title"], "Test project")
+
+
+class SQLiteProductionProfileTestCase(SimpleTestCase):
+    def test_pragmas(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        wrapper = SQLiteDatabaseWrapper(
+            {
+                **connection.settings_dict,
+                "NAME": f"{directory}/profile.sqlite3",
+                "OPTIONS": settings.SQLITE_PRODUCTION_OPTIONS,
+            },
+            alias="profile",
+        )
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            pragmas = {
+                pragma: cursor.execute(f"PRAGMA {pragma}").fetchone()[0]
+                for pragma in ["journal_mode", "synchronous", "busy_timeout"]
+            }
+        self.assertEqual(
+            pragmas,
+            {
+                "journal_mode": "wal",
+                "synchronous": 1,  # NORMAL
+                "busy_timeout": settings.SQLITE_PRODUCTION_OPTIONS["timeout"] * 1000,
+            },
+        )
+        self.assertEqual(wrapper.transaction_mode, "IMMEDIATE")
+
+
+class CacheStatsViewTestCase(TestCase):
+    def test_cache_stats(self):
+        client = APIClient()
+        user = CustomUser.objects.create(username="jon_doe", email="jon_doe@domain.com")
+        client.force_authenticate(user=user)
+        self.assertEqual(client.get("/api/v1/cache-stats/").status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = client.get("/api/v1/cache-stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data),
+            {"responses", "memberships", "markdown", "database_executor"},
+        )
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every query behind the hot endpoints over a
+    synthetic dataset with planner statistics, and fails on full table scans
+    and temporary B-tree sorts.
+    """
+
+    PROJECTS = 20
+    USERS = 40
+    TASKS_PER_PROJECT = 100
+    COMMENTS_PER_TASK = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        users = CustomUser.objects.bulk_create(
+            CustomUser(username=f"user_{i}", email=f"user_{i}@domain.com")
+            for i in range(cls.USERS)
+        )
+        projects = Project.objects.bulk_create(
+            Project(title=f"Project {i}") for i in range(cls.PROJECTS)
+        )
+        ProjectMembership.objects.bulk_create(
+            ProjectMembership(user=user, project=project)
+            for i, project in enumerate(projects)
+            for user in users[i % 4 :: 4]
+        )
+        ProjectInvitation.objects.bulk_create(
+            ProjectInvitation(user=user, project=project, invited_by=users[0])
+            for project in projects
+            for user in users[1:5]
+        )
+        statuses = Task.TaskStatus.values
+        tasks = Task.objects.bulk_create(
+            Task(
+                project=project,
+                title=f"Task {i}",
+                description="Task",
+                status=statuses[i % len(statuses)],
+                creator=users[i % cls.USERS],
+                assignee=users[(i + 1) % cls.USERS],
+                due_date=None if i % 5 else timezone.now().date() + timedelta(i),
+                deleted_at=timezone.now() if i % 10 == 9 else None,
+            )
+            for project in projects
+            for i in range(cls.TASKS_PER_PROJECT)
+        )
+        Comment.objects.bulk_create(
+            Comment(task=task, author=users[i], content="Comment")
+            for task in tasks
+            for i in range(cls.COMMENTS_PER_TASK)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.user = users[0]
+        cls.invitee = users[1]
+        cls.project = projects[0]
+        cls.task = Task.objects.existing().filter(project=cls.project).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        membership_cache.clear()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [(id, parent, detail) for id, parent, _, detail in cursor.fetchall()]
+
+    def unindexed_steps(self, plan):
+        """
+        Full table scans, and sorts of table rows. Sorting the rows of a
+        subquery (e.g. the windowed prefetch of comment previews) is allowed.
+        """
+        subqueries = {
+            match.group(1)
+            for _, _, detail in plan
+            if (match := re.fullmatch(r"(?:CO-ROUTINE|MATERIALIZE) (.+)", detail))
+        }
+
+        def reads_table(detail):
+            match = re.match(r"(?:SCAN|SEARCH) (\S+)", detail)
+            return bool(match) and match.group(1) not in subqueries
+
+        bad = []
+        for id, parent, detail in plan:
+            if reads_table(detail) and re.fullmatch(r"SCAN \S+", detail):
+                bad.append(detail)
+            elif "TEMP B-TREE" in detail and any(
+                reads_table(sibling)
+                for _, sibling_parent, sibling in plan
+                if sibling_parent == parent
+            ):
+                bad.append(detail)
+        return bad
+
+    def assertIndexedQueries(self, queries):
+        selects = [q["sql"] for q in queries if q["sql"].startswith("SELECT")]
+        self.assertTrue(selects)
+        for sql in selects:
+            plan = self.explain(sql)
+            if self.unindexed_steps(plan):
+                self.fail(
+                    "Query not served by an index:\n{}\nPlan:\n{}".format(
+                        sql, "\n".join(detail for _, _, detail in plan)
+                    )
+                )
+
+    def assertIndexedEndpoint(self, url, params=None, follow_next=True):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertIndexedQueries(context.captured_queries)
+
+        paginated = isinstance(response.data, dict)
+        next_url = response.data.get("next") if paginated and follow_next else None
+        if next_url:
+            self.assertIndexedEndpoint(next_url, follow_next=False)
+
+    def test_project_list(self):
+        self.assertIndexedEndpoint("/api/v1/projects/", follow_next=False)
+        self.assertIndexedEndpoint(
+            "/api/v1/projects/", {"full_data": "true", "status": "ACTIVE"}
+        )
+
+    def test_task_list(self):
+        url = f"/api/v1/projects/{self.project.id}/tasks/"
+        for params in [
+            {},
+            {"ordering": "due_date"},
+            {"ordering": "-updated_at"},
+            {"status": "TODO"},
+            {"status": "TODO", "ordering": "due_date"},
+            {"assignee": self.user.id},
+            {"assignee": self.user.id, "status": "DONE"},
+            {"creator": self.user.id},
+            {"due_date_after": timezone.now().date(), "ordering": "due_date"},
+            {
+                "updated_since": timezone.now() - timedelta(days=1),
+                "ordering": "updated_at",
+            },
+            {"expand": "comments", "page_size": 5},
+        ]:
+            with self.subTest(params=params):
+                self.assertIndexedEndpoint(url, {"page_size": 10, **params})
+
+    def test_task_detail(self):
+        self.assertIndexedEndpoint(
+            f"/api/v1/projects/{self.project.id}/tasks/{self.task.id}/"
+        )
+
+    def test_comment_list(self):
+        self.assertIndexedEndpoint(
+            f"/api/v1/projects/{self.project.id}/tasks/{self.task.id}/comments/",
+            {"page_size": 2},
+        )
+
+    def test_invite_list(self):
+        for invite_type in ("received", "sent"):
+            with self.subTest(invite_type=invite_type):
+                self.client.force_authenticate(
+                    user=self.user if invite_type == "sent" else self.invitee
+                )
+                self.assertIndexedEndpoint(
+                    "/api/v1/projects/invite/",
+                    {"invite_type": invite_type, "page_size": 5},
+                )
+
+    def test_consumer_membership_check(self):
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(is_project_member(self.user.id, self.project.id))
+        self.assertIndexedQueries(context.captured_queries)
+
+
+# GIF of one pixel, uploaded as profile picture
+PIXEL_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01"
+    b"\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+# Budgets of the views of other packages, ours declare a `query_budget`
+THIRD_PARTY_QUERY_BUDGETS = {
+    TokenObtainPairView: {"POST": 1},
+    TokenRefreshView: {"POST": 1},
+}
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Calls every URL of `config/urls.py` with 1, 10 and 100 rows per relation.
+    The number of queries of each request must not change with the number of
+    rows, and stay within the `query_budget` ({method: queries}) of its view.
+    """
+
+    SCALES = (1, 10, 100)
+    # Admin and API documentation pages
+    EXCLUDED_PREFIXES = ("admin/", "swagger", "redoc")
+
+    # Requests made to each (URL name, method), several per pair to cover
+    # query parameters which load more relations. `ctx` holds the rows of the
+    # current scale, each request returns the kwargs of the client call.
+    REQUESTS = [
+        (
+            "token_obtain_pair",
+            "POST",
+            lambda ctx: {"data": {"username": "user", "password": "secret"}},
+        ),
+        ("token_refresh", "POST", lambda ctx: {"data": {"refresh": ctx["refresh"]}}),
+        (
+            "userprofile:user_create",
+            "POST",
+            lambda ctx: {
+                "data": {
+                    "username": "new_user",
+                    "email": "new_user@domain.com",
+                    "password": "A-strong-passw0rd",
+                }
+            },
+        ),
+        ("userprofile:me", "GET", lambda ctx: {}),
+        ("userprofile:me", "PATCH", lambda ctx: {"data": {"first_name": "Jon"}}),
+        (
+            "userprofile:me_picture",
+            "PATCH",
+            lambda ctx: {
+                "data": {
+                    "profile_picture": SimpleUploadedFile(
+                        "pixel.gif", PIXEL_GIF, content_type="image/gif"
+                    )
+                },
+                "format": "multipart",
+            },
+        ),
+        ("projects:project_list", "GET", lambda ctx: {}),
+        ("projects:project_list", "GET", lambda ctx: {"data": {"full_data": "true"}}),
+        ("projects:project_list", "POST", lambda ctx: {"data": {"title": "New"}}),
+        ("projects:project_read", "POST", lambda ctx: {}),
+        (
+            "projects:invite_member",
+            "GET",
+            lambda ctx: {"data": {"invite_type": "sent"}},
+        ),
+        (
+            "projects:invite_member",
+            "GET",
+            lambda ctx: {"data": {"invite_type": "received"}},
+        ),
+        (
+            "projects:invite_member",
+            "POST",
+            lambda ctx: {
+                "data": {
+                    "user": str(ctx["outsider"].id),
+                    "project": str(ctx["project"].id),
+                }
+            },
+        ),
+        ("projects:invite_member_action", "POST", lambda ctx: {}),
+        ("tasks:tasks_list", "GET", lambda ctx: {}),
+        ("tasks:tasks_list", "GET", lambda ctx: {"data": {"expand": "comments"}}),
+        (
+            "tasks:tasks_list",
+            "POST",
+            lambda ctx: {
+                "data": {
+                    "title": "New task",
+                    "description": "New **task**",
+                    "status": "TODO",
+                    "project": str(ctx["project"].id),
+                    "assignee": str(ctx["user"].id),
+                }
+            },
+        ),
+        ("tasks:tasks_details", "GET", lambda ctx: {}),
+        ("tasks:tasks_details", "PATCH", lambda ctx: {"data": {"status": "DONE"}}),
+        ("tasks:tasks_details", "DELETE", lambda ctx: {}),
+        (
+            "tasks:tasks_batch",
+            "POST",
+            lambda ctx: {
+                "data": {
+                    "operations": [
+                        {
+                            "op": "create",
+                            "title": "New task",
+                            "description": "New **task**",
+                            "assignee": str(ctx["user"].id),
+                        },
+                        {
+                            "op": "update",
+                            "id": str(ctx["url_kwargs"]["task_id"]),
+                            "description": "Updated **task**",
+                        },
+                    ]
+                },
+                "format": "json",
+            },
+        ),
+        ("comments:comment_list", "GET", lambda ctx: {}),
+        (
+            "comments:comment_list",
+            "POST",
+            lambda ctx: {"data": {"content": "New **comment**"}, "format": "json"},
+        ),
+        ("comments:comment_read", "POST", lambda ctx: {}),
+        ("comments:comment_detail", "GET", lambda ctx: {}),
+        (
+            "comments:comment_detail",
+            "PATCH",
+            lambda ctx: {"data": {"content": "Edited"}, "format": "json"},
+        ),
+        ("comments:comment_detail", "DELETE", lambda ctx: {}),
+        ("search:search", "GET", lambda ctx: {"data": {"q": "task"}}),
+        ("cache_stats", "GET", lambda ctx: {}),
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+    def endpoints(self, patterns=None, prefix="", namespace=""):
+        """
+        (URL name, route, view class) of every URL pattern.
+        """
+        for pattern in get_resolver().url_patterns if patterns is None else patterns:
+            route = prefix + str(pattern.pattern)
+            if route.startswith(self.EXCLUDED_PREFIXES):
+                continue
+            if isinstance(pattern, URLResolver):
+                yield from self.endpoints(
+                    pattern.url_patterns,
+                    route,
+                    f"{pattern.namespace}:" if pattern.namespace else namespace,
+                )
+            else:
+                yield namespace + pattern.name, route, pattern.callback.view_class
+
+    def get_query_budget(self, view_class):
+        if view_class in THIRD_PARTY_QUERY_BUDGETS:
+            return THIRD_PARTY_QUERY_BUDGETS[view_class]
+        return getattr(view_class, "query_budget", {})
+
+    def populate(self, n):
+        """
+        A user with `n` rows in every relation, and the rows the URLs point to.
+        """
+        user = CustomUser.objects.create_user(
+            username="user", email="user@domain.com", password="secret", is_staff=True
+        )
+        others = CustomUser.objects.bulk_create(
+            CustomUser(username=f"other_{i}", email=f"other_{i}@domain.com")
+            for i in range(n)
+        )
+        outsider = CustomUser.objects.create(
+            username="outsider", email="outsider@domain.com"
+        )
+        projects = [Project.objects.create(title=f"Project {i}") for i in range(n)]
+        project = projects[0]
+        ProjectMembership.objects.bulk_create(
+            [
+                ProjectMembership(
+                    user=user,
+                    project=p,
+                    role=ProjectMembership.ProjectRole.ADMIN,
+                )
+                for p in projects
+            ]
+            + [ProjectMembership(user=other, project=project) for other in others]
+        )
+        # Received invitations are for a project the user is not a member of
+        foreign_project = Project.objects.create(title="Foreign project")
+        invitations = ProjectInvitation.objects.bulk_create(
+            [
+                ProjectInvitation(user=user, project=foreign_project, invited_by=other)
+                for other in others
+            ]
+            + [
+                ProjectInvitation(user=other, project=project, invited_by=user)
+                for other in others
+            ]
+        )
+        tasks = Task.objects.bulk_create(
+            Task(
+                project=project,
+                title=f"Task {i}",
+                description="Some **task**",
+                creator=user,
+                assignee=others[i],
+            )
+            for i in range(n)
+        )
+        comments = Comment.objects.bulk_create(
+            Comment(task=task, author=author, content="Some *comment*")
+            for task in tasks
+            for author in [user] + others[1:]
+        )
+        TaskReadMarker.objects.mark_read(
+            user, [task.id for task in tasks], timezone.now() - timedelta(days=1)
+        )
+        return {
+            "user": user,
+            "outsider": outsider,
+            "project": project,
+            "refresh": str(RefreshToken.for_user(user)),
+            "url_kwargs": {
+                "project_id": project.id,
+                "task_id": tasks[0].id,
+                "comment_id": comments[0].id,
+                "invite_id": invitations[0].id,
+                "action": "accept",
+            },
+        }
+
+    def request(self, ctx, name, route, method, build):
+        """
+        Makes the request in a rolled back transaction, with cold caches.
+        Returns the captured queries.
+        """
+        url_kwargs = {
+            key: value
+            for key, value in ctx["url_kwargs"].items()
+            if f"<{key}>" in route or f":{key}>" in route
+        }
+        url = reverse(name, kwargs=url_kwargs)
+        response_cache.clear()
+        membership_cache.clear()
+        self.client.force_authenticate(user=ctx["user"])
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(self.client, method.lower())(url, **build(ctx))
+            transaction.set_rollback(True)
+        self.assertLess(
+            response.status_code, 400, f"{method} {url}: {response.content[:500]}"
+        )
+        return context.captured_queries
+
+    def test_every_url_has_a_request_and_a_budget(self):
+        requested = {(name, method) for name, method, _ in self.REQUESTS}
+        for name, _, view_class in self.endpoints():
+            methods = [
+                method.upper()
+                for method in view_class.http_method_names
+                if method not in ("head", "options") and hasattr(view_class, method)
+            ]
+            budget = self.get_query_budget(view_class)
+            for method in methods:
+                self.assertIn(method, budget, f"No query budget for {method} {name}")
+                self.assertIn((name, method), requested, f"No request for {name}")
+
+    def test_query_counts_are_constant(self):
+        endpoints = {name: (route, view) for name, route, view in self.endpoints()}
+        counts = {}
+        queries = {}
+        with override_settings(MEDIA_ROOT=self.media_root):
+            for n in self.SCALES:
+                with transaction.atomic():
+                    ctx = self.populate(n)
+                    for i, (name, method, build) in enumerate(self.REQUESTS):
+                        route, _ = endpoints[name]
+                        captured = self.request(ctx, name, route, method, build)
+                        counts.setdefault(i, []).append(len(captured))
+                        queries[i] = captured
+                    transaction.set_rollback(True)
+
+        for i, (name, method, build) in enumerate(self.REQUESTS):
+            _, view_class = endpoints[name]
+            budget = self.get_query_budget(view_class)[method]
+            with self.subTest(url=name, method=method, request=i):
+                if len(set(counts[i])) > 1 or max(counts[i]) > budget:
+                    self.fail(
+                        "{} {}: {} queries at {} rows per relation, budget {}:\n{}".format(
+                            method,
+                            name,
+                            counts[i],
+                            self.SCALES,
+                            budget,
+                            "\n".join(
+                                f"{number}. {query['sql']}"
+                                for number, query in enumerate(queries[i], 1)
+                            ),
+                        )
+                    )
+
+
+class SeedLoadTestCase(TestCase):
+    def seed(self, **options):
+        out = StringIO()
+        options = {
+            "users": 30,
+            "projects": 4,
+            "members": 5,
+            "invitations": 2,
+            "tasks": 60,
+            "comments": 300,
+            "read_ratio": 0.5,
+            "skew": 1.5,
+            **options,
+        }
+        call_command("seed_load", stdout=out, **options)
+        return out.getvalue()
+
+    def test_seed_load(self):
+        output = self.seed()
+        self.assertIn("comments.Comment: 300 rows", output)
+
+        self.assertEqual(CustomUser.objects.count(), 30)
+        self.assertEqual(ProjectMembership.objects.count(), 20)
+        self.assertEqual(Task.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 300)
+        # Half of the 5 members of the project, rounded up or down
+        self.assertTrue(60 * 2 <= TaskReadMarker.objects.count() <= 60 * 3)
+        self.assertTrue(CustomUser.objects.first().check_password("tickethub"))
+
+        # Invitations are for non members
+        invitations = ProjectInvitation.objects.all()
+        self.assertEqual(len(invitations), 8)
+        for invitation in invitations:
+            self.assertFalse(
+                ProjectMembership.objects.filter(
+                    user=invitation.user_id, project=invitation.project_id
+                ).exists()
+            )
+
+        # The first project is the hot one
+        sizes = (
+            Task.objects.values_list("project__title", flat=True)
+            .annotate(count=Count("id"))
+            .order_by("-count")
+        )
+        self.assertEqual(sizes[0], "load project 0")
+
+        # Comments follow their task, markdown is rendered, rows are searchable
+        self.assertFalse(Comment.objects.filter(created_at__lt=F("task__created_at")))
+        self.assertFalse(Comment.objects.filter(content_rendered__isnull=True))
+        self.assertFalse(Task.objects.filter(description_rendered__isnull=True))
+        self.assertEqual(SearchDocument.objects.count(), 4 + 60 + 300)
+
+    def test_same_seed_same_data(self):
+        self.seed(seed=3)
+        first = list(Comment.objects.order_by("id").values_list("id", "content"))
+        Comment.objects.all().delete()
+        CustomUser.objects.all().delete()
+        Project.objects.all().delete()
+        self.seed(seed=3)
+        self.assertEqual(
+            list(Comment.objects.order_by("id").values_list("id", "content")), first
+        )
+
+    def test_prefix_in_use(self):
+        self.seed(tasks=0, comments=0)
+        with self.assertRaises(CommandError):
+            self.seed(tasks=0, comments=0)
@@ -0,0 +1,27 @@
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, allows `rate` actions per second on average and
+    bursts of up to `burst` actions. Not thread-safe, meant for a single consumer.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated_at = clock()
+
+    def consume(self, tokens=1):
+        """
+        Take tokens from the bucket, returns False when the action must be rejected.
+        """
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
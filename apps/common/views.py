@@ -0,0 +1,257 @@
+import functools
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import exceptions, generics, response, status
+from rest_framework.permissions import IsAdminUser
+
+from apps.common.cache import MISSING, LRUCache
+from apps.common.constants import PRECONDITION_FAILED
+from apps.common.executor import database_sync_to_async, executor
+from apps.common.fields import render_cache
+from apps.v1.projects.membership import membership_cache
+
+# Rendered GET responses keyed by ETag, see `ResponseCacheMixin`
+response_cache = LRUCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    maxweight=settings.RESPONSE_CACHE_MAX_BYTES,
+    weigher=lambda entry: len(entry[0]),
+)
+
+
+class NotModified(exceptions.APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+class PreconditionFailed(exceptions.APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = PRECONDITION_FAILED
+    default_code = "precondition_failed"
+
+
+class CacheHit(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class AsyncReadViewMixin:
+    """
+    API view mixin serving reads from the shared database executor (see
+    `apps.common.executor`) under ASGI, instead of a thread created for the
+    request. The whole read runs in one call, rendering included, on a thread
+    keeping its database connection. Writes run as Django runs sync views.
+    Enabled with `ASYNC_READ_VIEWS`, set by default by `config.asgi` only.
+    """
+
+    async_methods = ("GET", "HEAD", "OPTIONS")
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        if not settings.ASYNC_READ_VIEWS:
+            return view
+
+        def read(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            # Rendered here rather than in another thread by the handler
+            if hasattr(response, "render"):
+                response.render()
+            return response
+
+        read = database_sync_to_async(read)
+        write = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method in cls.async_methods:
+                return await read(request, *args, **kwargs)
+            return await write(request, *args, **kwargs)
+
+        # Keeps the `cls`, `initkwargs` and `csrf_exempt` attributes of the view
+        return functools.update_wrapper(async_view, view)
+
+
+class EagerLoadingViewMixin:
+    """
+    Generic view mixin applying the eager loading plan declared by the serializer
+    (see `apps.common.serializers.EagerLoadingMixin`) to the view's queryset.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "eager_load"):
+            queryset = serializer_class.eager_load(
+                queryset, context=self.get_serializer_context()
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Serializing a relation which was not eager loaded fails on read requests
+        context["forbid_lazy_loading"] = (
+            settings.EAGER_LOADING_STRICT and self.request.method in ("GET", "HEAD")
+        )
+        return context
+
+
+class ConditionalRequestMixin:
+    """
+    API view mixin for conditional requests, checked right after authentication
+    and permissions, before any queryset or serializer work:
+    - GET/HEAD: `ETag` and `Last-Modified` headers, 304 on a matching
+      `If-None-Match` (or `If-Modified-Since` without it)
+    - PATCH: 412 when `If-Match` doesn't match the current `ETag`
+    Views implement `get_version()`, a cheap probe of the data they serve
+    returning (version key, last modified datetime or None), and views of a
+    single object `get_object_version()`. The object version is appended to
+    the `ETag` and checked alone by `If-Match`, so that unrelated changes to
+    the served data don't fail the update.
+    ETags are per user and URL, the served data may be user specific.
+    """
+
+    conditional_methods = ("GET", "HEAD", "PATCH")
+
+    def get_version(self):
+        raise NotImplementedError
+
+    def get_object_version(self):
+        return None
+
+    def get_etag(self, version):
+        key = "|".join(
+            [
+                str(version),
+                str(self.request.user.pk),
+                self.request.get_full_path(),
+                self.request.accepted_renderer.format,
+            ]
+        )
+        etag = hashlib.md5(key.encode()).hexdigest()
+        if self.object_tag:
+            etag = f"{etag}.{self.object_tag}"
+        return '"%s"' % etag
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = self.object_tag = None
+        if request.method not in self.conditional_methods:
+            return
+
+        object_version = self.get_object_version()
+        if object_version is not None:
+            self.object_tag = hashlib.md5(str(object_version).encode()).hexdigest()
+        if request.method == "PATCH":
+            if_match = request.headers.get("If-Match")
+            if if_match and not self.is_match(parse_etags(if_match)):
+                raise PreconditionFailed()
+            return
+
+        version, self.last_modified = self.get_version()
+        self.etag = self.get_etag(version)
+        if self.is_not_modified(request):
+            raise NotModified()
+
+    def is_match(self, etags):
+        if "*" in etags:
+            return True
+        if self.object_tag:
+            return any(
+                etag.strip('"').endswith(f".{self.object_tag}") for etag in etags
+            )
+        version, _ = self.get_version()
+        return self.get_etag(version) in etags
+
+    def is_not_modified(self, request):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            etags = {etag.removeprefix("W/") for etag in parse_etags(if_none_match)}
+            return bool({"*", self.etag} & etags)
+
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since", "")
+        )
+        return (
+            if_modified_since is not None
+            and self.last_modified is not None
+            and int(self.last_modified.timestamp()) <= if_modified_since
+        )
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return response.Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # The ETag of updated resources changed, it is only sent on reads
+        if getattr(self, "etag", None) and request.method in ("GET", "HEAD"):
+            if response.status_code in (200, 304):
+                response["ETag"] = self.etag
+                if self.last_modified is not None:
+                    response["Last-Modified"] = http_date(
+                        self.last_modified.timestamp()
+                    )
+                response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class ResponseCacheMixin(ConditionalRequestMixin):
+    """
+    Caches the rendered GET responses in process, keyed by their ETag (data
+    version, user and URL). Writes bump the version, so cached responses are
+    never stale and outdated entries are evicted by the LRU.
+    The `X-Cache` header tells hits from misses, see `response_cache.stats()`.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.etag and request.method in ("GET", "HEAD"):
+            cached = response_cache.get(self.etag)
+            if cached is not MISSING:
+                content, content_type = cached
+                raise CacheHit(HttpResponse(content, content_type=content_type))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, CacheHit):
+            exc.response["X-Cache"] = "HIT"
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "etag", None)
+        if (
+            etag
+            and request.method == "GET"
+            and response.status_code == 200
+            and "X-Cache" not in response
+        ):
+            response["X-Cache"] = "MISS"
+            response.add_post_render_callback(
+                lambda rendered: response_cache.set(
+                    etag, (rendered.content, rendered["Content-Type"])
+                )
+            )
+        return response
+
+
+class CacheStatsView(generics.GenericAPIView):
+    """
+    Hit/miss metrics of the in-process caches, for admins.
+    """
+
+    permission_classes = [IsAdminUser]
+    query_budget = {"GET": 0}
+
+    def get(self, request, *args, **kwargs):
+        return response.Response(
+            {
+                "responses": response_cache.stats(),
+                "memberships": membership_cache.stats(),
+                "markdown": render_cache.stats(),
+                "database_executor": executor.stats(),
+            }
+        )
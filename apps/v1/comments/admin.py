@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Comment
+from .models import Comment, TaskReadMarker
 
 admin.site.register(Comment)
+admin.site.register(TaskReadMarker)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CommentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.v1.comments"
+
+    def ready(self):
+        from apps.v1.comments import signals  # noqa: F401
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:30
+
+from django.db import migrations
+from django.db.models import Max
+
+BATCH_SIZE = 1000
+
+
+def seen_by_to_read_markers(apps, schema_editor):
+    """
+    Create a read marker per (user, task) at the latest comment seen by the user.
+    Older comments which were not explicitly seen are considered read as well.
+    """
+    Comment = apps.get_model("comments", "Comment")
+    TaskReadMarker = apps.get_model("comments", "TaskReadMarker")
+    SeenBy = Comment.seen_by.through
+
+    rows = (
+        SeenBy.objects.values("customuser_id", "comment__task_id")
+        .annotate(last_read_at=Max("comment__created_at"))
+        .order_by()
+    )
+    markers = (
+        TaskReadMarker(
+            user_id=row["customuser_id"],
+            task_id=row["comment__task_id"],
+            last_read_at=row["last_read_at"],
+        )
+        for row in rows.iterator(chunk_size=BATCH_SIZE)
+    )
+    TaskReadMarker.objects.bulk_create(markers, batch_size=BATCH_SIZE)
+
+
+def read_markers_to_seen_by(apps, schema_editor):
+    """
+    Mark every comment created up to the read marker as seen by the user.
+    """
+    Comment = apps.get_model("comments", "Comment")
+    TaskReadMarker = apps.get_model("comments", "TaskReadMarker")
+    SeenBy = Comment.seen_by.through
+
+    for marker in TaskReadMarker.objects.iterator(chunk_size=BATCH_SIZE):
+        comment_ids = Comment.objects.filter(
+            task_id=marker.task_id, created_at__lte=marker.last_read_at
+        ).values_list("id", flat=True)
+        SeenBy.objects.bulk_create(
+            [
+                SeenBy(comment_id=comment_id, customuser_id=marker.user_id)
+                for comment_id in comment_ids
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0007_taskreadmarker'),
+    ]
+
+    operations = [
+        migrations.RunPython(seen_by_to_read_markers, read_markers_to_seen_by),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0008_backfill_taskreadmarker'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='comment',
+            name='seen_by',
+        ),
+    ]
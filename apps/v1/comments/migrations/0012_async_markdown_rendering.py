@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:44
+
+import markdownfield.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comments", "0011_markdown_render_cache"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="content_rendered",
+            field=markdownfield.models.RenderedMarkdownField(null=True),
+        ),
+    ]
@@ -1,7 +1,13 @@
+import datetime
+
 from django.db import models
-from markdownfield.models import MarkdownField, RenderedMarkdownField
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from markdownfield.models import RenderedMarkdownField
 from markdownfield.validators import VALIDATOR_STANDARD
+from apps.common.fields import CachedMarkdownField
 from apps.common.models import BaseModel, CustomUser
+from apps.v1.projects.versioning import bump_project_versions
 from apps.v1.tasks.models import Task
 from django.utils import timezone
 
@@ -13,6 +19,68 @@ class CommentModelManager(models.Manager):
     def delete(self, *args, **kwargs):
         return super().get_queryset().update(deleted_at=timezone.now())
 
+    def unread_by(self, user):
+        """
+        Comments created after the user's read marker on their task.
+        Comments on tasks the user never marked as read are all unread.
+        """
+        last_read_at = TaskReadMarker.objects.filter(
+            user=user, task=OuterRef("task")
+        ).values("last_read_at")[:1]
+        return (
+            super()
+            .get_queryset()
+            .filter(
+                created_at__gt=Coalesce(
+                    Subquery(last_read_at),
+                    Value(datetime.datetime.min.replace(tzinfo=datetime.UTC)),
+                    output_field=models.DateTimeField(),
+                )
+            )
+        )
+
+
+class TaskReadMarkerManager(models.Manager):
+    def mark_read(self, user, task_ids, last_read_at=None):
+        """
+        Move the user's read marker of given tasks to `last_read_at`, creating
+        the markers which do not exist yet. Returns the newest marker position.
+
+        By default each marker moves to the newest comment of its task visible
+        now, rather than to the current time: a comment committed after this
+        read with an earlier `created_at` stays unread. Tasks without comments
+        are marked read up to the time taken before looking them up.
+        """
+        if last_read_at is None:
+            read_at = timezone.now()
+            latest = dict(
+                Comment._base_manager.filter(task_id__in=task_ids)
+                .values("task_id")
+                .annotate(latest=Max("created_at"))
+                .values_list("task_id", "latest")
+            )
+            positions = {task_id: latest.get(task_id, read_at) for task_id in task_ids}
+        else:
+            positions = dict.fromkeys(task_ids, last_read_at)
+        markers = [
+            TaskReadMarker(user=user, task_id=task_id, last_read_at=position)
+            for task_id, position in positions.items()
+        ]
+        self.bulk_create(
+            markers,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["user", "task"],
+            update_fields=["last_read_at", "updated_at"],
+        )
+        # bulk_create sends no signals
+        bump_project_versions(
+            Task._base_manager.filter(id__in=task_ids).values_list(
+                "project_id", flat=True
+            )
+        )
+        return max(positions.values(), default=last_read_at or timezone.now())
+
 
 class Comment(BaseModel):
     """
@@ -23,22 +91,30 @@ class Comment(BaseModel):
     author = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="comments"
     )
-    content = MarkdownField(
-        rendered_field="text_rendered",
+    content = CachedMarkdownField(
+        rendered_field="content_rendered",
         validator=VALIDATOR_STANDARD,
         blank=True,
         null=True,
     )
-    content_rendered = RenderedMarkdownField()
-
-    seen_by = models.ManyToManyField(
-        CustomUser, related_name="comments_seen", null=True, blank=True
-    )
+    content_rendered = RenderedMarkdownField(null=True)  # Null while rendering
 
     objects = CommentModelManager()
 
     class Meta:
         ordering = ["created_at"]  # Order comments chronologically
+        indexes = [
+            # Cursor pagination of a task's comments, unread comments are
+            # counted as a range on created_at per task as well
+            models.Index(fields=["task", "created_at", "id"]),
+            # Comment list and previews, which skip soft deleted comments.
+            # Descending, previews are ranked per task newest first.
+            models.Index(
+                fields=["task", "-created_at", "-id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="comments_comment_existing_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on Task {self.task.title}"
@@ -47,3 +123,29 @@ class Comment(BaseModel):
         self.deleted_at = timezone.now()
         if save:
             self.save(update_fields=["deleted_at"])
+
+
+class TaskReadMarker(BaseModel):
+    """
+    Represents the point in time up to which a User has read the comments of a Task.
+    Comments created after `last_read_at` are unread for the User.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="task_read_markers"
+    )
+    task = models.ForeignKey(
+        Task, on_delete=models.CASCADE, related_name="read_markers"
+    )
+    last_read_at = models.DateTimeField()
+
+    objects = TaskReadMarkerManager()
+
+    class Meta:
+        unique_together = (
+            "user",
+            "task",
+        )  # Ensures a single read marker per user and task
+
+    def __str__(self):
+        return f"{self.user.username} read {self.task.title} until {self.last_read_at}"
@@ -1,8 +1,11 @@
 from rest_framework import serializers
-from apps.v1.comments.models import Comment
+from apps.common.serializers import EagerLoadingMixin, MarkdownRenderingMixin
+from apps.v1.comments.models import Comment, TaskReadMarker
 
 
-class CommentCreateSerializer(serializers.ModelSerializer):
+class CommentCreateSerializer(
+    EagerLoadingMixin, MarkdownRenderingMixin, serializers.ModelSerializer
+):
     """
     Serializer specifically for Listing projects.
     """
@@ -10,7 +13,7 @@ class CommentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = "__all__"
-        read_only_fields = ("created_at", "updated_at", "seen_by")
+        read_only_fields = ("created_at", "updated_at")
 
     def create(self, validated_data):
         validated_data["author_id"] = self.context["user"].id
@@ -20,7 +23,9 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         return comment
 
 
-class CommentUpdateSerializer(serializers.ModelSerializer):
+class CommentUpdateSerializer(
+    EagerLoadingMixin, MarkdownRenderingMixin, serializers.ModelSerializer
+):
     """
     Serializer specifically for Update comment
     """
@@ -28,4 +33,14 @@ class CommentUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = "__all__"
-        read_only_fields = ("created_at", "updated_at", "seen_by", "author", "task")
+        read_only_fields = ("created_at", "updated_at", "author", "task")
+
+
+class TaskReadMarkerSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """
+    Serializer for the read marker of a task.
+    """
+
+    class Meta:
+        model = TaskReadMarker
+        fields = ("task", "last_read_at")
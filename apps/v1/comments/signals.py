@@ -0,0 +1,20 @@
+from django.dispatch import receiver
+
+from apps.common.fields import markdown_rendered
+from apps.common.outbox import publish_project_event
+from apps.v1.comments.models import Comment
+
+
+@receiver(markdown_rendered, sender=Comment)
+def publish_comment_rendered(sender, instance_pk, field, html, **kwargs):
+    # Follow-up of comment_added sent with a pending rendering
+    project_id, task_id = Comment._base_manager.values_list(
+        "task__project_id", "task_id"
+    ).get(pk=instance_pk)
+    publish_project_event(
+        project_id,
+        "comment_rendered",
+        comment_id=instance_pk,
+        task_id=task_id,
+        **{field.rendered_field: html},
+    )
@@ -1,8 +1,13 @@
+import json
+import uuid
+from datetime import timedelta
+
 from rest_framework.test import APIClient
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from apps.common.models import CustomUser
-from apps.v1.comments.models import Comment
+from apps.common.fields import render_cache
+from apps.common.models import CustomUser, OutboxEvent
+from apps.v1.comments.models import Comment, TaskReadMarker
 from apps.v1.projects.models import Project, ProjectMembership
 from apps.v1.tasks.models import Task
 
@@ -131,3 +136,126 @@ class CommentCombinedTestCase(TestCase):
             Comment.objects.get(task=self.task1).content,
             "This is an updated test comment",
         )
+
+    def test_comment_update_if_match(self):
+        comment, other = [
+            Comment.objects.create(task=self.task1, author=self.user1, content=content)
+            for content in ("Comment", "Other")
+        ]
+        url = self.COMMENT_DETAIL_API_URL.format(
+            self.proj1.id, self.task1.id, comment.id
+        )
+        etag = self.client.get(url)["ETag"]
+
+        # Another comment changing doesn't fail the update
+        other.content = "Updated other"
+        other.save()
+        response = self.client.patch(url, {"content": "Updated"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # The comment itself changing does
+        response = self.client.patch(url, {"content": "Lost"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Comment.objects.get(pk=comment.pk).content, "Updated")
+
+    def test_comment_list_pagination_with_equal_created_at(self):
+        comments = [
+            Comment.objects.create(task=self.task1, author=self.user1, content=str(i))
+            for i in range(4)
+        ]
+        created_at = comments[0].created_at
+        Comment.objects.filter(task=self.task1).update(created_at=created_at)
+        expected = sorted(str(comment.id) for comment in comments)
+
+        url = self.COMMENT_LIST_API_URL.format(self.proj1.id, self.task1.id)
+        response = self.client.get(url, {"page_size": 2})
+        ids = [comment["id"] for comment in response.data["results"]]
+
+        # Sorted before the page boundary, an offset would repeat the last row
+        inserted = Comment.objects.create(
+            id=uuid.UUID(int=0), task=self.task1, author=self.user1, content="new"
+        )
+        Comment.objects.filter(id=inserted.id).update(created_at=created_at)
+        response = self.client.get(response.data["next"])
+        ids += [comment["id"] for comment in response.data["results"]]
+
+        self.assertEqual(ids, expected)
+        self.assertIsNone(response.data["next"])
+
+    def test_comment_mark_read_api(self):
+        Comment.objects.create(
+            task=self.task1, author=self.user2, content="This is a test comment"
+        )
+        unread = Comment.objects.unread_by(self.user1).filter(task=self.task1)
+        self.assertEqual(unread.count(), 1)
+
+        response = self.client.post(
+            self.COMMENT_LIST_API_URL.format(self.proj1.id, self.task1.id) + "read/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["task"], self.task1.id)
+        self.assertEqual(unread.count(), 0)
+        self.assertEqual(
+            TaskReadMarker.objects.filter(user=self.user1, task=self.task1).count(), 1
+        )
+
+        # Comments added afterwards are unread again
+        Comment.objects.create(
+            task=self.task1, author=self.user2, content="This is a new comment"
+        )
+        self.assertEqual(unread.count(), 1)
+
+    def test_comment_mark_read_keeps_late_commits_unread(self):
+        seen = Comment.objects.create(
+            task=self.task1, author=self.user2, content="Seen comment"
+        )
+        response = self.client.post(
+            self.COMMENT_LIST_API_URL.format(self.proj1.id, self.task1.id) + "read/"
+        )
+        self.assertEqual(response.status_code, 200)
+        marker = TaskReadMarker.objects.get(user=self.user1, task=self.task1)
+        self.assertEqual(marker.last_read_at, seen.created_at)
+
+        # Created before the read but committed after it
+        late = Comment.objects.create(
+            task=self.task1, author=self.user2, content="Late comment"
+        )
+        Comment.objects.filter(id=late.id).update(
+            created_at=seen.created_at + timedelta(microseconds=1)
+        )
+        self.assertEqual(
+            list(Comment.objects.unread_by(self.user1).filter(task=self.task1)),
+            [late],
+        )
+
+    @override_settings(
+        MARKDOWN_RENDER_ASYNC=True,
+        MARKDOWN_RENDER_ASYNC_MIN_LENGTH=10,
+        MARKDOWN_RENDER_WORKERS=0,
+    )
+    def test_comment_async_rendering(self):
+        render_cache.clear()
+        url = self.COMMENT_LIST_API_URL.format(self.proj1.id, self.task1.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                url, {"content": "Large **pasted** log"}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data["content_rendered"])
+        self.assertTrue(response.data["rendering_pending"])
+
+        for callback in callbacks:
+            callback()
+        comment = Comment.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            comment.content_rendered, "<p>Large <strong>pasted</strong> log</p>"
+        )
+        event = json.loads(OutboxEvent.objects.latest("seq").frame)
+        self.assertEqual(event["type"], "comment_rendered")
+        self.assertEqual(event["comment_id"], str(comment.id))
+        self.assertEqual(event["content_rendered"], comment.content_rendered)
+
+        # Short or already rendered content is rendered right away
+        for content in ("Short", "Large **pasted** log"):
+            response = self.client.post(url, {"content": content}, format="json")
+            self.assertFalse(response.data["rendering_pending"])
@@ -9,6 +9,11 @@ urlpatterns = [
         views.CommentListView.as_view(),
         name="comment_list",
     ),
+    path(
+        "<uuid:project_id>/tasks/<uuid:task_id>/comments/read/",
+        views.CommentReadView.as_view(),
+        name="comment_read",
+    ),
     path(
         "<uuid:project_id>/tasks/<uuid:task_id>/comments/<uuid:comment_id>/",
         views.CommentDetailView.as_view(),
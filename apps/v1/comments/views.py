@@ -1,30 +1,47 @@
+from django.db import transaction
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import generics, mixins, response, exceptions
 
-from apps.common.constants import TASK_NOT_FOUND, PERMISSION_DENIED
+from apps.common.constants import COMMENT_NOT_FOUND, TASK_NOT_FOUND, PERMISSION_DENIED
+from apps.common.pagination import OldestFirstCursorPagination
+from apps.common.views import (
+    AsyncReadViewMixin,
+    EagerLoadingViewMixin,
+    ResponseCacheMixin,
+)
 from apps.v1.comments.serializers import (
     CommentCreateSerializer,
     CommentUpdateSerializer,
+    TaskReadMarkerSerializer,
 )
+from apps.v1.projects.permissions import IsProjectMember
+from apps.v1.projects.versioning import get_project_version
 from apps.v1.tasks.models import Task
 from django.utils import timezone
-from apps.v1.comments.models import Comment
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-
-channel_layer = get_channel_layer()
+from apps.v1.comments.models import Comment, TaskReadMarker
+from apps.common.outbox import publish_project_event
 
 
 class CommentListView(
-    generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin
+    AsyncReadViewMixin,
+    ResponseCacheMixin,
+    EagerLoadingViewMixin,
+    generics.GenericAPIView,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
 ):
     """
     API view to list all projects.
     """
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
     serializer_class = CommentCreateSerializer
-    queryset = Comment.objects.all()
+    pagination_class = OldestFirstCursorPagination
+    queryset = Comment.objects.existing()
+    query_budget = {"GET": 4, "POST": 17}
+
+    def get_version(self):
+        return get_project_version(self.kwargs["project_id"])
 
     def get_serializer_context(self):
         """
@@ -61,29 +78,41 @@ class CommentListView(
         request.data["task"] = task_id
         return self.create(request, *args, **kwargs)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         project_id = self.kwargs.get("project_id")
         comment = serializer.save()
         serializer = CommentCreateSerializer(comment)
-        async_to_sync(channel_layer.group_send)(
-            f"project_{project_id}",
-            {
-                "type": "task_created",  # This matches the consumer method name
-                "task": serializer.data,  # The data to send to the consumer
-            },
-        )
+        publish_project_event(project_id, "comment_added", comment=serializer.data)
 
 
 class CommentDetailView(
-    generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin
+    ResponseCacheMixin,
+    EagerLoadingViewMixin,
+    generics.GenericAPIView,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
 ):
     """
     API view to list all projects.
     """
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
     serializer_class = CommentUpdateSerializer
     queryset = Comment.objects.existing()
+    query_budget = {"GET": 5, "PATCH": 11, "DELETE": 9}
+
+    def get_version(self):
+        return get_project_version(self.kwargs["project_id"])
+
+    def get_object_version(self):
+        return (
+            self.queryset.filter(
+                id=self.kwargs["comment_id"], task_id=self.kwargs["task_id"]
+            )
+            .values_list("updated_at", flat=True)
+            .first()
+        )
 
     def get_object(self):
         project_id = self.kwargs.get("project_id")
@@ -97,11 +126,9 @@ class CommentDetailView(
             raise exceptions.NotFound(TASK_NOT_FOUND)
 
         try:
-            comment = self.queryset.get(id=comment_id, task_id=task_id)
-        except Task.DoesNotExist:
-            raise exceptions.NotFound(
-                "comment does not exist for given task and project"
-            )
+            comment = self.get_queryset().get(id=comment_id, task_id=task_id)
+        except Comment.DoesNotExist:
+            raise exceptions.NotFound(COMMENT_NOT_FOUND)
         return comment
 
     def get(self, request, project_id, task_id, *args, **kwargs):
@@ -172,21 +199,28 @@ class CommentDetailView(
         return response.Response(status=204)
 
 
-class CommentReadView(
-    generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin
-):
+class CommentReadView(EagerLoadingViewMixin, generics.GenericAPIView):
     """
-    API view to list all projects.
+    API view to mark all comments of a task as read.
     """
 
-    permission_classes = [IsAuthenticated]
-    serializer_class = CommentCreateSerializer
-    queryset = Comment.objects.all()
+    permission_classes = [IsAuthenticated, IsProjectMember]
+    serializer_class = TaskReadMarkerSerializer
+    queryset = TaskReadMarker.objects.all()
+    query_budget = {"POST": 7}
 
     def post(self, request, project_id, task_id, *args, **kwargs):
         """
-        Handles POST requests to create a new project.
+        Handles POST requests to move the user's read marker of the task to its
+        newest comment.
         """
-        request.data["author"] = request.user.id
-        request.data["task"] = task_id
-        return self.create(request, *args, **kwargs)
+        valid_task = (
+            Task.objects.existing().filter(id=task_id, project_id=project_id).exists()
+        )
+        if not valid_task:
+            raise exceptions.NotFound(TASK_NOT_FOUND)
+
+        TaskReadMarker.objects.mark_read(request.user, [task_id])
+        marker = self.get_queryset().get(user=request.user, task_id=task_id)
+        serializer = self.get_serializer(marker)
+        return response.Response(serializer.data, status=200)
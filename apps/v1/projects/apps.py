@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProjectsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.v1.projects"
+
+    def ready(self):
+        from apps.v1.projects import signals  # noqa: F401
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.v1.projects.retention import (
+    RetentionError,
+    apply_retention,
+    get_report,
+    restore,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move soft deleted projects, tasks and comments and archived projects "
+        "past their retention period (RETENTION_DELETED_AFTER, "
+        "RETENTION_ARCHIVED_PROJECT_AFTER) to the archive table, with their "
+        "dependent rows. Run periodically, e.g. daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the rows each policy would archive and the space they "
+            "take, without changing anything.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Roots archived per transaction, RETENTION_BATCH_SIZE by default.",
+        )
+        parser.add_argument(
+            "--restore",
+            nargs="+",
+            metavar="ROOT_ID",
+            help="Restore the archived projects, tasks or comments with these ids.",
+        )
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            for root_id in options["restore"]:
+                try:
+                    restored = restore(root_id)
+                except (RetentionError, ValueError) as e:
+                    raise CommandError(str(e))
+                self.stdout.write(f"Restored {restored} rows of {root_id}")
+            return
+
+        if options["dry_run"]:
+            total = 0
+            for entry in get_report():
+                rows = ", ".join(
+                    f"{count} {label}" for label, count in entry["rows"].items()
+                )
+                size = (
+                    f", ~{entry['bytes'] / 1024:.0f} KiB"
+                    if entry["bytes"] is not None
+                    else ""
+                )
+                self.stdout.write(f"{entry['policy']}: {rows}{size}")
+                total += entry["bytes"] or 0
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"~{total / 1024:.0f} KiB reclaimable in the hot tables. Freed "
+                    "pages are reused by new rows, VACUUM shrinks the file."
+                )
+            )
+            return
+
+        started_at = time.perf_counter()
+        archived = apply_retention(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started_at
+        rows = ", ".join(f"{count} rows of {name}" for name, count in archived.items())
+        self.stdout.write(self.style.SUCCESS(f"Archived {rows} in {elapsed:.1f}s."))
@@ -0,0 +1,59 @@
+"""
+Central, cached lookup of users' membership and role in projects,
+shared by REST views (see `permissions.IsProjectMember`) and WebSocket consumers.
+Entries are invalidated by the signals in `apps.v1.projects.signals`.
+"""
+
+import uuid
+
+from django.conf import settings
+
+from apps.common.cache import MISSING, LRUCache
+from apps.v1.projects.models import ProjectMembership
+
+membership_cache = LRUCache(
+    maxsize=settings.MEMBERSHIP_CACHE_SIZE, ttl=settings.MEMBERSHIP_CACHE_TTL
+)
+
+
+def _normalize(value):
+    return str(uuid.UUID(str(value)))
+
+
+def get_project_role(user_id, project_id):
+    """
+    Return the role of the user in the project, None when the user
+    is not an active member of an existing project.
+    """
+    try:
+        key = (_normalize(user_id), _normalize(project_id))
+    except ValueError:
+        return None
+
+    role = membership_cache.get(key)
+    if role is MISSING:
+        role = (
+            ProjectMembership.objects.filter(
+                user_id=key[0],
+                project_id=key[1],
+                project__deleted_at__isnull=True,
+                status=ProjectMembership.MembershipStatus.ACTIVE,
+            )
+            .values_list("role", flat=True)
+            .first()
+        )
+        membership_cache.set(key, role)
+    return role
+
+
+def is_project_member(user_id, project_id):
+    return get_project_role(user_id, project_id) is not None
+
+
+def invalidate_membership(user_id, project_id):
+    membership_cache.delete((_normalize(user_id), _normalize(project_id)))
+
+
+def invalidate_project(project_id):
+    project_id = _normalize(project_id)
+    membership_cache.delete_where(lambda key: key[1] == project_id)
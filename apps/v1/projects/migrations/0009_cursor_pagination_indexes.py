@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_alter_projectinvitation_role_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectinvitation',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='projects_pr_user_id_f09488_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectinvitation',
+            index=models.Index(fields=['invited_by', 'created_at', 'id'], name='projects_pr_invited_38113d_idx'),
+        ),
+    ]
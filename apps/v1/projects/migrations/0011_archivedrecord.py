@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:27
+
+import apps.v1.projects.models
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0010_projectversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedRecord",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("root_id", models.UUIDField()),
+                ("model", models.CharField(max_length=100)),
+                ("object_id", models.UUIDField()),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=apps.v1.projects.models.ArchiveJSONEncoder
+                    ),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["root_id"], name="projects_ar_root_id_820c52_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from apps.common.models import BaseModel
@@ -46,6 +49,55 @@ class Project(BaseModel):
         if save:
             self.save(update_fields=["deleted_at"])
 
+class ProjectVersion(models.Model):
+    """
+    Version of the data of a project (the project, its members, tasks, comments
+    and read markers), bumped on every change (see `apps.v1.projects.versioning`).
+    """
+
+    project = models.OneToOneField(
+        Project, primary_key=True, on_delete=models.CASCADE, related_name="version"
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.project_id} version {self.version}"
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """
+    Keeps the microseconds of datetimes, which DjangoJSONEncoder truncates.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class ArchivedRecord(models.Model):
+    """
+    Row moved out of the hot tables by the retention engine (see
+    `apps.v1.projects.retention`), kept serialized until it is restored.
+    Rows are archived along with their root: the soft deleted or archived
+    project, task or comment whose removal took them away.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    root_id = models.UUIDField()
+    model = models.CharField(max_length=100)  # Label of the model, e.g. tasks.task
+    object_id = models.UUIDField()
+    data = models.JSONField(encoder=ArchiveJSONEncoder)  # Serialized fields
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["root_id"])]
+
+    def __str__(self):
+        return f"Archived {self.model} {self.object_id}"
+
+
 class ProjectMembership(BaseModel):
     """
     Represents an active membership of a User in a Project.
@@ -131,8 +183,12 @@ class ProjectInvitation(BaseModel):
         null=True, blank=True
     )  # Timestamp when the user accepted or rejected
 
-    # class Meta:
-    #     unique_together = ()
+    class Meta:
+        indexes = [
+            # Cursor pagination of received and sent invitations
+            models.Index(fields=["user", "created_at", "id"]),
+            models.Index(fields=["invited_by", "created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"Invitation for {self.user.username} to join {self.project.title} (Status: {self.invitation_status})"
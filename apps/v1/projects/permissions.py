@@ -0,0 +1,19 @@
+from rest_framework.permissions import BasePermission
+
+from apps.common.constants import PERMISSION_DENIED
+from apps.v1.projects.membership import is_project_member
+
+
+class IsProjectMember(BasePermission):
+    """
+    Allows access only to active members of the project
+    given by the `project_id` URL kwarg.
+    """
+
+    message = PERMISSION_DENIED
+
+    def has_permission(self, request, view):
+        project_id = view.kwargs.get("project_id")
+        if project_id is None:
+            return True
+        return is_project_member(request.user.id, project_id)
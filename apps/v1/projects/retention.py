@@ -0,0 +1,241 @@
+"""
+Retention of soft deleted and archived data.
+
+Soft deletes only set `deleted_at`, so dead rows would stay in the hot tables
+and their indexes forever. Once past their retention period they are moved to
+`ArchivedRecord`, along with the rows depending on them:
+
+- projects soft deleted `RETENTION_DELETED_AFTER` seconds ago, or archived and
+  not updated for `RETENTION_ARCHIVED_PROJECT_AFTER` seconds, with their
+  memberships, invitations, tasks, comments and read markers
+- tasks soft deleted `RETENTION_DELETED_AFTER` seconds ago, with their comments
+  and read markers
+- comments soft deleted `RETENTION_DELETED_AFTER` seconds ago
+
+Each batch of `RETENTION_BATCH_SIZE` roots is moved in one transaction. The
+outbox events of archived projects are deleted, not archived: the replay log
+is not restored and reconnecting clients resync. `restore` moves the rows of
+a root back.
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.common.models import OutboxEvent, ProjectEventSequence
+from apps.v1.comments.models import Comment, TaskReadMarker
+from apps.v1.projects.models import (
+    ArchivedRecord,
+    Project,
+    ProjectInvitation,
+    ProjectMembership,
+    ProjectVersion,
+)
+from apps.v1.tasks.models import Task
+
+# Rows archived along with a root, as (model, lookup of the root), parents first
+DEPENDENTS = {
+    Project: [
+        (ProjectVersion, "project"),
+        (ProjectEventSequence, "project"),
+        (ProjectMembership, "project"),
+        (ProjectInvitation, "project"),
+        (Task, "project"),
+        (Comment, "task__project"),
+        (TaskReadMarker, "task__project"),
+    ],
+    Task: [(Comment, "task"), (TaskReadMarker, "task")],
+    Comment: [],
+}
+
+# Restored in this order, so that parents exist before their rows
+RESTORE_ORDER = [Project._meta.label_lower] + [
+    model._meta.label_lower for model, _ in DEPENDENTS[Project]
+]
+
+# Deleted along with projects without being archived
+DISCARDED = {OutboxEvent._meta.label}
+
+
+class RetentionError(Exception):
+    """
+    Raised when rows cannot be archived or restored consistently.
+    """
+
+
+def get_policies(now=None):
+    """
+    (name, roots) of the enabled retention policies, projects first. Roots of
+    a policy exclude the rows going away with the roots of a previous one.
+    """
+    now = now or timezone.now()
+    policies = []
+
+    projects = Project._base_manager.none()
+    if settings.RETENTION_DELETED_AFTER:
+        projects = Project._base_manager.filter(
+            deleted_at__lt=now - timedelta(seconds=settings.RETENTION_DELETED_AFTER)
+        )
+    if settings.RETENTION_ARCHIVED_PROJECT_AFTER:
+        projects |= Project._base_manager.filter(
+            status=Project.ProjectStatus.ARCHIVED,
+            updated_at__lt=now
+            - timedelta(seconds=settings.RETENTION_ARCHIVED_PROJECT_AFTER),
+        )
+    policies.append(("projects", projects))
+
+    if settings.RETENTION_DELETED_AFTER:
+        deleted_before = now - timedelta(seconds=settings.RETENTION_DELETED_AFTER)
+        tasks = Task._base_manager.filter(deleted_at__lt=deleted_before).exclude(
+            project__in=projects.values("pk")
+        )
+        comments = (
+            Comment._base_manager.filter(deleted_at__lt=deleted_before)
+            .exclude(task__in=tasks.values("pk"))
+            .exclude(task__project__in=projects.values("pk"))
+        )
+        policies += [("tasks", tasks), ("comments", comments)]
+    return policies
+
+
+def archive_roots(model, pks):
+    """
+    Move the roots with the given primary keys and their dependent rows to
+    `ArchivedRecord`, in the current transaction. Returns the number of rows.
+    """
+    records = []
+    archived = {}
+    for row_model, lookup in [(model, "pk")] + DEPENDENTS[model]:
+        rows = list(
+            row_model._base_manager.filter(**{f"{lookup}__in": pks}).annotate(
+                retention_root=F(lookup)
+            )
+        )
+        for row, serialized in zip(rows, serializers.serialize("python", rows)):
+            records.append(
+                ArchivedRecord(
+                    root_id=row.retention_root,
+                    model=serialized["model"],
+                    object_id=serialized["pk"],
+                    data=serialized["fields"],
+                )
+            )
+        archived[row_model._meta.label] = len(rows)
+
+    ArchivedRecord.objects.bulk_create(records, batch_size=500)
+    _, deleted = model._base_manager.filter(pk__in=pks).delete()
+    for label, count in deleted.items():
+        if label not in DISCARDED and count != archived.get(label, 0):
+            # Rolled back by the caller's transaction
+            raise RetentionError(
+                f"Deleting {model._meta.label} rows removed {count} {label} rows, "
+                f"{archived.get(label, 0)} were archived. Update DEPENDENTS."
+            )
+    return len(records)
+
+
+def apply_retention(now=None, batch_size=None):
+    """
+    Archive the roots of every policy, `batch_size` roots per transaction.
+    Returns the number of archived rows per policy.
+    """
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    archived = {}
+    for name, roots in get_policies(now):
+        archived[name] = 0
+        while pks := list(roots.values_list("pk", flat=True)[:batch_size]):
+            with transaction.atomic():
+                archived[name] += archive_roots(roots.model, pks)
+    return archived
+
+
+def restore(root_id):
+    """
+    Move the rows archived with the given root back to the hot tables. The
+    root is undeleted and its `updated_at` set to now, so that it is not
+    archived again by the next run. Returns the number of restored rows.
+    """
+    root_id = uuid.UUID(str(root_id))
+    records = list(ArchivedRecord.objects.filter(root_id=root_id))
+    if not records:
+        raise RetentionError(f"Nothing archived with the root {root_id}.")
+    records.sort(key=lambda record: RESTORE_ORDER.index(record.model))
+
+    now = timezone.now()
+    with transaction.atomic():
+        objects = serializers.deserialize(
+            "python",
+            [
+                {"model": record.model, "pk": record.object_id, "fields": record.data}
+                for record in records
+            ],
+        )
+        tables = set()
+        try:
+            for deserialized in objects:
+                instance = deserialized.object
+                if instance.pk == root_id and isinstance(instance, tuple(DEPENDENTS)):
+                    instance.deleted_at = None
+                    instance.updated_at = now
+                # Raw save, fields like `created_at` and rendered markdown are kept
+                deserialized.save()
+                tables.add(instance._meta.db_table)
+            connection.check_constraints(table_names=sorted(tables))
+        except IntegrityError as e:
+            # The parent of a restored task or comment may be archived itself
+            raise RetentionError(f"Cannot restore {root_id}: {e}") from e
+        ArchivedRecord.objects.filter(root_id=root_id).delete()
+    return len(records)
+
+
+def table_sizes():
+    """
+    Bytes used by each table with its indexes, from the SQLite `dbstat` table.
+    Empty when the database does not provide it.
+    """
+    if connection.vendor != "sqlite":
+        return {}
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s "
+                "JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name"
+            )
+        except DatabaseError:
+            # Built without SQLITE_ENABLE_DBSTAT_VTAB
+            return {}
+        return dict(cursor.fetchall())
+
+
+def get_report(now=None):
+    """
+    Dry run: rows each policy would archive per model, and the estimated bytes
+    they take in the hot tables (their share of the table and index pages).
+    """
+    sizes = table_sizes()
+    report = []
+    for name, roots in get_policies(now):
+        rows = {}
+        estimated_bytes = 0
+        for row_model, lookup in [(roots.model, "pk")] + DEPENDENTS[roots.model]:
+            count = row_model._base_manager.filter(
+                **{f"{lookup}__in": roots.values("pk")}
+            ).count()
+            rows[row_model._meta.label] = count
+            table = row_model._meta.db_table
+            if count and sizes.get(table):
+                total = row_model._base_manager.count()
+                estimated_bytes += sizes[table] * count // total
+        report.append(
+            {
+                "policy": name,
+                "rows": rows,
+                "bytes": estimated_bytes if sizes else None,
+            }
+        )
+    return report
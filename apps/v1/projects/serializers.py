@@ -1,25 +1,21 @@
 from rest_framework import serializers
 from apps.common.models import CustomUser
+from apps.common.serializers import DynamicFieldsMixin, EagerLoadingMixin
+from apps.v1.comments.models import Comment
 from apps.v1.projects.models import Project, ProjectInvitation, ProjectMembership
-from django.db.models import Prefetch
+from apps.v1.tasks.models import Task
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+def has_unread_comments(user):
     """
-    Serializer specifically for Listing projects.
+    Condition matching tasks which have at least one comment not seen by the user.
     """
+    return Exists(Comment.objects.unread_by(user).filter(task=OuterRef("pk")))
 
-    no_of_tasks_having_unread_comments = serializers.SerializerMethodField()
-
-    def get_no_of_tasks_having_unread_comments(self, obj):
-        return obj.tasks.exclude(comments__seen_by=self.context.get("user")).count()
-
-    class Meta:
-        model = Project
-        fields = "__all__"
 
-
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = (
@@ -33,49 +29,107 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class ProjectMembershipSerializer(serializers.ModelSerializer):
+class ProjectMembershipSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer()
 
+    select_related_fields = ("user",)
+
     class Meta:
         model = ProjectMembership
         fields = "__all__"
 
+
+class ProjectSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
+    """
+    Serializer specifically for Listing projects.
+    Memberships are included only when requested with `?expand=memberships`.
+    """
+
+    no_of_tasks_having_unread_comments = serializers.SerializerMethodField()
+    memberships = ProjectMembershipSerializer(many=True, read_only=True)
+
+    expandable_fields = ("memberships",)
+    prefetch_related_fields = (
+        Prefetch(
+            "memberships",
+            queryset=ProjectMembershipSerializer.eager_load(
+                ProjectMembership.objects.all()
+            ),
+        ),
+        Prefetch("members", queryset=CustomUser.objects.only("id")),
+    )
+
+    def get_no_of_tasks_having_unread_comments(self, obj):
+        # Use the value precomputed by `annotate_unread_comments` when available
+        if hasattr(obj, "tasks_having_unread_comments_count"):
+            return obj.tasks_having_unread_comments_count
+        user = self.context.get("user")
+        return obj.tasks.filter(has_unread_comments(user)).count()
+
     @classmethod
-    def eager_load(cls, queryset):
+    def eager_load(cls, queryset, context=None):
         """
         prefetch data from DB to avoid N+1 queries.
         """
-        queryset = queryset.select_related("user")
+        queryset = super().eager_load(queryset, context)
+        user = (context or {}).get("user")
+        fields = cls.get_serialized_fields(context)
+        if user is not None and "no_of_tasks_having_unread_comments" in fields:
+            queryset = cls.annotate_unread_comments(queryset, user)
         return queryset
 
+    @classmethod
+    def annotate_unread_comments(cls, queryset, user):
+        """
+        Annotate number of tasks having unread comments for the given user
+        on each project, so that the whole page is computed in a single query.
+        """
+        tasks_having_unread_comments = (
+            Task.objects.filter(project=OuterRef("pk"))
+            .filter(has_unread_comments(user))
+            .order_by()
+            .values("project")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return queryset.annotate(
+            tasks_having_unread_comments_count=Coalesce(
+                Subquery(tasks_having_unread_comments), 0
+            )
+        )
+
+    class Meta:
+        model = Project
+        fields = "__all__"
+
 
-class ProjectFullSerializer(serializers.ModelSerializer):
+class ProjectFullSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
     """
     Serializer specifically for full project details.
     """
 
     memberships = ProjectMembershipSerializer(many=True)
 
+    prefetch_related_fields = (
+        Prefetch(
+            "memberships",
+            queryset=ProjectMembershipSerializer.eager_load(
+                ProjectMembership.objects.all()
+            ),
+        ),
+        Prefetch("members", queryset=CustomUser.objects.only("id")),
+    )
+
     class Meta:
         model = Project
         fields = "__all__"
 
-    @classmethod
-    def eager_load(cls, queryset):
-        """
-        prefetch data from DB to avoid N+1 queries.
-        """
-        queryset = queryset.prefetch_related(
-            Prefetch("memberships", queryset=ProjectMembership.objects.all()),
-            Prefetch(
-                "memberships__user",
-                queryset=CustomUser.objects.only(UserSerializer.Meta.fields),
-            ),
-        )
-        return queryset
-
 
-class ProjectInvitationSerializer(serializers.ModelSerializer):
+class ProjectInvitationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializer for ProjectInvitation model.
     """
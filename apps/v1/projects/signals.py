@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.common.fields import markdown_rendered, markdown_rerendered
+from apps.common.models import CustomUser
+from apps.v1.comments.models import Comment, TaskReadMarker
+from apps.v1.projects.membership import invalidate_membership, invalidate_project
+from apps.v1.projects.models import Project, ProjectMembership
+from apps.v1.projects.serializers import UserSerializer
+from apps.v1.projects.versioning import bump_project_version, bump_project_versions
+from apps.v1.tasks.models import Task
+
+
+def _invalidate_now_and_on_commit(invalidate, *args):
+    # Now for reads in the writer's transaction, again on commit because a
+    # concurrent read may cache the committed state back in between
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
+
+
+@receiver([post_save, post_delete], sender=ProjectMembership)
+def invalidate_membership_cache(sender, instance, **kwargs):
+    # Also covers ProjectInvitation.accept, which creates the membership
+    _invalidate_now_and_on_commit(
+        invalidate_membership, instance.user_id, instance.project_id
+    )
+
+
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_project_membership_cache(sender, instance, created=False, **kwargs):
+    # Memberships of soft deleted projects are not resolved anymore
+    if not created:
+        _invalidate_now_and_on_commit(invalidate_project, instance.id)
+
+
+def _deleting_project(origin):
+    # Rows deleted along with their project, which takes its version along
+    return _deleted_with(origin, Project)
+
+
+def _deleted_with(origin, *models):
+    return origin is not None and getattr(origin, "model", type(origin)) in models
+
+
+@receiver(post_save, sender=Project)
+@receiver([post_save, post_delete], sender=ProjectMembership)
+@receiver([post_save, post_delete], sender=Task)
+def bump_version(sender, instance, origin=None, **kwargs):
+    if _deleting_project(origin):
+        return
+    bump_project_version(instance.pk if sender is Project else instance.project_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def bump_member_project_versions(
+    sender, instance, created=False, update_fields=None, **kwargs
+):
+    # Members are nested in project responses, e.g. `?expand=memberships`.
+    # Saves of other fields, such as `last_login` on login, change none of them.
+    if created or (
+        update_fields is not None
+        and not set(update_fields) & set(UserSerializer.Meta.fields)
+    ):
+        return
+    bump_project_versions(
+        ProjectMembership.objects.filter(user=instance).values_list(
+            "project_id", flat=True
+        )
+    )
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=TaskReadMarker)
+def bump_task_project_version(sender, instance, origin=None, **kwargs):
+    # Rows deleted along with their task, which bumps the version itself
+    if _deleted_with(origin, Project, Task):
+        return
+    project_id = (
+        Task._base_manager.filter(pk=instance.task_id)
+        .values_list("project_id", flat=True)
+        .first()
+    )
+    if project_id is not None:
+        bump_project_version(project_id)
+
+
+@receiver(markdown_rendered)
+@receiver(markdown_rerendered)
+def bump_rendered_project_version(sender, instance_pk=None, pks=(), **kwargs):
+    # Rendered fields are stored with bulk updates, without save signals
+    pks = [instance_pk] if instance_pk is not None else pks
+    tasks = Task._base_manager.all()
+    if sender is Comment:
+        tasks = tasks.filter(comments__pk__in=pks)
+    elif sender is Task:
+        tasks = tasks.filter(pk__in=pks)
+    else:
+        return
+    bump_project_versions(tasks.values_list("project_id", flat=True).distinct())
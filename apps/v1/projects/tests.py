@@ -1,8 +1,24 @@
+from datetime import timedelta
+from io import StringIO
+
 from rest_framework.test import APIClient
 from rest_framework import exceptions
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
 from apps.common.models import CustomUser
-from apps.v1.projects.models import Project
+from apps.common.outbox import publish_project_event
+from apps.common.views import response_cache
+from apps.v1.comments.models import Comment, TaskReadMarker
+from apps.v1.projects import membership, retention
+from apps.v1.projects.models import (
+    ArchivedRecord,
+    Project,
+    ProjectInvitation,
+    ProjectMembership,
+)
+from apps.v1.tasks.models import Task
 from apps.v1.projects.serializers import ProjectSerializer
 
 
@@ -124,3 +140,317 @@ class ProjectIntegrationTestCase(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data["invitation_status"], "REJECTED")
+
+    def test_project_list_unread_comments(self):
+        ProjectMembership.objects.create(user=self.user, project=self.proj1)
+        read_task, unread_task, _ = [
+            Task.objects.create(title=title, description=title, project=self.proj1)
+            for title in ("Read", "Unread", "No comments")
+        ]
+
+        comment = Comment.objects.create(
+            task=read_task, author=self.user2, content="Seen"
+        )
+        TaskReadMarker.objects.mark_read(self.user, [read_task.id], comment.created_at)
+        Comment.objects.create(task=unread_task, author=self.user2, content="New")
+        Comment.objects.create(task=unread_task, author=self.user2, content="New")
+
+        response = self.client.get("/api/v1/projects/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["no_of_tasks_having_unread_comments"], 1)
+
+    def test_project_mark_read(self):
+        ProjectMembership.objects.create(user=self.user, project=self.proj1)
+        task = Task.objects.create(title="Task", description="Task", project=self.proj1)
+        Comment.objects.create(task=task, author=self.user2, content="New")
+
+        response = self.client.post(f"/api/v1/projects/{self.proj1.id}/read/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["tasks_marked_read"], 1)
+
+        response = self.client.get("/api/v1/projects/")
+        self.assertEqual(response.data[0]["no_of_tasks_having_unread_comments"], 0)
+
+        # Non members can not mark the project as read
+        response = self.client.post(f"/api/v1/projects/{self.proj2.id}/read/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_project_list_full_data_eager_loading(self):
+        for project in (self.proj1, self.proj2):
+            ProjectMembership.objects.create(user=self.user, project=project)
+            ProjectMembership.objects.create(user=self.user2, project=project)
+
+        # version probe + projects + prefetched memberships with users
+        # + prefetched members
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/v1/projects/?full_data=true")
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data[0]["memberships"]), 2)
+
+    def test_project_list_conditional_get(self):
+        ProjectMembership.objects.create(user=self.user, project=self.proj1)
+        etag = self.client.get("/api/v1/projects/")["ETag"]
+
+        response = self.client.get("/api/v1/projects/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Joining a project changes the list
+        ProjectMembership.objects.create(user=self.user, project=self.proj2)
+        response = self.client.get("/api/v1/projects/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_project_list_conditional_get_project_removed(self):
+        ProjectMembership.objects.create(user=self.user, project=self.proj1)
+        ProjectMembership.objects.create(user=self.user, project=self.proj2)
+        response = self.client.get("/api/v1/projects/")
+        self.assertEqual(len(response.data), 2)
+        # The list has no last modified time to compare with
+        self.assertNotIn("Last-Modified", response)
+        since = http_date(timezone.now().timestamp() + 60)
+
+        # Neither a deleted project nor a left one is served from the client cache
+        self.proj2.soft_delete()
+        response = self.client.get("/api/v1/projects/", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+        ProjectMembership.objects.filter(user=self.user, project=self.proj1).delete()
+        response = self.client.get("/api/v1/projects/", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+    def test_project_list_conditional_get_member_profile_change(self):
+        ProjectMembership.objects.create(user=self.user, project=self.proj1)
+        ProjectMembership.objects.create(user=self.user2, project=self.proj1)
+        url = "/api/v1/projects/?full_data=true"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        # Members are part of the response
+        self.user2.first_name = "Jane"
+        self.user2.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "Jane",
+            [m["user"]["first_name"] for m in response.data[0]["memberships"]],
+        )
+
+        # Logging in only updates last_login
+        etag = response["ETag"]
+        self.user2.last_login = timezone.now()
+        self.user2.save(update_fields=["last_login"])
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+    def test_project_list_response_cache_member_profile_change(self):
+        response_cache.clear()
+        ProjectMembership.objects.create(user=self.user, project=self.proj1)
+        url = "/api/v1/projects/?full_data=true"
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        response = self.client.patch("/api/v1/users/me/", {"first_name": "Jane"})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(
+            response.json()[0]["memberships"][0]["user"]["first_name"], "Jane"
+        )
+
+    def test_project_list_expand_memberships(self):
+        ProjectMembership.objects.create(user=self.user, project=self.proj1)
+
+        response = self.client.get("/api/v1/projects/")
+        self.assertNotIn("memberships", response.data[0])
+
+        response = self.client.get(
+            "/api/v1/projects/", {"fields": "id,title", "expand": "memberships"}
+        )
+        self.assertEqual(set(response.data[0]), {"id", "title", "memberships"})
+        self.assertEqual(
+            response.data[0]["memberships"][0]["user"]["id"], str(self.user.id)
+        )
+
+
+class ProjectMembershipCacheTestCase(TestCase):
+    def setUp(self):
+        membership.membership_cache.clear()
+        self.project = Project.objects.create(title="Test project")
+        self.user = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+
+    def test_membership_lookup_is_cached(self):
+        ProjectMembership.objects.create(
+            user=self.user,
+            project=self.project,
+            role=ProjectMembership.ProjectRole.ADMIN,
+        )
+        with self.assertNumQueries(1):
+            role = membership.get_project_role(self.user.id, self.project.id)
+        self.assertEqual(role, ProjectMembership.ProjectRole.ADMIN)
+
+        with self.assertNumQueries(0):
+            role = membership.get_project_role(str(self.user.id), self.project.id)
+        self.assertEqual(role, ProjectMembership.ProjectRole.ADMIN)
+
+    def test_membership_cache_invalidation(self):
+        self.assertFalse(membership.is_project_member(self.user.id, self.project.id))
+
+        invite = ProjectInvitation.objects.create(user=self.user, project=self.project)
+        invite.accept()
+        self.assertTrue(membership.is_project_member(self.user.id, self.project.id))
+
+        self.project.soft_delete()
+        self.assertFalse(membership.is_project_member(self.user.id, self.project.id))
+
+    def test_membership_cache_invalidated_on_commit(self):
+        project_membership = ProjectMembership.objects.create(
+            user=self.user, project=self.project
+        )
+        self.assertTrue(membership.is_project_member(self.user.id, self.project.id))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            project_membership.delete()
+            self.assertFalse(
+                membership.is_project_member(self.user.id, self.project.id)
+            )
+            # A concurrent request reading before the commit
+            membership.membership_cache.set(
+                (str(self.user.id), str(self.project.id)),
+                ProjectMembership.ProjectRole.MEMBER,
+            )
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(membership.is_project_member(self.user.id, self.project.id))
+
+    def test_task_list_requires_membership(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f"/api/v1/projects/{self.project.id}/tasks/"
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, 403)
+
+        ProjectMembership.objects.create(user=self.user, project=self.project)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+
+class RetentionTestCase(TestCase):
+    def setUp(self):
+        membership.membership_cache.clear()
+        self.user = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+        self.project = Project.objects.create(title="Test project")
+        ProjectMembership.objects.create(user=self.user, project=self.project)
+        self.task = Task.objects.create(
+            title="Test task", description="Some **task**", project=self.project
+        )
+        self.comment = Comment.objects.create(
+            task=self.task, author=self.user, content="Some *comment*"
+        )
+        TaskReadMarker.objects.mark_read(self.user, [self.task.id])
+        self.long_ago = timezone.now() - timedelta(days=365)
+
+    def test_soft_deleted_task_is_archived_and_restored(self):
+        recent = Task.objects.create(title="Recent", project=self.project)
+        recent.soft_delete()
+        Task.objects.filter(pk=self.task.pk).update(deleted_at=self.long_ago)
+
+        archived = retention.apply_retention()
+        self.assertEqual(archived, {"projects": 0, "tasks": 3, "comments": 0})
+        self.assertFalse(Task._base_manager.filter(pk=self.task.pk).exists())
+        self.assertFalse(Comment._base_manager.exists())
+        self.assertFalse(TaskReadMarker.objects.exists())
+        # Deleted within the retention period
+        self.assertTrue(Task._base_manager.filter(pk=recent.pk).exists())
+
+        self.assertEqual(retention.restore(self.task.id), 3)
+        task = Task.objects.existing().get(pk=self.task.pk)
+        self.assertEqual(task.created_at, self.task.created_at)
+        self.assertEqual(task.description_rendered, "<p>Some <strong>task</strong></p>")
+        comment = Comment.objects.get()
+        self.assertEqual(comment.created_at, self.comment.created_at)
+        self.assertEqual(comment.content_rendered, "<p>Some <em>comment</em></p>")
+        self.assertTrue(TaskReadMarker.objects.filter(task=task).exists())
+        self.assertFalse(ArchivedRecord.objects.exists())
+
+    def test_archived_project_is_archived_and_restored(self):
+        publish_project_event(self.project.id, "task_created", task={})
+        ProjectInvitation.objects.create(
+            user=CustomUser.objects.create(username="invited"), project=self.project
+        )
+        Project.objects.filter(pk=self.project.pk).update(
+            status=Project.ProjectStatus.ARCHIVED, updated_at=self.long_ago
+        )
+        self.assertTrue(membership.is_project_member(self.user.id, self.project.id))
+
+        call_command("apply_retention", stdout=StringIO())
+        self.assertFalse(Project._base_manager.filter(pk=self.project.pk).exists())
+        self.assertFalse(Task._base_manager.exists())
+        self.assertFalse(membership.is_project_member(self.user.id, self.project.id))
+        # Project, version, event sequence, membership, invitation, task,
+        # comment and read marker
+        self.assertEqual(
+            ArchivedRecord.objects.filter(root_id=self.project.id).count(), 8
+        )
+
+        call_command(
+            "apply_retention", restore=[str(self.project.id)], stdout=StringIO()
+        )
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual(project.status, Project.ProjectStatus.ARCHIVED)
+        self.assertGreater(project.updated_at, self.long_ago)
+        self.assertTrue(membership.is_project_member(self.user.id, self.project.id))
+        self.assertEqual(Comment.objects.filter(task__project=project).count(), 1)
+        self.assertEqual(project.event_sequence.last_seq, 1)
+
+        # Not archived again until the retention period passed
+        self.assertEqual(retention.apply_retention()["projects"], 0)
+
+    def test_restore_requires_parent(self):
+        self.comment.soft_delete()
+        Comment.objects.filter(pk=self.comment.pk).update(deleted_at=self.long_ago)
+        retention.apply_retention()
+        Task.objects.filter(pk=self.task.pk).update(deleted_at=self.long_ago)
+        retention.apply_retention()
+
+        with self.assertRaises(retention.RetentionError):
+            retention.restore(self.comment.id)
+        self.assertFalse(Comment._base_manager.exists())
+
+        retention.restore(self.task.id)
+        retention.restore(self.comment.id)
+        self.assertTrue(Comment.objects.existing().exists())
+
+    def test_dry_run_report(self):
+        Task.objects.filter(pk=self.task.pk).update(deleted_at=self.long_ago)
+        Comment.objects.create(
+            task=Task.objects.create(title="Other", project=self.project),
+            author=self.user,
+            content="Deleted",
+            deleted_at=self.long_ago,
+        )
+
+        report = {entry["policy"]: entry for entry in retention.get_report()}
+        self.assertEqual(
+            report["tasks"]["rows"],
+            {"tasks.Task": 1, "comments.Comment": 1, "comments.TaskReadMarker": 1},
+        )
+        self.assertEqual(report["comments"]["rows"], {"comments.Comment": 1})
+        self.assertGreater(report["tasks"]["bytes"], 0)
+
+        out = StringIO()
+        call_command("apply_retention", dry_run=True, stdout=out)
+        self.assertIn("KiB reclaimable", out.getvalue())
+        self.assertTrue(Task._base_manager.filter(pk=self.task.pk).exists())
+        self.assertFalse(ArchivedRecord.objects.exists())
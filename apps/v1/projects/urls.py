@@ -5,6 +5,9 @@ app_name = "projects"
 
 urlpatterns = [
     path("", views.ProjectListView.as_view(), name="project_list"),
+    path(
+        "<uuid:project_id>/read/", views.ProjectReadView.as_view(), name="project_read"
+    ),
     path("invite/", views.InviteProjectMemberListView.as_view(), name="invite_member"),
     path(
         "invite/<uuid:invite_id>/action/<str:action>/",
@@ -0,0 +1,69 @@
+"""
+Per-project data versions used as a cheap probe for conditional requests
+(see `apps.common.views.ConditionalRequestMixin`).
+Versions are bumped in the transaction of the change by the signals in
+`apps.v1.projects.signals`, bulk updates bump them explicitly.
+"""
+
+import uuid
+
+from django.db.models import F
+from django.utils import timezone
+
+from apps.v1.projects.models import Project, ProjectVersion
+
+
+def bump_project_versions(project_ids):
+    project_ids = {uuid.UUID(str(project_id)) for project_id in project_ids}
+    if not project_ids:
+        return
+    now = timezone.now()
+    versions = ProjectVersion.objects.filter(project_id__in=project_ids)
+    updated = versions.update(version=F("version") + 1, updated_at=now)
+    if updated == len(project_ids):
+        return
+
+    # Projects changed for the first time
+    missing = project_ids
+    if updated:
+        missing = project_ids - set(versions.values_list("project_id", flat=True))
+    for project_id in missing:
+        _, created = ProjectVersion.objects.get_or_create(
+            project_id=project_id, defaults={"version": 1, "updated_at": now}
+        )
+        if not created:
+            # Created concurrently
+            ProjectVersion.objects.filter(project_id=project_id).update(
+                version=F("version") + 1, updated_at=now
+            )
+
+
+def bump_project_version(project_id):
+    bump_project_versions([project_id])
+
+
+def get_project_version(project_id):
+    """
+    (version, updated_at) of the project, (0, None) until its first change.
+    """
+    row = (
+        ProjectVersion.objects.filter(project_id=project_id)
+        .values_list("version", "updated_at")
+        .first()
+    )
+    return row or (0, None)
+
+
+def get_projects_version(user):
+    """
+    Version key of the user's project list, changing when any of the projects
+    changes or the list itself does. There is no last modified time: projects
+    deleted or left drop out of the list without moving it forward.
+    """
+    # Sorted here, the database would sort in a temporary B-tree
+    rows = sorted(
+        Project.objects.existing()
+        .filter(members=user)
+        .values_list("id", "version__version")
+    )
+    return ",".join(f"{project_id}:{version or 0}" for project_id, version in rows)
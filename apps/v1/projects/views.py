@@ -2,17 +2,34 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import generics, mixins, response, exceptions
 
 from apps.common.constants import PERMISSION_DENIED
+from apps.common.pagination import KeysetCursorPagination
+from apps.common.views import (
+    AsyncReadViewMixin,
+    EagerLoadingViewMixin,
+    ResponseCacheMixin,
+)
+from apps.v1.comments.models import TaskReadMarker
+from apps.v1.projects.membership import get_project_role, is_project_member
 from apps.v1.projects.models import Project, ProjectInvitation, ProjectMembership
+from apps.v1.projects.permissions import IsProjectMember
+from apps.v1.projects.versioning import get_projects_version
 from apps.v1.projects.serializers import (
     ProjectFullSerializer,
     ProjectInvitationSerializer,
     ProjectMembershipSerializer,
     ProjectSerializer,
+    has_unread_comments,
 )
+from apps.v1.tasks.models import Task
 
 
 class ProjectListView(
-    generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin
+    AsyncReadViewMixin,
+    ResponseCacheMixin,
+    EagerLoadingViewMixin,
+    generics.GenericAPIView,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
 ):
     """
     API view to list all projects.
@@ -21,6 +38,11 @@ class ProjectListView(
     permission_classes = [IsAuthenticated]
     serializer_class = ProjectSerializer
     queryset = Project.objects.existing()
+    query_budget = {"GET": 4, "POST": 11}
+
+    def get_version(self):
+        # ETag only, If-Modified-Since would miss projects leaving the list
+        return get_projects_version(self.request.user), None
 
     def get_serializer_context(self):
         """
@@ -71,8 +93,42 @@ class ProjectListView(
         # send_welcome_email(proj)
 
 
+class ProjectReadView(generics.GenericAPIView):
+    """
+    API view to mark all comments of all tasks in a project as read.
+    """
+
+    permission_classes = [IsAuthenticated, IsProjectMember]
+    queryset = Project.objects.existing()
+    query_budget = {"POST": 6}
+
+    def post(self, request, project_id, *args, **kwargs):
+        """
+        Handles POST requests to move the user's read marker of every task
+        having unread comments to its newest comment.
+        """
+        task_ids = list(
+            Task.objects.existing()
+            .filter(project_id=project_id)
+            .filter(has_unread_comments(request.user))
+            .values_list("id", flat=True)
+        )
+        last_read_at = TaskReadMarker.objects.mark_read(request.user, task_ids)
+        return response.Response(
+            {
+                "project": project_id,
+                "tasks_marked_read": len(task_ids),
+                "last_read_at": last_read_at,
+            },
+            status=200,
+        )
+
+
 class InviteProjectMemberListView(
-    generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin
+    EagerLoadingViewMixin,
+    generics.GenericAPIView,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
 ):
     """
     API view to list all projects.
@@ -80,7 +136,9 @@ class InviteProjectMemberListView(
 
     permission_classes = [IsAuthenticated]
     serializer_class = ProjectInvitationSerializer
+    pagination_class = KeysetCursorPagination
     queryset = ProjectInvitation.objects.all()
+    query_budget = {"GET": 1, "POST": 5}
 
     def get_serializer_context(self):
         """
@@ -117,12 +175,7 @@ class InviteProjectMemberListView(
         Handles POST requests to create a new project.
         """
         # Check if the user is already member of the project
-        existing_membership_qs = ProjectMembership.objects.filter(
-            user_id=request.data["user"],
-            project_id=request.data["project"],
-            status=ProjectMembership.MembershipStatus.ACTIVE,
-        )
-        if existing_membership_qs.exists():
+        if is_project_member(request.data["user"], request.data["project"]):
             raise exceptions.ValidationError(
                 {"error": ["User is already a member of this project."]}
             )
@@ -143,16 +196,9 @@ class InviteProjectMemberListView(
             "role" in request.data
             and request.data["role"] == ProjectMembership.ProjectRole.ADMIN
         ):
-            membership: ProjectMembership = (
-                request.user.memberships.filter(
-                    project__id=request.data["project"],
-                    status=ProjectMembership.MembershipStatus.ACTIVE,
-                )
-                .only("role", "user_id")
-                .first()
-            )
-            if membership:
-                if membership.role == ProjectMembership.ProjectRole.ADMIN:
+            role = get_project_role(request.user.id, request.data["project"])
+            if role:
+                if role == ProjectMembership.ProjectRole.ADMIN:
                     request.data["role"] = request.data["role"]
                 else:
                     raise exceptions.PermissionDenied(
@@ -162,7 +208,9 @@ class InviteProjectMemberListView(
         return self.create(request, *args, **kwargs)
 
 
-class InviteActionView(generics.GenericAPIView, mixins.CreateModelMixin):
+class InviteActionView(
+    EagerLoadingViewMixin, generics.GenericAPIView, mixins.CreateModelMixin
+):
     """
     API view to list all projects.
     """
@@ -170,6 +218,7 @@ class InviteActionView(generics.GenericAPIView, mixins.CreateModelMixin):
     permission_classes = [IsAuthenticated]
     serializer_class = ProjectInvitationSerializer
     queryset = ProjectInvitation.objects.all()
+    query_budget = {"POST": 7}
 
     def get_serializer_context(self):
         """
@@ -0,0 +1,306 @@
+"""
+Full-text index of tasks, comments and projects on SQLite FTS5.
+
+`search_index` is an FTS5 table of (title, body) whose rowid is the id of the
+`SearchDocument` describing the indexed object. Both are kept in sync with the
+source tables by triggers, so bulk updates and soft deletes done with
+`QuerySet.update` are indexed as well. Soft deleted objects are not indexed,
+comments of soft deleted tasks and objects of soft deleted projects are
+filtered out when searching.
+"""
+
+import re
+import uuid
+
+from django.conf import settings
+from django.db import connection
+
+from apps.v1.projects.models import ProjectMembership
+
+FTS_TABLE = "search_index"
+DOCUMENT_TABLE = "search_searchdocument"
+
+# Column weights of bm25(), a match in a title ranks above one in a body
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# Indexed text of each kind of document, `{row}` is the source row
+SOURCES = {
+    "task": {
+        "table": "tasks_task",
+        "project_id": "{row}.project_id",
+        "task_id": "{row}.id",
+        "title": "{row}.title",
+        "body": "COALESCE({row}.description, '')",
+        "columns": ["title", "description", "deleted_at", "project_id"],
+    },
+    "comment": {
+        "table": "comments_comment",
+        "project_id": "(SELECT project_id FROM tasks_task WHERE id = {row}.task_id)",
+        "task_id": "{row}.task_id",
+        "title": "''",
+        "body": "COALESCE({row}.content, '')",
+        "columns": ["content", "deleted_at", "task_id"],
+    },
+    "project": {
+        "table": "projects_project",
+        "project_id": "{row}.id",
+        "task_id": "NULL",
+        "title": "{row}.title",
+        "body": "COALESCE({row}.description, '')",
+        "columns": ["title", "description", "deleted_at"],
+    },
+}
+
+
+def _source(kind, row):
+    return {
+        key: value.format(row=row) if isinstance(value, str) else value
+        for key, value in SOURCES[kind].items()
+    }
+
+
+def _index_row_sql(kind):
+    source = _source(kind, "NEW")
+    return f"""
+        INSERT INTO {DOCUMENT_TABLE} (kind, object_id, project_id, task_id)
+        SELECT '{kind}', NEW.id, {source["project_id"]}, {source["task_id"]}
+        WHERE NEW.deleted_at IS NULL;
+        INSERT INTO {FTS_TABLE} (rowid, title, body)
+        SELECT id, {source["title"]}, {source["body"]} FROM {DOCUMENT_TABLE}
+        WHERE kind = '{kind}' AND object_id = NEW.id;
+    """
+
+
+def _unindex_row_sql(kind):
+    return f"""
+        DELETE FROM {FTS_TABLE} WHERE rowid = (
+            SELECT id FROM {DOCUMENT_TABLE} WHERE kind = '{kind}' AND object_id = OLD.id
+        );
+        DELETE FROM {DOCUMENT_TABLE} WHERE kind = '{kind}' AND object_id = OLD.id;
+    """
+
+
+def trigger_statements(kind):
+    table = SOURCES[kind]["table"]
+    changed = " OR ".join(
+        f"OLD.{column} IS NOT NEW.{column}" for column in SOURCES[kind]["columns"]
+    )
+    # Comments follow their task to another project
+    moved = (
+        f"""
+        UPDATE {DOCUMENT_TABLE} SET project_id = NEW.project_id
+        WHERE kind = 'comment' AND task_id = NEW.id;
+        """
+        if kind == "task"
+        else ""
+    )
+    return [
+        f"""
+        CREATE TRIGGER search_{kind}_insert AFTER INSERT ON {table}
+        BEGIN {_index_row_sql(kind)} END
+        """,
+        # Saves which do not change the indexed text are skipped
+        f"""
+        CREATE TRIGGER search_{kind}_update AFTER UPDATE ON {table}
+        WHEN {changed}
+        BEGIN {_unindex_row_sql(kind)} {_index_row_sql(kind)} {moved} END
+        """,
+        f"""
+        CREATE TRIGGER search_{kind}_delete AFTER DELETE ON {table}
+        BEGIN {_unindex_row_sql(kind)} END
+        """,
+    ]
+
+
+def populate_statements(kind):
+    source = _source(kind, "src")
+    return [
+        f"""
+        INSERT INTO {DOCUMENT_TABLE} (kind, object_id, project_id, task_id)
+        SELECT '{kind}', src.id, {source["project_id"]}, {source["task_id"]}
+        FROM {source["table"]} src WHERE src.deleted_at IS NULL
+        """,
+        f"""
+        INSERT INTO {FTS_TABLE} (rowid, title, body)
+        SELECT doc.id, {source["title"]}, {source["body"]}
+        FROM {DOCUMENT_TABLE} doc JOIN {source["table"]} src ON src.id = doc.object_id
+        WHERE doc.kind = '{kind}'
+        """,
+    ]
+
+
+def create_fts_table(cursor):
+    # Prefix indexes speed up the prefix match of the last search term
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            title, body,
+            tokenize = 'porter unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """)
+
+
+def populate_index(cursor):
+    for kind in SOURCES:
+        for statement in populate_statements(kind):
+            cursor.execute(statement)
+
+
+def create_index(cursor):
+    """
+    Creates the FTS table and the triggers, and indexes the existing rows.
+    """
+    create_fts_table(cursor)
+    for kind in SOURCES:
+        for statement in trigger_statements(kind):
+            cursor.execute(statement)
+    populate_index(cursor)
+
+
+def drop_index(cursor):
+    for kind in SOURCES:
+        for operation in ("insert", "update", "delete"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS search_{kind}_{operation}")
+    cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    cursor.execute(f"DELETE FROM {DOCUMENT_TABLE}")
+
+
+def rebuild_index(cursor):
+    """
+    Re-indexes every row from scratch, to be run in a transaction.
+    Recreating the FTS table is much faster than deleting its rows.
+    """
+    cursor.execute(f"DROP TABLE {FTS_TABLE}")
+    cursor.execute(f"DELETE FROM {DOCUMENT_TABLE}")
+    create_fts_table(cursor)
+    populate_index(cursor)
+
+
+def optimize_index(cursor):
+    """
+    Merges the FTS b-trees into one, for the fastest queries after bulk changes.
+    """
+    cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+def match_expression(text):
+    """
+    FTS5 query matching all words of the text, the last one as a prefix so
+    results come up while typing. Words are quoted, FTS5 operators and column
+    filters in the text are matched literally. None when there is no word.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class SearchResults:
+    """
+    Ranked matches of an FTS5 query among the documents of the projects the
+    user is an active member of. Sliced like a queryset, each slice runs one
+    query returning dicts.
+
+    bm25() scores every row it ranks, which is slow for terms found in most
+    documents. Only the `SEARCH_RANK_WINDOW` most recently indexed matches
+    are ranked: they are found walking the index backwards by rowid, without
+    scoring, and bound the rowids of the ranked query.
+    """
+
+    def __init__(self, user, expression, kind=None, project_id=None):
+        self.user = user
+        self.expression = expression
+        self.kind = kind
+        self.project_id = project_id
+
+    def get_project_ids(self):
+        project_ids = ProjectMembership.objects.filter(
+            user=self.user,
+            status=ProjectMembership.MembershipStatus.ACTIVE,
+            project__deleted_at__isnull=True,
+        ).values_list("project_id", flat=True)
+        if self.project_id:
+            project_ids = project_ids.filter(project_id=self.project_id)
+        return [project_id.hex for project_id in project_ids]
+
+    def sql(self, project_ids):
+        # Projects are matched on the document, without a join per match
+        scope = f"""
+            {FTS_TABLE} MATCH %s
+            AND doc.project_id IN ({", ".join(["%s"] * len(project_ids))})
+        """
+        scope_params = [self.expression, *project_ids]
+        if self.kind:
+            scope += " AND doc.kind = %s"
+            scope_params.append(self.kind)
+
+        params = [TITLE_WEIGHT, BODY_WEIGHT, *scope_params]
+        window = ""
+        if settings.SEARCH_RANK_WINDOW:
+            window = f"""
+                AND {FTS_TABLE}.rowid >= (
+                    SELECT min(rowid) FROM (
+                        SELECT {FTS_TABLE}.rowid AS rowid
+                        FROM {FTS_TABLE}
+                        JOIN {DOCUMENT_TABLE} doc ON doc.id = {FTS_TABLE}.rowid
+                        WHERE {scope}
+                        ORDER BY {FTS_TABLE}.rowid DESC
+                        LIMIT %s
+                    )
+                )
+            """
+            params += [*scope_params, settings.SEARCH_RANK_WINDOW]
+
+        sql = f"""
+            SELECT
+                doc.kind,
+                doc.object_id,
+                doc.project_id,
+                doc.task_id,
+                CASE doc.kind WHEN 'comment' THEN task.title ELSE {FTS_TABLE}.title END,
+                snippet({FTS_TABLE}, -1, '**', '**', '…', 16),
+                bm25({FTS_TABLE}, %s, %s) AS score
+            FROM {FTS_TABLE}
+            JOIN {DOCUMENT_TABLE} doc ON doc.id = {FTS_TABLE}.rowid
+            LEFT JOIN tasks_task task ON task.id = doc.task_id
+            WHERE {scope}
+                AND (doc.task_id IS NULL OR task.deleted_at IS NULL)
+                {window}
+            ORDER BY score, doc.id
+        """
+        return sql, params
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("Search results only support slicing")
+        start = key.start or 0
+        project_ids = self.get_project_ids()
+        if not project_ids:
+            return []
+        sql, params = self.sql(project_ids)
+        if key.stop is None:
+            sql += " LIMIT -1 OFFSET %s"
+            params.append(start)
+        else:
+            sql += " LIMIT %s OFFSET %s"
+            params.extend([max(key.stop - start, 0), start])
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {
+                "type": kind,
+                "id": uuid.UUID(object_id),
+                "project_id": uuid.UUID(project_id),
+                "task_id": uuid.UUID(task_id) if task_id else None,
+                "title": title,
+                "snippet": snippet,
+                # bm25() is negative, the better the match the lower
+                "score": -score,
+            }
+            for kind, object_id, project_id, task_id, title, snippet, score in rows
+        ]
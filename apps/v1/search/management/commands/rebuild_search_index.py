@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.v1.search.index import optimize_index, rebuild_index
+from apps.v1.search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text search index of tasks, comments and projects. "
+        "The index is kept in sync by triggers, run after restoring data or to "
+        "repair the index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--optimize-only",
+            action="store_true",
+            help="Only merge the index b-trees, e.g. after large imports.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Full-text search requires SQLite FTS5.")
+
+        started_at = time.perf_counter()
+        with connection.cursor() as cursor:
+            if not options["optimize_only"]:
+                # Writes wait for the rebuild, searches see the previous index
+                with transaction.atomic():
+                    rebuild_index(cursor)
+                self.stdout.write(f"{SearchDocument.objects.count()} documents indexed")
+            optimize_index(cursor)
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(f"Search index rebuilt in {elapsed:.1f}s.")
+        )
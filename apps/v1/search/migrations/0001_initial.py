@@ -0,0 +1,244 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+# The index as of this migration, spelled out so that later changes to
+# apps.v1.search.index don't change what it creates: they ship as new migrations
+CREATE_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        title, body,
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER search_task_insert AFTER INSERT ON tasks_task
+    BEGIN
+        INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+        SELECT 'task', NEW.id, NEW.project_id, NEW.id
+        WHERE NEW.deleted_at IS NULL;
+        INSERT INTO search_index (rowid, title, body)
+        SELECT id, NEW.title, COALESCE(NEW.description, '') FROM search_searchdocument
+        WHERE kind = 'task' AND object_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_task_update AFTER UPDATE ON tasks_task
+    WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+        OR OLD.deleted_at IS NOT NEW.deleted_at OR OLD.project_id IS NOT NEW.project_id
+    BEGIN
+        DELETE FROM search_index WHERE rowid = (
+            SELECT id FROM search_searchdocument WHERE kind = 'task' AND object_id = OLD.id
+        );
+        DELETE FROM search_searchdocument WHERE kind = 'task' AND object_id = OLD.id;
+        INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+        SELECT 'task', NEW.id, NEW.project_id, NEW.id
+        WHERE NEW.deleted_at IS NULL;
+        INSERT INTO search_index (rowid, title, body)
+        SELECT id, NEW.title, COALESCE(NEW.description, '') FROM search_searchdocument
+        WHERE kind = 'task' AND object_id = NEW.id;
+        UPDATE search_searchdocument SET project_id = NEW.project_id
+        WHERE kind = 'comment' AND task_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_task_delete AFTER DELETE ON tasks_task
+    BEGIN
+        DELETE FROM search_index WHERE rowid = (
+            SELECT id FROM search_searchdocument WHERE kind = 'task' AND object_id = OLD.id
+        );
+        DELETE FROM search_searchdocument WHERE kind = 'task' AND object_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_comment_insert AFTER INSERT ON comments_comment
+    BEGIN
+        INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+        SELECT 'comment', NEW.id,
+            (SELECT project_id FROM tasks_task WHERE id = NEW.task_id), NEW.task_id
+        WHERE NEW.deleted_at IS NULL;
+        INSERT INTO search_index (rowid, title, body)
+        SELECT id, '', COALESCE(NEW.content, '') FROM search_searchdocument
+        WHERE kind = 'comment' AND object_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_comment_update AFTER UPDATE ON comments_comment
+    WHEN OLD.content IS NOT NEW.content OR OLD.deleted_at IS NOT NEW.deleted_at
+        OR OLD.task_id IS NOT NEW.task_id
+    BEGIN
+        DELETE FROM search_index WHERE rowid = (
+            SELECT id FROM search_searchdocument
+            WHERE kind = 'comment' AND object_id = OLD.id
+        );
+        DELETE FROM search_searchdocument WHERE kind = 'comment' AND object_id = OLD.id;
+        INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+        SELECT 'comment', NEW.id,
+            (SELECT project_id FROM tasks_task WHERE id = NEW.task_id), NEW.task_id
+        WHERE NEW.deleted_at IS NULL;
+        INSERT INTO search_index (rowid, title, body)
+        SELECT id, '', COALESCE(NEW.content, '') FROM search_searchdocument
+        WHERE kind = 'comment' AND object_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_comment_delete AFTER DELETE ON comments_comment
+    BEGIN
+        DELETE FROM search_index WHERE rowid = (
+            SELECT id FROM search_searchdocument
+            WHERE kind = 'comment' AND object_id = OLD.id
+        );
+        DELETE FROM search_searchdocument WHERE kind = 'comment' AND object_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_project_insert AFTER INSERT ON projects_project
+    BEGIN
+        INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+        SELECT 'project', NEW.id, NEW.id, NULL
+        WHERE NEW.deleted_at IS NULL;
+        INSERT INTO search_index (rowid, title, body)
+        SELECT id, NEW.title, COALESCE(NEW.description, '') FROM search_searchdocument
+        WHERE kind = 'project' AND object_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_project_update AFTER UPDATE ON projects_project
+    WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+        OR OLD.deleted_at IS NOT NEW.deleted_at
+    BEGIN
+        DELETE FROM search_index WHERE rowid = (
+            SELECT id FROM search_searchdocument
+            WHERE kind = 'project' AND object_id = OLD.id
+        );
+        DELETE FROM search_searchdocument WHERE kind = 'project' AND object_id = OLD.id;
+        INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+        SELECT 'project', NEW.id, NEW.id, NULL
+        WHERE NEW.deleted_at IS NULL;
+        INSERT INTO search_index (rowid, title, body)
+        SELECT id, NEW.title, COALESCE(NEW.description, '') FROM search_searchdocument
+        WHERE kind = 'project' AND object_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER search_project_delete AFTER DELETE ON projects_project
+    BEGIN
+        DELETE FROM search_index WHERE rowid = (
+            SELECT id FROM search_searchdocument
+            WHERE kind = 'project' AND object_id = OLD.id
+        );
+        DELETE FROM search_searchdocument WHERE kind = 'project' AND object_id = OLD.id;
+    END
+    """,
+    # Existing rows
+    """
+    INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+    SELECT 'task', src.id, src.project_id, src.id
+    FROM tasks_task src WHERE src.deleted_at IS NULL
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body)
+    SELECT doc.id, src.title, COALESCE(src.description, '')
+    FROM search_searchdocument doc JOIN tasks_task src ON src.id = doc.object_id
+    WHERE doc.kind = 'task'
+    """,
+    """
+    INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+    SELECT 'comment', src.id,
+        (SELECT project_id FROM tasks_task WHERE id = src.task_id), src.task_id
+    FROM comments_comment src WHERE src.deleted_at IS NULL
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body)
+    SELECT doc.id, '', COALESCE(src.content, '')
+    FROM search_searchdocument doc JOIN comments_comment src ON src.id = doc.object_id
+    WHERE doc.kind = 'comment'
+    """,
+    """
+    INSERT INTO search_searchdocument (kind, object_id, project_id, task_id)
+    SELECT 'project', src.id, src.id, NULL
+    FROM projects_project src WHERE src.deleted_at IS NULL
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body)
+    SELECT doc.id, src.title, COALESCE(src.description, '')
+    FROM search_searchdocument doc JOIN projects_project src ON src.id = doc.object_id
+    WHERE doc.kind = 'project'
+    """,
+]
+
+DROP_INDEX_SQL = [
+    *(
+        f"DROP TRIGGER IF EXISTS search_{kind}_{operation}"
+        for kind in ("task", "comment", "project")
+        for operation in ("insert", "update", "delete")
+    ),
+    "DROP TABLE IF EXISTS search_index",
+    "DELETE FROM search_searchdocument",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite specific
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in CREATE_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("comments", "0012_async_markdown_rendering"),
+        ("projects", "0010_projectversion"),
+        ("tasks", "0005_async_markdown_rendering"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("task", "Task"),
+                            ("comment", "Comment"),
+                            ("project", "Project"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.UUIDField()),
+                ("project_id", models.UUIDField()),
+                ("task_id", models.UUIDField(null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["project_id"], name="search_sear_project_088028_idx"
+                    ),
+                    models.Index(
+                        fields=["task_id"], name="search_sear_task_id_0564c1_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id"), name="search_document_object_uniq"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
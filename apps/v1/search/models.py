@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    A task, comment or project in the full-text index, its id is the rowid of
+    the `search_index` FTS5 table holding the text (see `apps.v1.search.index`).
+    Rows are maintained by database triggers, not through the ORM.
+    """
+
+    class Kind(models.TextChoices):
+        TASK = "task", "Task"
+        COMMENT = "comment", "Comment"
+        PROJECT = "project", "Project"
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.UUIDField()
+    project_id = models.UUIDField()
+    task_id = models.UUIDField(null=True)  # Task of tasks and comments
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="search_document_object_uniq"
+            ),
+        ]
+        indexes = [
+            # Scoping matches to the caller's projects
+            models.Index(fields=["project_id"]),
+            # Moving the comments of a task to another project
+            models.Index(fields=["task_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
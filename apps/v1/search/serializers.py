@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from apps.v1.search.models import SearchDocument
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """
+    A match of the full-text search, the title of a comment is its task's title.
+    """
+
+    type = serializers.ChoiceField(choices=SearchDocument.Kind.choices)
+    id = serializers.UUIDField()
+    project_id = serializers.UUIDField()
+    task_id = serializers.UUIDField(allow_null=True)
+    title = serializers.CharField()
+    snippet = serializers.CharField()  # Matched words wrapped in **
+    score = serializers.FloatField()  # The higher the better
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the search.
+    """
+
+    q = serializers.CharField(max_length=500)
+    type = serializers.ChoiceField(choices=SearchDocument.Kind.choices, required=False)
+    project_id = serializers.UUIDField(required=False)
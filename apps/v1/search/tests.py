@@ -0,0 +1,200 @@
+import re
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.common.models import CustomUser
+from apps.v1.comments.models import Comment
+from apps.v1.projects.models import Project, ProjectMembership
+from apps.v1.search.index import SOURCES, match_expression, trigger_statements
+from apps.v1.search.models import SearchDocument
+from apps.v1.tasks.models import Task
+
+
+class MatchExpressionTestCase(TestCase):
+    def test_words_are_quoted_and_last_one_is_a_prefix(self):
+        self.assertEqual(match_expression("login cra"), '"login" "cra"*')
+
+    def test_operators_are_not_interpreted(self):
+        self.assertEqual(
+            match_expression('title:crash OR "x" NEAR(a'),
+            '"title" "crash" "OR" "x" "NEAR" "a"*',
+        )
+
+    def test_no_words(self):
+        self.assertIsNone(match_expression(' "* - '))
+
+
+class SearchIndexSchemaTestCase(TestCase):
+    def test_migrations_create_the_current_index(self):
+        # Changes to the index SQL need a migration
+        def normalize(sql):
+            return re.sub(r"\s+", "", sql)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                "AND name LIKE 'search_%'"
+            )
+            triggers = {name: normalize(sql) for name, sql in cursor.fetchall()}
+        expected = {
+            re.search(r"CREATE TRIGGER (\w+)", statement)[1]: normalize(statement)
+            for kind in SOURCES
+            for statement in trigger_statements(kind)
+        }
+        self.assertEqual(triggers, expected)
+
+
+class SearchIntegrationTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+        self.other_user = CustomUser.objects.create(
+            username="jane_doe", email="jane_doe@domain.com"
+        )
+        self.project = Project.objects.create(
+            title="Apollo", description="Launch the rocket"
+        )
+        self.other_project = Project.objects.create(title="Gemini")
+        ProjectMembership.objects.create(user=self.user, project=self.project)
+        ProjectMembership.objects.create(
+            user=self.other_user, project=self.other_project
+        )
+
+        self.task = Task.objects.create(
+            project=self.project,
+            title="Login crash",
+            description="The app crashes on the *login* page",
+            creator=self.user,
+        )
+        self.comment = Comment.objects.create(
+            task=self.task, author=self.user, content="Crash reproduced on Safari"
+        )
+        self.other_task = Task.objects.create(
+            project=self.other_project, title="Crash on export", creator=self.user
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = "/api/v1/search/"
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def result_ids(self, q, **params):
+        return [result["id"] for result in self.search(q, **params)["results"]]
+
+    def test_results_are_ranked_and_scoped_to_user_projects(self):
+        data = self.search("crash")
+
+        # Title matches first, tasks of other projects are not visible
+        self.assertEqual(
+            [(r["type"], r["id"]) for r in data["results"]],
+            [("task", str(self.task.id)), ("comment", str(self.comment.id))],
+        )
+        comment = data["results"][1]
+        self.assertEqual(comment["title"], "Login crash")
+        self.assertEqual(comment["task_id"], str(self.task.id))
+        self.assertEqual(comment["project_id"], str(self.project.id))
+        self.assertEqual(comment["snippet"], "**Crash** reproduced on Safari")
+        self.assertGreater(data["results"][0]["score"], comment["score"])
+
+    def test_stemming_and_prefix(self):
+        self.assertEqual(self.result_ids("crashing"), self.result_ids("crash"))
+        self.assertEqual(self.result_ids("Saf"), [str(self.comment.id)])
+        self.assertEqual(self.result_ids("rocket"), [str(self.project.id)])
+
+    def test_filters(self):
+        self.assertEqual(
+            self.result_ids("crash", type="comment"), [str(self.comment.id)]
+        )
+        self.assertEqual(
+            self.result_ids("crash", project_id=str(self.other_project.id)), []
+        )
+
+    def test_index_follows_changes(self):
+        self.task.title = "Logout freeze"
+        self.task.save()
+        self.assertEqual(self.result_ids("freeze"), [str(self.task.id)])
+        self.assertEqual(self.result_ids("login"), [str(self.task.id)])  # Description
+
+        # Comments move with their task
+        ProjectMembership.objects.create(user=self.user, project=self.other_project)
+        Task.objects.filter(pk=self.task.pk).update(project=self.other_project)
+        self.assertEqual(
+            self.result_ids("safari", project_id=str(self.other_project.id)),
+            [str(self.comment.id)],
+        )
+
+        self.comment.delete()
+        self.assertEqual(self.result_ids("safari"), [])
+        self.assertFalse(SearchDocument.objects.filter(kind="comment").exists())
+
+    def test_soft_deleted_objects_are_excluded(self):
+        Comment.objects.filter(pk=self.comment.pk).update(deleted_at=timezone.now())
+        self.assertEqual(self.result_ids("crash"), [str(self.task.id)])
+
+        # Comments of a soft deleted task are hidden, and come back with it
+        Comment.objects.filter(pk=self.comment.pk).update(deleted_at=None)
+        self.task.soft_delete()
+        self.assertEqual(self.result_ids("crash"), [])
+        Task.objects.filter(pk=self.task.pk).update(deleted_at=None)
+        self.assertEqual(len(self.result_ids("crash")), 2)
+
+        self.project.soft_delete()
+        self.assertEqual(self.result_ids("crash"), [])
+
+    def test_rank_window(self):
+        # Only the most recently indexed match is ranked
+        with override_settings(SEARCH_RANK_WINDOW=1):
+            self.assertEqual(self.result_ids("crash"), [str(self.comment.id)])
+        with override_settings(SEARCH_RANK_WINDOW=0):
+            self.assertEqual(len(self.result_ids("crash")), 2)
+
+    def test_inactive_membership(self):
+        ProjectMembership.objects.filter(user=self.user).update(
+            status=ProjectMembership.MembershipStatus.INACTIVE
+        )
+        self.assertEqual(self.result_ids("crash"), [])
+
+    def test_pagination(self):
+        for _ in range(3):
+            Comment.objects.create(task=self.task, author=self.user, content="crash")
+
+        data = self.search("crash", limit=2)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertNotIn("count", data)
+        self.assertIsNone(data["previous"])
+
+        seen = [r["id"] for r in data["results"]]
+        while data["next"]:
+            data = self.client.get(data["next"]).data
+            seen += [r["id"] for r in data["results"]]
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_invalid_query(self):
+        for params in [{}, {"q": "!!"}, {"q": "crash", "type": "user"}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_authentication_required(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url, {"q": "crash"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.result_ids("crash"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("5 documents indexed", out.getvalue())
+        self.assertEqual(len(self.result_ids("crash")), 2)
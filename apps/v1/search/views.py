@@ -0,0 +1,38 @@
+from rest_framework import exceptions, generics
+from rest_framework.permissions import IsAuthenticated
+
+from apps.common.pagination import UncountedLimitOffsetPagination
+from apps.v1.search.index import SearchResults, match_expression
+from apps.v1.search.serializers import SearchQuerySerializer, SearchResultSerializer
+
+
+class SearchView(generics.GenericAPIView):
+    """
+    API view to search tasks, comments and projects of the user's projects.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = SearchResultSerializer
+    pagination_class = UncountedLimitOffsetPagination
+    query_budget = {"GET": 2}
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handles GET requests, results are ranked by relevance.
+        Query parameters: `q` (required), `type` and `project_id`.
+        """
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        expression = match_expression(params.validated_data["q"])
+        if expression is None:
+            raise exceptions.ValidationError({"q": ["Enter at least one word."]})
+
+        results = SearchResults(
+            request.user,
+            expression,
+            kind=params.validated_data.get("type"),
+            project_id=params.validated_data.get("project_id"),
+        )
+        page = self.paginate_queryset(results)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.v1.tasks"
+
+    def ready(self):
+        from apps.v1.tasks import signals  # noqa: F401
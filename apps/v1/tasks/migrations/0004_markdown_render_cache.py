@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:42
+
+import apps.common.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0003_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="task",
+            name="description",
+            field=apps.common.fields.CachedMarkdownField(
+                blank=True, null=True, rendered_field="description_rendered"
+            ),
+        ),
+    ]
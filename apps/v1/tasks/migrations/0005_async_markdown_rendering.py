@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:44
+
+import markdownfield.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0004_markdown_render_cache"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="task",
+            name="description_rendered",
+            field=markdownfield.models.RenderedMarkdownField(null=True),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0010_projectversion"),
+        ("tasks", "0005_async_markdown_rendering"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_project_aedf62_idx",
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "deleted_at", "created_at", "id"],
+                name="tasks_task_project_d712d4_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "deleted_at", "updated_at", "id"],
+                name="tasks_task_project_057b43_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "deleted_at", "due_date", "id"],
+                name="tasks_task_project_3cfecb_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "deleted_at", "status", "due_date", "id"],
+                name="tasks_task_project_883325_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "deleted_at", "assignee", "status", "created_at"],
+                name="tasks_task_project_94d4ea_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "deleted_at", "creator", "created_at"],
+                name="tasks_task_project_efdcc3_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0010_projectversion"),
+        ("tasks", "0006_task_list_filter_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_project_d712d4_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_project_057b43_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_project_3cfecb_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_project_883325_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_project_94d4ea_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_project_efdcc3_idx",
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["project", "created_at", "id"],
+                name="tasks_task_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["project", "updated_at", "id"],
+                name="tasks_task_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["project", "due_date", "id"],
+                name="tasks_task_due_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["project", "status", "due_date", "id"],
+                name="tasks_task_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["project", "assignee", "created_at", "id"],
+                name="tasks_task_assignee_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["project", "creator", "created_at", "id"],
+                name="tasks_task_creator_idx",
+            ),
+        ),
+    ]
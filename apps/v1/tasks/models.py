@@ -1,8 +1,9 @@
 from django.db import models
 
-from markdownfield.models import MarkdownField, RenderedMarkdownField
+from markdownfield.models import RenderedMarkdownField
 from markdownfield.validators import VALIDATOR_STANDARD
 
+from apps.common.fields import CachedMarkdownField
 from apps.common.models import BaseModel, CustomUser
 from apps.v1.projects.models import Project
 from django.utils import timezone
@@ -39,13 +40,13 @@ class Task(BaseModel):
         related_name="assigned_tasks",
     )
     title = models.CharField(max_length=255)
-    description = MarkdownField(
-        rendered_field="text_rendered",
+    description = CachedMarkdownField(
+        rendered_field="description_rendered",
         validator=VALIDATOR_STANDARD,
         blank=True,
         null=True,
     )
-    description_rendered = RenderedMarkdownField()
+    description_rendered = RenderedMarkdownField(null=True)  # Null while rendering
     status = models.CharField(
         max_length=20, choices=TaskStatus.choices, default=TaskStatus.TODO
     )
@@ -53,6 +54,49 @@ class Task(BaseModel):
 
     objects = TaskModelManager()
 
+    class Meta:
+        # Task list of a project, one index per filter, each ending with the
+        # columns of the orderings it commonly comes with. Partial, soft deleted
+        # tasks are never listed.
+        indexes = [
+            # Cursor pagination on created_at (default ordering)
+            models.Index(
+                fields=["project", "created_at", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="tasks_task_created_idx",
+            ),
+            # updated_since and ordering on updated_at
+            models.Index(
+                fields=["project", "updated_at", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="tasks_task_updated_idx",
+            ),
+            # Due date range and ordering on due_date
+            models.Index(
+                fields=["project", "due_date", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="tasks_task_due_date_idx",
+            ),
+            # status, then due date range or ordering
+            models.Index(
+                fields=["project", "status", "due_date", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="tasks_task_status_idx",
+            ),
+            # assignee, status is checked on the few rows of an assignee
+            models.Index(
+                fields=["project", "assignee", "created_at", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="tasks_task_assignee_idx",
+            ),
+            # creator
+            models.Index(
+                fields=["project", "creator", "created_at", "id"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="tasks_task_creator_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.project.title})"
 
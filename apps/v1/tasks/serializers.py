@@ -1,21 +1,289 @@
+from django.conf import settings
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework import serializers
 
+from apps.common.constants import TASK_NOT_FOUND
+from apps.common.models import CustomUser
+from apps.common.serializers import (
+    DynamicFieldsMixin,
+    EagerLoadingMixin,
+    MarkdownRenderingMixin,
+)
+from apps.v1.comments.models import Comment
 from apps.v1.comments.serializers import CommentUpdateSerializer
+from apps.v1.projects.versioning import bump_project_versions
 from apps.v1.tasks.models import Task
 
+COMMENT_PREVIEW_LIMIT = 5
 
-class TaskSerializer(serializers.ModelSerializer):
+
+class TaskSerializer(
+    DynamicFieldsMixin,
+    EagerLoadingMixin,
+    MarkdownRenderingMixin,
+    serializers.ModelSerializer,
+):
     """
     Serializer specifically for Listing tasks.
+    Latest comments are included only when requested with `?expand=comments`.
     """
-    comments = CommentUpdateSerializer(many=True, read_only=True)
+
+    comments = CommentUpdateSerializer(
+        many=True, read_only=True, source="comment_preview"
+    )
     unread_comments = serializers.SerializerMethodField()
 
+    expandable_fields = ("comments",)
+    prefetch_related_fields = (
+        Prefetch(
+            "comments",
+            queryset=CommentUpdateSerializer.eager_load(
+                Comment.objects.existing().order_by("-created_at", "-id")
+            )[:COMMENT_PREVIEW_LIMIT],
+            to_attr="comment_preview",
+        ),
+    )
+
     def get_unread_comments(self, obj):
+        # Use the value precomputed by `annotate_unread_comments` when available
+        if hasattr(obj, "unread_comments_count"):
+            return obj.unread_comments_count
         user = self.context.get("user")
-        return obj.comments.exclude(seen_by=user).count()
+        return Comment.objects.unread_by(user).filter(task=obj).count()
+
+    @classmethod
+    def eager_load(cls, queryset, context=None):
+        """
+        prefetch data from DB to avoid N+1 queries.
+        """
+        queryset = super().eager_load(queryset, context)
+        user = (context or {}).get("user")
+        fields = cls.get_serialized_fields(context)
+        if user is not None and "unread_comments" in fields:
+            queryset = cls.annotate_unread_comments(queryset, user)
+        return queryset
+
+    @classmethod
+    def annotate_unread_comments(cls, queryset, user):
+        """
+        Annotate unread comment count for the given user on each task,
+        so that the whole page is computed in a single query.
+        """
+        unread_comments = (
+            Comment.objects.unread_by(user)
+            .filter(task=OuterRef("pk"))
+            .order_by()
+            .values("task")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return queryset.annotate(
+            unread_comments_count=Coalesce(Subquery(unread_comments), 0)
+        )
 
     class Meta:
         model = Task
         fields = "__all__"
         read_only_fields = ("created_at", "updated_at", "creator")
+
+
+class TaskFilterSerializer(serializers.Serializer):
+    """
+    Query parameters filtering and ordering the task list.
+    Each filter is served by an index of `Task.Meta.indexes`.
+    """
+
+    ORDERING_FIELDS = ("created_at", "updated_at", "due_date")
+
+    status = serializers.MultipleChoiceField(
+        choices=Task.TaskStatus.choices, required=False
+    )
+    assignee = serializers.UUIDField(required=False)
+    creator = serializers.UUIDField(required=False)
+    due_date_after = serializers.DateField(required=False)
+    due_date_before = serializers.DateField(required=False)
+    updated_since = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(
+        choices=[prefix + field for field in ORDERING_FIELDS for prefix in ("-", "")],
+        default="-created_at",
+    )
+
+
+class TaskBatchOperationSerializer(serializers.ModelSerializer):
+    """
+    One operation of a task batch: `create` a task, `update` fields of a task
+    or `move` a task to another status.
+    """
+
+    op = serializers.ChoiceField(choices=["create", "update", "move"])
+    id = serializers.UUIDField(required=False)
+    # Checked for the whole batch at once by TaskBatchSerializer
+    assignee = serializers.UUIDField(required=False, allow_null=True)
+
+    class Meta:
+        model = Task
+        fields = ("op", "id", "title", "description", "status", "assignee", "due_date")
+        extra_kwargs = {"title": {"required": False}}
+
+    def validate(self, attrs):
+        op = attrs["op"]
+        changed = set(attrs) - {"op", "id"}
+        if op == "create":
+            if "id" in attrs:
+                raise serializers.ValidationError({"id": ["Not allowed on create."]})
+            if "title" not in attrs:
+                raise serializers.ValidationError(
+                    {"title": ["This field is required."]}
+                )
+        elif "id" not in attrs:
+            raise serializers.ValidationError({"id": ["This field is required."]})
+        elif op == "move" and changed != {"status"}:
+            raise serializers.ValidationError(
+                {"status": ["A move only changes the status."]}
+            )
+        elif not changed:
+            raise serializers.ValidationError(["No field to update."])
+        return attrs
+
+
+class TaskEventSerializer(serializers.ModelSerializer):
+    """
+    Task in batch events, without the fields specific to the requesting user.
+    """
+
+    class Meta:
+        model = Task
+        exclude = ("deleted_at",)
+
+
+class TaskBatchSerializer(serializers.Serializer):
+    """
+    Task operations of a project applied together: validated as a whole with
+    one query per kind of lookup, then written with one `bulk_create` and one
+    `bulk_update`. Bulk queries send no signals, the project version is bumped
+    and deferred markdown renderings are scheduled here.
+    Needs the `project_id` and the `user` in its context.
+    """
+
+    operations = TaskBatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        if len(operations) > settings.TASK_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"At most {settings.TASK_BATCH_MAX_SIZE} operations per batch."
+            )
+        return operations
+
+    def validate(self, attrs):
+        user = self.context["user"]
+        operations = attrs["operations"]
+        self.tasks = (
+            Task.objects.existing()
+            .filter(
+                project_id=self.context["project_id"],
+                id__in=[
+                    operation["id"] for operation in operations if "id" in operation
+                ],
+            )
+            .select_for_update()
+            .in_bulk()
+        )
+        assignees = {
+            operation["assignee"]
+            for operation in operations
+            if operation.get("assignee")
+        }
+        if assignees:
+            assignees = set(
+                CustomUser.objects.filter(id__in=assignees).values_list("id", flat=True)
+            )
+
+        errors = {}
+        seen = set()
+        for i, operation in enumerate(operations):
+            error = {}
+            task_id = operation.get("id")
+            if task_id is not None:
+                task = self.tasks.get(task_id)
+                if task_id in seen:
+                    error["id"] = ["The task appears more than once in the batch."]
+                elif task is None:
+                    error["id"] = [TASK_NOT_FOUND]
+                elif user.id not in (task.creator_id, task.assignee_id):
+                    error["id"] = ["You are not allowed to update this task."]
+                seen.add(task_id)
+            assignee = operation.get("assignee")
+            if assignee and assignee not in assignees:
+                error["assignee"] = [
+                    f'Invalid pk "{assignee}" - object does not exist.'
+                ]
+            if error:
+                errors[i] = error
+        if errors:
+            raise serializers.ValidationError({"operations": errors})
+        return attrs
+
+    def create(self, validated_data):
+        project_id = self.context["project_id"]
+        now = timezone.now()
+        description = Task._meta.get_field("description")
+        created = []
+        updated = []
+        update_fields = {"updated_at"}
+        # Task and changed fields of each operation
+        self.changes = []
+        for operation in validated_data["operations"]:
+            values = {
+                name: value
+                for name, value in operation.items()
+                if name not in ("op", "id")
+            }
+            if "assignee" in values:
+                values["assignee_id"] = values.pop("assignee")
+
+            if operation["op"] == "create":
+                task = Task(
+                    project_id=project_id, creator=self.context["user"], **values
+                )
+                created.append(task)
+            else:
+                task = self.tasks[operation["id"]]
+                for name, value in values.items():
+                    setattr(task, name, value)
+                task.updated_at = now
+                if "description" in values:
+                    # Renders, or marks it pending as a save would
+                    description.pre_save(task, add=False)
+                    values["description_rendered"] = task.description_rendered
+                update_fields.update(Task._meta.get_field(name).name for name in values)
+                updated.append(task)
+            self.changes.append((operation["op"], task, values))
+
+        Task.objects.bulk_create(created)
+        if updated:
+            Task.objects.bulk_update(updated, sorted(update_fields))
+        bump_project_versions([project_id])
+        for task in created + updated:
+            description.schedule_rendering(Task, task)
+        return [task for _, task, _ in self.changes]
+
+    def get_event_data(self):
+        """
+        Compact `tasks_batch` event: created tasks without the user specific
+        fields, and only the changed fields of updated tasks.
+        """
+        created = []
+        updated = []
+        for op, task, values in self.changes:
+            if op == "create":
+                created.append(TaskEventSerializer(task).data)
+            else:
+                changes = {
+                    name.removesuffix("_id"): value for name, value in values.items()
+                }
+                updated.append(
+                    {"id": task.id, **changes, "updated_at": task.updated_at}
+                )
+        return {"created": created, "updated": updated}
@@ -0,0 +1,16 @@
+from django.dispatch import receiver
+
+from apps.common.fields import markdown_rendered
+from apps.common.outbox import publish_project_event
+from apps.v1.tasks.models import Task
+
+
+@receiver(markdown_rendered, sender=Task)
+def publish_task_rendered(sender, instance_pk, field, html, **kwargs):
+    # Follow-up of task_created/task_updated sent with a pending rendering
+    project_id = Task._base_manager.values_list("project_id", flat=True).get(
+        pk=instance_pk
+    )
+    publish_project_event(
+        project_id, "task_rendered", task_id=instance_pk, **{field.rendered_field: html}
+    )
@@ -1,9 +1,19 @@
+import datetime
+import json
+
+from django.test import override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import exceptions
 from django.test import TestCase
-from apps.common.models import CustomUser
+from apps.common.models import CustomUser, OutboxEvent
+from apps.common.serializers import LazyLoadingError
+from apps.v1.comments.models import Comment, TaskReadMarker
+from apps.v1.projects.membership import is_project_member
 from apps.v1.projects.models import Project, ProjectMembership
+from apps.v1.projects.versioning import get_project_version
 from apps.v1.tasks.models import Task
+from apps.v1.tasks.serializers import COMMENT_PREVIEW_LIMIT, TaskSerializer
 
 
 class TaskUnitTestCase(TestCase):
@@ -30,6 +40,15 @@ class TaskUnitTestCase(TestCase):
         self.task.delete()
         self.assertFalse(Task.objects.filter(title="Test task").exists())
 
+    def test_task_description_rendered(self):
+        self.assertEqual(self.task.description_rendered, "<p>This is a test task</p>")
+        self.task.description = "**Updated** <script>alert(1)</script>"
+        self.task.save()
+        self.assertEqual(
+            self.task.description_rendered,
+            "<p><strong>Updated</strong> &lt;script&gt;alert(1)&lt;/script&gt;</p>",
+        )
+
 
 class TaskIntegrationTestCase(TestCase):
     def setUp(self):
@@ -85,7 +104,7 @@ class TaskIntegrationTestCase(TestCase):
 
         response = self.client.get("/api/v1/projects/{}/tasks/".format(self.proj1.id))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_task_update(self):
         task = self.client.post(
@@ -140,3 +159,430 @@ class TaskIntegrationTestCase(TestCase):
 
         # Object should be available even after deletion
         self.assertTrue(Task.objects.all().filter(id=task_id))
+
+    def test_task_list_unread_comments(self):
+        task = Task.objects.create(
+            title="Test", description="Test task", project=self.proj1
+        )
+        seen = Comment.objects.create(task=task, author=self.user2, content="Seen")
+        TaskReadMarker.objects.mark_read(self.user1, [task.id], seen.created_at)
+        Comment.objects.create(task=task, author=self.user2, content="Unseen")
+
+        response = self.client.get("/api/v1/projects/{}/tasks/".format(self.proj1.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["unread_comments"], 1)
+
+    def test_task_list_eager_loading(self):
+        for i in range(5):
+            task = Task.objects.create(
+                title=f"Test {i}", description="Test task", project=self.proj1
+            )
+            for j in range(COMMENT_PREVIEW_LIMIT + 1):
+                Comment.objects.create(task=task, author=self.user2, content="Comment")
+
+        url = "/api/v1/projects/{}/tasks/".format(self.proj1.id)
+        # Warm up the membership cache
+        self.assertTrue(is_project_member(self.user1.id, self.proj1.id))
+
+        # version probe + tasks with annotated unread counts, comments are not expanded
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertNotIn("comments", response.data["results"][0])
+
+        # version probe + tasks + prefetched comment previews
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"expand": "comments"})
+        self.assertEqual(
+            len(response.data["results"][0]["comments"]), COMMENT_PREVIEW_LIMIT
+        )
+
+    def test_task_list_sparse_fields(self):
+        Task.objects.create(title="Test", description="Test task", project=self.proj1)
+        # Warm up the membership cache
+        self.assertTrue(is_project_member(self.user1.id, self.proj1.id))
+
+        # unread counts are not computed when not requested
+        with self.assertNumQueries(2) as context:
+            response = self.client.get(
+                "/api/v1/projects/{}/tasks/".format(self.proj1.id),
+                {"fields": "id,title"},
+            )
+        self.assertNotIn("comments_comment", context.captured_queries[1]["sql"])
+        self.assertEqual(set(response.data["results"][0]), {"id", "title"})
+
+    def test_task_serializer_lazy_loading_guard(self):
+        task = Task.objects.create(
+            title="Test", description="Test task", project=self.proj1
+        )
+        serializer = TaskSerializer(task, context={"forbid_lazy_loading": True})
+        with self.assertRaises(LazyLoadingError):
+            serializer.data
+
+    def test_task_list_cursor_pagination(self):
+        for i in range(5):
+            Task.objects.create(
+                title=f"Test {i}", description="Test task", project=self.proj1
+            )
+
+        titles = []
+        url = "/api/v1/projects/{}/tasks/?page_size=2".format(self.proj1.id)
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles += [task["title"] for task in response.data["results"]]
+            url = response.data["next"]
+
+        # Newest first, every task exactly once
+        self.assertEqual(titles, [f"Test {i}" for i in reversed(range(5))])
+
+    def test_task_list_excludes_soft_deleted(self):
+        task = Task.objects.create(title="Deleted", project=self.proj1)
+        task.soft_delete()
+
+        response = self.client.get("/api/v1/projects/{}/tasks/".format(self.proj1.id))
+        self.assertEqual(response.data["results"], [])
+
+    def test_task_list_filters(self):
+        now = timezone.now()
+        done = Task.objects.create(
+            title="Done",
+            project=self.proj1,
+            status="DONE",
+            assignee=self.user1,
+            due_date=datetime.date(2026, 1, 10),
+        )
+        Task.objects.create(
+            title="Todo",
+            project=self.proj1,
+            creator=self.user2,
+            due_date=datetime.date(2026, 2, 10),
+        )
+        Task.objects.create(
+            title="In progress", project=self.proj1, status="IN_PROGRESS"
+        )
+        Task.objects.filter(pk=done.pk).update(
+            updated_at=now - datetime.timedelta(days=2)
+        )
+
+        url = "/api/v1/projects/{}/tasks/".format(self.proj1.id)
+
+        def titles(params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            return sorted(task["title"] for task in response.data["results"])
+
+        self.assertEqual(titles({"status": ["DONE", "TODO"]}), ["Done", "Todo"])
+        self.assertEqual(titles({"assignee": self.user1.id}), ["Done"])
+        self.assertEqual(titles({"creator": self.user2.id}), ["Todo"])
+        self.assertEqual(titles({"due_date_after": "2026-01-10"}), ["Done", "Todo"])
+        self.assertEqual(
+            titles({"due_date_after": "2026-01-11", "due_date_before": "2026-02-10"}),
+            ["Todo"],
+        )
+        self.assertEqual(
+            titles({"updated_since": (now - datetime.timedelta(days=1)).isoformat()}),
+            ["In progress", "Todo"],
+        )
+
+        for params in [
+            {"status": "CLOSED"},
+            {"assignee": "me"},
+            {"due_date_after": "tomorrow"},
+            {"ordering": "title"},
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_task_list_ordering_pagination(self):
+        # Equal and null due dates are paginated by id
+        due_dates = [None, None, datetime.date(2026, 1, 1), None]
+        due_dates += [datetime.date(2026, 1, 2)] * 3 + [datetime.date(2026, 1, 3)]
+        for i, due_date in enumerate(due_dates):
+            Task.objects.create(
+                title=f"Test {i}", project=self.proj1, due_date=due_date
+            )
+        expected = sorted(
+            Task.objects.filter(project=self.proj1),
+            key=lambda task: (task.due_date is not None, task.due_date, task.id),
+        )
+
+        for ordering, tasks in (("due_date", expected), ("-due_date", expected[::-1])):
+            url = "/api/v1/projects/{}/tasks/?page_size=3&ordering={}".format(
+                self.proj1.id, ordering
+            )
+            pages = []
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                pages.append(response.data)
+                url = response.data["next"]
+            ids = [task["id"] for page in pages for task in page["results"]]
+            self.assertEqual(ids, [str(task.id) for task in tasks])
+
+            # and back
+            url = pages[-1]["previous"]
+            ids = [task["id"] for task in pages[-1]["results"]]
+            while url:
+                response = self.client.get(url)
+                ids = [task["id"] for task in response.data["results"]] + ids
+                url = response.data["previous"]
+            self.assertEqual(ids, [str(task.id) for task in tasks])
+
+        response = self.client.get(
+            "/api/v1/projects/{}/tasks/".format(self.proj1.id), {"cursor": "bad"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_task_list_conditional_get(self):
+        task = Task.objects.create(
+            title="Test", description="Test task", project=self.proj1
+        )
+        url = "/api/v1/projects/{}/tasks/".format(self.proj1.id)
+        # Warm up the membership cache
+        self.assertTrue(is_project_member(self.user1.id, self.proj1.id))
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        # Only the version probe runs
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # Any change in the project gives a new ETag
+        Comment.objects.create(task=task, author=self.user2, content="Comment")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # including the user's read markers
+        etag = response["ETag"]
+        TaskReadMarker.objects.mark_read(self.user1, [task.id])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # ETags are per user
+        self.client.force_authenticate(user=self.user2)
+        ProjectMembership.objects.create(user=self.user2, project=self.proj1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_update_if_match(self):
+        task = Task.objects.create(
+            title="Test",
+            description="Test task",
+            project=self.proj1,
+            creator=self.user1,
+        )
+        url = "/api/v1/projects/{}/tasks/{}/".format(self.proj1.id, task.id)
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.patch(url, {"title": "Updated"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+        # Stale ETag
+        response = self.client.patch(url, {"title": "Lost"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Updated")
+
+    def test_task_update_if_match_after_unrelated_change(self):
+        task, other = [
+            Task.objects.create(
+                title=title, description=title, project=self.proj1, creator=self.user1
+            )
+            for title in ("Test", "Other")
+        ]
+        url = "/api/v1/projects/{}/tasks/{}/".format(self.proj1.id, task.id)
+        etag = self.client.get(url)["ETag"]
+
+        # Changes elsewhere in the project refresh the GET, not the task
+        other.title = "Updated other"
+        other.save()
+        Comment.objects.create(task=other, author=self.user2, content="Comment")
+        TaskReadMarker.objects.mark_read(self.user1, [task.id, other.id])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        response = self.client.patch(url, {"title": "Updated"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Updated")
+
+    def test_task_list_response_cache(self):
+        task = Task.objects.create(
+            title="Test", description="Test task", project=self.proj1
+        )
+        url = "/api/v1/projects/{}/tasks/".format(self.proj1.id)
+        # Warm up the membership cache
+        self.assertTrue(is_project_member(self.user1.id, self.proj1.id))
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        # Only the version probe runs
+        with self.assertNumQueries(1):
+            cached = self.client.get(url)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+        # Writes bump the project version
+        task.title = "Updated"
+        task.save()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["title"], "Updated")
+
+        # Other users don't share entries
+        ProjectMembership.objects.create(user=self.user2, project=self.proj1)
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+
+class TaskBatchTestCase(TestCase):
+    def setUp(self):
+        self.user1 = CustomUser.objects.create(
+            username="jon_doe", email="jon_doe@domain.com"
+        )
+        self.user2 = CustomUser.objects.create(
+            username="jon_doe2", email="jon_doe2@domain.com"
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+        self.proj1 = Project.objects.create(title="Test project 1")
+        ProjectMembership.objects.create(user=self.user1, project=self.proj1)
+        ProjectMembership.objects.create(user=self.user2, project=self.proj1)
+        self.url = "/api/v1/projects/{}/tasks/batch/".format(self.proj1.id)
+
+        self.task1 = Task.objects.create(
+            title="Task 1", description="Task", project=self.proj1, creator=self.user1
+        )
+        self.task2 = Task.objects.create(
+            title="Task 2", project=self.proj1, creator=self.user2, assignee=self.user1
+        )
+
+    def post(self, operations):
+        return self.client.post(self.url, {"operations": operations}, format="json")
+
+    def test_batch_applies_operations(self):
+        version = get_project_version(self.proj1.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(
+                [
+                    {"op": "create", "title": "New", "description": "**New**"},
+                    {
+                        "op": "update",
+                        "id": str(self.task1.id),
+                        "description": "*Updated*",
+                        "assignee": str(self.user2.id),
+                    },
+                    {"op": "move", "id": str(self.task2.id), "status": "DONE"},
+                ]
+            )
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual(
+            [task["title"] for task in results], ["New", "Task 1", "Task 2"]
+        )
+        self.assertEqual(
+            results[0]["description_rendered"], "<p><strong>New</strong></p>"
+        )
+        self.assertEqual(results[0]["creator"], self.user1.id)
+
+        self.task1.refresh_from_db()
+        self.assertEqual(self.task1.description_rendered, "<p><em>Updated</em></p>")
+        self.assertEqual(self.task1.assignee, self.user2)
+        self.assertGreater(self.task1.updated_at, self.task1.created_at)
+        self.assertEqual(Task.objects.get(pk=self.task2.pk).status, "DONE")
+        self.assertGreater(get_project_version(self.proj1.id), version)
+
+        # One compact event for the whole batch
+        event = json.loads(OutboxEvent.objects.get().frame)
+        self.assertEqual(event["type"], "tasks_batch")
+        self.assertEqual(event["created"][0]["title"], "New")
+        self.assertEqual(
+            set(event["updated"][0]),
+            {"id", "description", "description_rendered", "assignee", "updated_at"},
+        )
+        self.assertEqual(set(event["updated"][1]), {"id", "status", "updated_at"})
+
+    def test_batch_is_validated_as_a_whole(self):
+        other_task = Task.objects.create(
+            title="Other", project=Project.objects.create(title="Other")
+        )
+        task3 = Task.objects.create(
+            title="Task 3", project=self.proj1, creator=self.user2
+        )
+        response = self.post(
+            [
+                {"op": "create", "title": "New"},
+                {"op": "create", "description": "No title"},
+                {"op": "move", "id": str(self.task1.id), "title": "Moved"},
+                {"op": "update", "id": str(other_task.id), "title": "Updated"},
+                {"op": "update", "id": str(task3.id), "title": "Updated"},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data["operations"]), {1, 2})
+
+        response = self.post(
+            [
+                {"op": "create", "title": "New", "assignee": str(other_task.id)},
+                {"op": "update", "id": str(other_task.id), "title": "Updated"},
+                {"op": "update", "id": str(task3.id), "title": "Updated"},
+                {"op": "update", "id": str(self.task1.id), "title": "Updated"},
+                {"op": "move", "id": str(self.task1.id), "status": "DONE"},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["operations"]
+        self.assertEqual(set(errors), {0, 1, 2, 4})
+        self.assertIn("assignee", errors[0])
+        self.assertEqual(errors[2]["id"], ["You are not allowed to update this task."])
+
+        self.assertFalse(Task.objects.filter(title__in=["New", "Updated"]).exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_batch_requires_membership(self):
+        self.client.force_authenticate(user=CustomUser.objects.create(username="x"))
+        response = self.post([{"op": "create", "title": "New"}])
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(TASK_BATCH_MAX_SIZE=2)
+    def test_batch_size_limit(self):
+        response = self.post([{"op": "create", "title": "New"}] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(title="New").exists())
+
+    def test_batch_queries_do_not_grow(self):
+        # Warm up the membership cache
+        self.assertTrue(is_project_member(self.user1.id, self.proj1.id))
+
+        def operations(count):
+            tasks = Task.objects.bulk_create(
+                Task(title="Task", project=self.proj1, creator=self.user1)
+                for _ in range(count)
+            )
+            return [
+                {"op": "create", "title": "New", "assignee": str(self.user2.id)}
+                for _ in range(count)
+            ] + [
+                {"op": "update", "id": str(task.id), "description": "*Updated*"}
+                for task in tasks
+            ]
+
+        # The first event of the project creates its sequence
+        self.post(operations(1))
+        for count in (1, 10):
+            batch = operations(count)
+            with self.assertNumQueries(13):
+                self.assertEqual(self.post(batch).status_code, 200)
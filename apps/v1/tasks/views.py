@@ -1,25 +1,57 @@
+from functools import cached_property
+
+from django.db import transaction
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import generics, mixins, response, exceptions
 
 from apps.common.constants import TASK_NOT_FOUND
+from apps.common.pagination import KeysetCursorPagination
+from apps.common.views import (
+    AsyncReadViewMixin,
+    EagerLoadingViewMixin,
+    ResponseCacheMixin,
+)
+from apps.v1.projects.permissions import IsProjectMember
+from apps.v1.projects.versioning import get_project_version
 from apps.v1.tasks.models import Task
-from apps.v1.tasks.serializers import TaskSerializer
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-
-channel_layer = get_channel_layer()
+from apps.v1.tasks.serializers import (
+    TaskBatchSerializer,
+    TaskFilterSerializer,
+    TaskSerializer,
+)
+from apps.common.outbox import publish_project_event
+
+# Query parameters of TaskFilterSerializer -> task lookups
+TASK_FILTER_LOOKUPS = {
+    "status": "status__in",
+    "assignee": "assignee_id",
+    "creator": "creator_id",
+    "due_date_after": "due_date__gte",
+    "due_date_before": "due_date__lte",
+    "updated_since": "updated_at__gte",
+}
 
 
 class TasksListView(
-    generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin
+    AsyncReadViewMixin,
+    ResponseCacheMixin,
+    EagerLoadingViewMixin,
+    generics.GenericAPIView,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
 ):
     """
     API view to list all projects.
     """
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
     serializer_class = TaskSerializer
-    queryset = Task.objects.all()
+    pagination_class = KeysetCursorPagination
+    queryset = Task.objects.existing()
+    query_budget = {"GET": 4, "POST": 17}
+
+    def get_version(self):
+        return get_project_version(self.kwargs["project_id"])
 
     def get_serializer_context(self):
         """
@@ -32,13 +64,32 @@ class TasksListView(
         context["user"] = self.request.user  # Add the requesting user to the context
         return context
 
+    @cached_property
+    def filters(self):
+        serializer = TaskFilterSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def get_ordering(self):
+        return self.filters["ordering"]
+
     def get_queryset(self):
         project_id = self.kwargs.get("project_id")
-        return self.queryset.filter(project_id=project_id)
+        queryset = super().get_queryset().filter(project_id=project_id)
+        lookups = {
+            lookup: self.filters[param]
+            for param, lookup in TASK_FILTER_LOOKUPS.items()
+            # Absent multiple choices are empty
+            if self.filters.get(param)
+        }
+        return queryset.filter(**lookups)
 
     def get(self, request, project_id, *args, **kwargs):
         """
         Handles GET requests to list all projects.
+        Filters: `status` (repeatable), `assignee`, `creator`, `due_date_after`,
+        `due_date_before` (inclusive) and `updated_since`.
+        Ordering: `ordering=[-]created_at|updated_at|due_date`, newest first by default.
         """
         # self.queryset = self.queryset.filter(project_id=project_id)
 
@@ -52,35 +103,59 @@ class TasksListView(
 
         return response
 
+    @transaction.atomic
     def perform_create(self, serializer):
         project_id = self.kwargs.get("project_id")
         task = serializer.save()
         serializer = TaskSerializer(task)
-        async_to_sync(channel_layer.group_send)(
-            f"project_{project_id}",
-            {
-                "type": "task_created",  # This matches the consumer method name
-                "task": serializer.data,  # The data to send to the consumer
-            },
-        )
+        publish_project_event(project_id, "task_created", task=serializer.data)
 
 
 class TasksDetailView(
-    generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin
+    AsyncReadViewMixin,
+    ResponseCacheMixin,
+    EagerLoadingViewMixin,
+    generics.GenericAPIView,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
 ):
     """
     API view to list all projects.
     """
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
     serializer_class = TaskSerializer
     queryset = Task.objects.existing()
+    query_budget = {"GET": 4, "PATCH": 17, "DELETE": 6}
+
+    def get_version(self):
+        return get_project_version(self.kwargs["project_id"])
+
+    def get_object_version(self):
+        return (
+            self.queryset.filter(
+                id=self.kwargs["task_id"], project_id=self.kwargs["project_id"]
+            )
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+
+    def get_serializer_context(self):
+        """
+        Override this method to pass custom context to the serializer.
+        In this case, we pass the requesting user.
+        """
+        context = (
+            super().get_serializer_context()
+        )  # Get the default context (request, view, format)
+        context["user"] = self.request.user  # Add the requesting user to the context
+        return context
 
     def get_object(self):
         task_id = self.kwargs.get("task_id")
         project_id = self.kwargs.get("project_id")
         try:
-            task = self.queryset.get(id=task_id, project_id=project_id)
+            task = self.get_queryset().get(id=task_id, project_id=project_id)
         except Task.DoesNotExist:
             raise exceptions.NotFound(TASK_NOT_FOUND)
         return task
@@ -109,13 +184,12 @@ class TasksDetailView(
 
         return self.partial_update(request, *args, **kwargs)
 
+    @transaction.atomic
     def perform_update(self, serializer):
         project_id = self.kwargs.get("project_id")
         task = serializer.save()
         serializer = TaskSerializer(task)
-        async_to_sync(channel_layer.group_send)(
-            f"project_{project_id}", {"type": "task_updated", "task": serializer.data}
-        )
+        publish_project_event(project_id, "task_updated", task=serializer.data)
 
     def delete(self, request, *args, **kwargs):
         """
@@ -139,3 +213,43 @@ class TasksDetailView(
         # Soft delete
         task.soft_delete()
         return response.Response(status=204)
+
+
+class TasksBatchView(generics.GenericAPIView):
+    """
+    API view to create, update and move tasks of a project in one request.
+    """
+
+    permission_classes = [IsAuthenticated, IsProjectMember]
+    serializer_class = TaskBatchSerializer
+    query_budget = {"POST": 17}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["user"] = self.request.user
+        context["project_id"] = self.kwargs["project_id"]
+        return context
+
+    @transaction.atomic
+    def post(self, request, project_id, *args, **kwargs):
+        """
+        Handles POST requests with `operations`, each one of:
+        `{"op": "create", "title": ..., ...}`,
+        `{"op": "update", "id": ..., <fields>}` or
+        `{"op": "move", "id": ..., "status": ...}`.
+        The batch is applied only when all operations are valid, errors are keyed
+        by operation index. Members receive a single `tasks_batch` event.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tasks = serializer.save()
+        publish_project_event(project_id, "tasks_batch", **serializer.get_event_data())
+
+        context = self.get_serializer_context()
+        loaded = TaskSerializer.eager_load(
+            Task.objects.filter(id__in=[task.id for task in tasks]), context
+        ).in_bulk()
+        results = TaskSerializer(
+            [loaded[task.id] for task in tasks], many=True, context=context
+        )
+        return response.Response({"results": results.data})
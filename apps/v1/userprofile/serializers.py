@@ -39,7 +39,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         user = CustomUser.objects.create_user(**validated_data)
         if password:
             user.set_password(password)
-            user.save()
+            user.save(update_fields=["password"])
         return user
 
     # Example of updating a user, handling password separately if provided
@@ -48,7 +48,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         user = super().update(instance, validated_data)
         if password:
             user.set_password(password)
-            user.save()
+            user.save(update_fields=["password"])
 
         return user
 
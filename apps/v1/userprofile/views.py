@@ -4,6 +4,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+from apps.common.views import AsyncReadViewMixin
+
 from apps.v1.userprofile.serializers import (
     CustomUserSerializer,
     ProfilePictureSerializer,
@@ -16,6 +18,7 @@ class UserCreateView(APIView):
     """
 
     permission_classes = [AllowAny]  # Allow anyone to register
+    query_budget = {"POST": 4}
 
     def post(self, request, *args, **kwargs):
         serializer = CustomUserSerializer(data=request.data)
@@ -25,13 +28,14 @@ class UserCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserProfileView(APIView):
+class UserProfileView(AsyncReadViewMixin, APIView):
     """
     API view to retrieve and update the authenticated user's profile.
     This view requires authentication and allows the user to view and update their profile information.
     """
 
     permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 0, "PATCH": 3}
 
     def get(self, request, *args, **kwargs):
         serializer = CustomUserSerializer(request.user)
@@ -53,6 +57,7 @@ class UserProfilePicutreView(APIView):
     """
 
     permission_classes = [IsAuthenticated]
+    query_budget = {"PATCH": 3}
 
     def patch(self, request, *args, **kwargs):
         serializer = ProfilePictureSerializer(
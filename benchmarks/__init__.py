@@ -0,0 +1,13 @@
+"""
+Benchmarks for TicketHub, run them as modules from the project root,
+e.g. `python -m benchmarks.ws_broadcast_cpu`.
+"""
+
+import os
+
+
+def setup_django():
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
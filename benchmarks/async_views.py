@@ -0,0 +1,134 @@
+"""
+Throughput of the hot read endpoints under daphne, sync views against async
+read views (see `apps.common.views.AsyncReadViewMixin`).
+
+The GET requests of the user profile, project list, task list and detail and
+comment list of the Postman collection are replayed as in
+`benchmarks.http_load`, against a daphne server started with
+`ASYNC_READ_VIEWS=False`, then against one started with `ASYNC_READ_VIEWS=True`
+for each `--threads` value of `DATABASE_EXECUTOR_THREADS`. Both use the
+configured database, seeded with `manage.py seed_load`.
+
+Results are written as JSON with `--output`, `--baseline` compares a run with
+a previous one, e.g. `benchmarks/baselines/async_views.json`.
+
+Usage:
+    python manage.py seed_load --users 1000 --projects 100 --tasks 20000 --comments 100000
+    python -m benchmarks.async_views --concurrency 50 --threads 1 4 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+
+from benchmarks.http_load import (
+    COLLECTION,
+    daphne_server,
+    free_port,
+    load_collection,
+    load_dataset,
+    print_results,
+    report,
+    run_load,
+)
+
+HOT_READS = (
+    r"^GET /api/v1/(users/me/"
+    r"|projects/"
+    r"|projects/\{project\}/tasks/"
+    r"|projects/\{project\}/tasks/\{task\}/"
+    r"|projects/\{project\}/tasks/\{task\}/comments/)$"
+)
+
+
+def measure(args, endpoints, dataset, env):
+    with daphne_server(free_port(), env) as url:
+        stats = asyncio.run(run_load(args, endpoints, dataset, url))
+    results, total = report(endpoints, stats, args.duration)
+    return {"env": env, "endpoints": results, "total": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="Workers, one user each"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[4],
+        help="DATABASE_EXECUTOR_THREADS values of the async runs",
+    )
+    parser.add_argument("--duration", type=float, default=20, help="Seconds measured")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds not measured")
+    parser.add_argument("--prefix", default="load", help="Prefix of the seeded users")
+    parser.add_argument("--password", default="tickethub")
+    parser.add_argument(
+        "--sample", type=int, default=200, help="Tasks and comments used per project"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to compare with")
+    args = parser.parse_args()
+
+    endpoints = [
+        endpoint
+        for endpoint in load_collection(COLLECTION)
+        if re.match(HOT_READS, endpoint.key)
+    ]
+    dataset = load_dataset(args, random.Random(args.seed))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["runs"]
+
+    runs = {}
+    configurations = [("sync", {"ASYNC_READ_VIEWS": "False"})] + [
+        (
+            f"async_{threads}_threads",
+            {"ASYNC_READ_VIEWS": "True", "DATABASE_EXECUTOR_THREADS": str(threads)},
+        )
+        for threads in args.threads
+    ]
+    for name, env in configurations:
+        run = measure(args, endpoints, dataset, env)
+        runs[name] = run
+        before = baseline.get(name)
+        print(f"\n{name}")
+        print_results(
+            run["endpoints"],
+            run["total"],
+            before and {**before["endpoints"], "total": before["total"]},
+        )
+
+    sync = runs["sync"]["total"]
+    for name, run in runs.items():
+        total = run["total"]
+        if name != "sync" and sync["rps"] and sync["p95_ms"] and total["p95_ms"]:
+            print(
+                f"{name} against sync: rps {total['rps'] / sync['rps'] - 1:+.0%} "
+                f"p95 {total['p95_ms'] / sync['p95_ms'] - 1:+.0%}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "cpus": os.cpu_count(),
+                    "concurrency": args.concurrency,
+                    "duration_s": args.duration,
+                    "runs": runs,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,734 @@
+"""
+HTTP load test replaying the bundled Postman collection against daphne.
+
+Every request of `tickethub.postman_collection.json` is an endpoint whose ids
+are filled in from the database: seeded users (see `manage.py seed_load`) log
+in through the token endpoint, then each worker replays the collection in a
+loop as one of them, on its own keep-alive connection, for `--duration`
+seconds. Objects created during the run (tasks, comments, invitations) are
+the ones updated, deleted or answered by the following requests, so the
+seeded data is mostly read. Latency percentiles and throughput are reported
+per endpoint, `--output` writes them as JSON to compare with `--baseline`
+between commits.
+
+A daphne server is started on the configured database, unless `--url` points
+to a running server, which must then use the same database.
+
+Usage:
+    python manage.py seed_load --users 1000 --projects 100 --tasks 20000 --comments 100000
+    python -m benchmarks.http_load --concurrency 50 --duration 30 --output load.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from benchmarks import setup_django
+
+setup_django()
+
+from apps.common.models import CustomUser  # noqa: E402
+from apps.v1.comments.models import Comment  # noqa: E402
+from apps.v1.projects.models import ProjectInvitation, ProjectMembership  # noqa: E402
+from apps.v1.tasks.models import Task  # noqa: E402
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+COLLECTION = BASE_DIR / "tickethub.postman_collection.json"
+TOKEN_PATH = "/api/token/"
+
+UUID_RE = re.compile(r"^[0-9a-f]{8}-(?:[0-9a-f]{4}-){3}[0-9a-f]{12}$")
+VARIABLE_RE = re.compile(r"{{(\$?\w+)}}")
+
+# Path segment followed by an id -> kind of the id
+PATH_IDS = {
+    "projects": "project",
+    "tasks": "task",
+    "comments": "comment",
+    "invite": "invite",
+}
+
+# Body key holding an id -> key of the request context replacing it, "id" is
+# replaced by the id of the object the request is about
+BODY_IDS = {
+    "project": "project",
+    "task": "task",
+    "user": "invitee",
+    "invited_by": "user",
+    "creator": "user",
+    "assignee": "user",
+    "author": "user",
+}
+
+PIXEL_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01"
+    b"\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+
+class Skip(Exception):
+    """
+    No object to send the request about, e.g. no pending invitation left.
+    """
+
+
+class Endpoint:
+    """
+    Request of the collection, ids of its path are replaced by `{kind}`.
+    """
+
+    def __init__(self, name, request, variables):
+        self.name = name
+        self.method = request["method"]
+        url = request["url"]
+        raw = url["raw"] if isinstance(url, dict) else url
+        raw = VARIABLE_RE.sub(
+            lambda match: (
+                "" if match[1] == "domain" else variables.get(match[1], match[0])
+            ),
+            raw,
+        )
+        path, _, self.query = raw.partition("?")
+
+        segments = path.split("/")
+        self.ids = []
+        for i, segment in enumerate(segments):
+            if UUID_RE.match(segment) and segments[i - 1] in PATH_IDS:
+                kind = PATH_IDS[segments[i - 1]]
+                segments[i] = f"{{{kind}}}"
+                self.ids.append(kind)
+        self.path = "/".join(segments)
+        self.key = f"{self.method} {self.path}"
+
+        # Kind of the object the request is about, or creates with a POST
+        collection = [segment for segment in segments if segment][-1]
+        self.target = self.ids[-1] if self.ids else None
+        self.creates = None
+        if self.method == "POST" and collection in PATH_IDS:
+            self.creates = PATH_IDS[collection]
+
+        body = request.get("body") or {}
+        self.json = None
+        self.form = None
+        # GET bodies of the collection are leftovers, ignored by the API
+        if self.method != "GET" and body.get("mode") == "raw" and body.get("raw"):
+            self.json = json.loads(body["raw"])
+        elif body.get("mode") == "formdata":
+            self.form = body["formdata"]
+
+    def needs(self, key):
+        return key in self.ids or (
+            self.json is not None
+            and any(BODY_IDS.get(name) == key for name in self.json)
+        )
+
+    def build(self, session, dataset):
+        """
+        Returns the (target, headers, body) of a request sent by the session
+        and its context, the ids it was filled in with.
+        """
+        context = dataset.context(session, self)
+        target = self.path.format(**context)
+        if self.query:
+            target += "?" + self.query
+
+        headers = {"Accept": "application/json"}
+        if session.access:
+            headers["Authorization"] = f"Bearer {session.access}"
+        body = b""
+        if self.json is not None:
+            data = {
+                name: dataset.fill(session, self, context, name, value)
+                for name, value in self.json.items()
+            }
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+        elif self.form is not None:
+            body, headers["Content-Type"] = multipart(self.form)
+        return (target, headers, body), context
+
+
+def multipart(fields):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for field in fields:
+        disposition = f'Content-Disposition: form-data; name="{field["key"]}"'
+        if field.get("type") == "file":
+            header = f'{disposition}; filename="load.gif"\r\nContent-Type: image/gif'
+            value = PIXEL_GIF
+        else:
+            header, value = disposition, field.get("value", "").encode()
+        parts.append(f"--{boundary}\r\n{header}\r\n\r\n".encode() + value + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def load_collection(path):
+    with open(path) as f:
+        collection = json.load(f)
+    variables = {
+        variable["key"]: variable["value"]
+        for variable in collection.get("variable", [])
+    }
+
+    def walk(items, folder):
+        for item in items:
+            name = f"{folder}/{item['name']}" if folder else item["name"]
+            if "item" in item:
+                yield from walk(item["item"], name)
+            else:
+                yield Endpoint(name, item["request"], variables)
+
+    return list(walk(collection["item"], ""))
+
+
+class Session:
+    """
+    Seeded user a worker sends its requests as.
+    """
+
+    def __init__(self, user_id, username):
+        self.user_id = user_id
+        self.username = username
+        self.access = None
+        self.refresh = None
+        self.projects = []
+        # Tasks and comments the user may update, created during the run
+        self.owned = {"task": [], "comment": []}
+        # Pending invitations received, as (invite, project)
+        self.invites = []
+
+
+class Dataset:
+    """
+    Ids of the seeded objects visible to the sessions, kept up to date with
+    the objects created and deleted by the run.
+    """
+
+    def __init__(self, sessions, rng, password):
+        self.sessions = sessions
+        self.rng = rng
+        self.password = password
+        self.project_tasks = defaultdict(list)
+        # (task, comment) of each project
+        self.project_comments = defaultdict(list)
+        # (user, project) of the pending invitations
+        self.pending = set()
+        self.run = uuid.uuid4().hex[:8]
+        self.counter = itertools.count()
+
+    def unique(self):
+        return f"http_{self.run}_{next(self.counter)}"
+
+    def choose_project(self, session, pool=None):
+        projects = [
+            project for project in session.projects if pool is None or pool.get(project)
+        ]
+        if not projects:
+            raise Skip
+        return self.rng.choice(projects)
+
+    def choose_invitee(self, session, project):
+        candidates = [
+            other.user_id
+            for other in self.sessions
+            if project not in other.projects
+            and (other.user_id, project) not in self.pending
+        ]
+        if not candidates:
+            raise Skip
+        return self.rng.choice(candidates)
+
+    def context(self, session, endpoint):
+        context = {"user": session.user_id}
+        if endpoint.target == "invite":
+            if not session.invites:
+                raise Skip
+            invite, project = session.invites.pop()
+            self.pending.discard((session.user_id, project))
+            context.update(invite=invite, project=project)
+        elif endpoint.method in ("PATCH", "DELETE") and endpoint.target in (
+            "task",
+            "comment",
+        ):
+            owned = session.owned[endpoint.target]
+            if not owned:
+                raise Skip
+            context.update(self.rng.choice(owned))
+        elif endpoint.needs("comment"):
+            project = self.choose_project(session, self.project_comments)
+            task, comment = self.rng.choice(self.project_comments[project])
+            context.update(project=project, task=task, comment=comment)
+        elif endpoint.needs("task"):
+            project = self.choose_project(session, self.project_tasks)
+            task = self.rng.choice(self.project_tasks[project])
+            context.update(project=project, task=task)
+        elif endpoint.needs("project"):
+            context["project"] = self.choose_project(session)
+        if endpoint.needs("invitee"):
+            context["invitee"] = self.choose_invitee(session, context["project"])
+        if endpoint.target:
+            context["id"] = context[endpoint.target]
+        return context
+
+    def fill(self, session, endpoint, context, name, value):
+        if not isinstance(value, str):
+            return value
+        if name == "id" and UUID_RE.match(value) and "id" in context:
+            return context["id"]
+        if name in BODY_IDS and UUID_RE.match(value):
+            return context[BODY_IDS[name]]
+        if name == "refresh":
+            return session.refresh
+        if endpoint.path == TOKEN_PATH and name in ("username", "password"):
+            return session.username if name == "username" else self.password
+        if name == "username":
+            return self.unique()
+        return VARIABLE_RE.sub(lambda match: self.variable(match[1]), value)
+
+    def variable(self, name):
+        # Dynamic variables of Postman used by the collection
+        if name == "$randomEmail":
+            return f"{self.unique()}@example.com"
+        if name == "$guid":
+            return str(uuid.uuid4())
+        if name == "$timestamp":
+            return str(int(time.time()))
+        if name == "$randomInt":
+            return str(self.rng.randint(0, 1000))
+        return f"{{{{{name}}}}}"
+
+    def record(self, session, endpoint, context, status, body):
+        """
+        Keeps track of the objects created and deleted by a request.
+        """
+        if not 200 <= status < 300:
+            return
+        if endpoint.creates:
+            created = json.loads(body)
+            self.add(session, endpoint.creates, created, context)
+        elif endpoint.method == "DELETE" and endpoint.target == "task":
+            project, task = context["project"], context["task"]
+            for kind, owned in session.owned.items():
+                session.owned[kind] = [item for item in owned if item["task"] != task]
+            with contextlib.suppress(ValueError):
+                self.project_tasks[project].remove(task)
+            self.project_comments[project] = [
+                pair for pair in self.project_comments[project] if pair[0] != task
+            ]
+
+    def add(self, session, kind, created, context):
+        object_id = str(created["id"])
+        if kind == "project":
+            session.projects.append(object_id)
+        elif kind == "task":
+            project = context["project"]
+            self.project_tasks[project].append(object_id)
+            session.owned["task"].append({"project": project, "task": object_id})
+        elif kind == "comment":
+            project, task = context["project"], context["task"]
+            self.project_comments[project].append((task, object_id))
+            session.owned["comment"].append(
+                {"project": project, "task": task, "comment": object_id}
+            )
+        elif kind == "invite":
+            user, project = str(created["user"]), str(created["project"])
+            self.pending.add((user, project))
+            for other in self.sessions:
+                if other.user_id == user:
+                    other.invites.append((object_id, project))
+
+
+def load_dataset(args, rng):
+    users = list(
+        CustomUser.objects.filter(
+            username__startswith=f"{args.prefix}_",
+            memberships__status=ProjectMembership.MembershipStatus.ACTIVE,
+        )
+        .distinct()
+        .order_by("username")
+        .values_list("id", "username")
+    )
+    if not users:
+        sys.exit(f"No users prefixed {args.prefix}_, run `manage.py seed_load` first.")
+    # Users with pending invitations first, to answer them
+    invited = set(
+        ProjectInvitation.objects.filter(
+            user__username__startswith=f"{args.prefix}_",
+            invitation_status=ProjectInvitation.InvitationStatus.PENDING,
+        ).values_list("user_id", flat=True)
+    )
+    rng.shuffle(users)
+    users.sort(key=lambda user: user[0] not in invited)
+    sessions = [
+        Session(str(user_id), username)
+        for user_id, username in users[: args.concurrency]
+    ]
+    dataset = Dataset(sessions, rng, args.password)
+    by_id = {session.user_id: session for session in sessions}
+
+    memberships = ProjectMembership.objects.filter(
+        user_id__in=by_id,
+        status=ProjectMembership.MembershipStatus.ACTIVE,
+        project__deleted_at__isnull=True,
+    ).values_list("user_id", "project_id")
+    for user_id, project_id in memberships:
+        by_id[str(user_id)].projects.append(str(project_id))
+
+    projects = {project for session in sessions for project in session.projects}
+    for project in projects:
+        tasks = list(
+            Task.objects.existing()
+            .filter(project_id=project)
+            .order_by("-created_at")
+            .values_list("id", flat=True)[: args.sample]
+        )
+        dataset.project_tasks[project] = [str(task) for task in tasks]
+        comments = (
+            Comment.objects.existing()
+            .filter(task_id__in=tasks)
+            .values_list("task_id", "id")[: args.sample]
+        )
+        dataset.project_comments[project] = [
+            (str(task), str(comment)) for task, comment in comments
+        ]
+
+    invitations = ProjectInvitation.objects.filter(
+        user_id__in=by_id,
+        invitation_status=ProjectInvitation.InvitationStatus.PENDING,
+    ).values_list("user_id", "id", "project_id")
+    for user_id, invite_id, project_id in invitations:
+        by_id[str(user_id)].invites.append((str(invite_id), str(project_id)))
+        dataset.pending.add((str(user_id), str(project_id)))
+    return dataset
+
+
+class Connection:
+    """
+    HTTP/1.1 keep-alive connection sending one request at a time.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, target, headers, body=b""):
+        reused = self.writer is not None
+        if not reused:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        try:
+            return await self.exchange(method, target, headers, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            # The server closed the idle connection, send it again
+            if not reused:
+                raise
+            return await self.request(method, target, headers, body)
+
+    async def exchange(self, method, target, headers, body):
+        lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+            *(f"{name}: {value}" for name, value in headers.items()),
+        ]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readuntil(b"\r\n")).split()[1])
+        response_headers = {}
+        while (line := await self.reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip().lower()
+
+        if status in (204, 304) or method == "HEAD":
+            content = b""
+        elif response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while size := int(
+                (await self.reader.readuntil(b"\r\n")).split(b";")[0], 16
+            ):
+                chunks.append((await self.reader.readexactly(size + 2))[:-2])
+            await self.reader.readuntil(b"\r\n")
+            content = b"".join(chunks)
+        elif "content-length" in response_headers:
+            content = await self.reader.readexactly(
+                int(response_headers["content-length"])
+            )
+        else:
+            content = await self.reader.read()
+            response_headers["connection"] = "close"
+
+        if response_headers.get("connection") == "close":
+            self.close()
+        return status, content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Stats:
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.skipped = Counter()
+
+    def add(self, endpoint, status, milliseconds):
+        self.timings[endpoint.key].append(milliseconds)
+        self.statuses[endpoint.key][str(status)] += 1
+
+
+async def login(connection, session, password):
+    body = json.dumps({"username": session.username, "password": password})
+    status, content = await connection.request(
+        "POST",
+        TOKEN_PATH,
+        {"Content-Type": "application/json"},
+        body.encode(),
+    )
+    if status != 200:
+        raise SystemExit(f"Login of {session.username} failed: {status} {content}")
+    tokens = json.loads(content)
+    session.access, session.refresh = tokens["access"], tokens["refresh"]
+
+
+async def worker(index, session, connection, endpoints, dataset, stats, times):
+    measured_from, until = times
+    loop = asyncio.get_running_loop()
+    for endpoint in itertools.islice(itertools.cycle(endpoints), index, None):
+        if loop.time() >= until:
+            break
+        measured = loop.time() >= measured_from
+        try:
+            request, context = endpoint.build(session, dataset)
+        except Skip:
+            if measured:
+                stats.skipped[endpoint.key] += 1
+            await asyncio.sleep(0)
+            continue
+
+        started = time.perf_counter()
+        try:
+            status, content = await connection.request(endpoint.method, *request)
+        except (OSError, asyncio.IncompleteReadError):
+            connection.close()
+            status, content = "error", b""
+        milliseconds = (time.perf_counter() - started) * 1000
+        if measured:
+            stats.add(endpoint, status, milliseconds)
+        if status != "error":
+            dataset.record(session, endpoint, context, status, content)
+    connection.close()
+
+
+def percentiles(timings):
+    if len(timings) < 2:
+        return timings * 3 or [None] * 3
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def summarize(name, timings, statuses, skipped, seconds):
+    p50, p95, p99 = percentiles(timings)
+    errors = sum(
+        count
+        for status, count in statuses.items()
+        if status == "error" or int(status) >= 400
+    )
+    return {
+        "name": name,
+        "requests": len(timings),
+        "errors": errors,
+        "skipped": skipped,
+        "statuses": dict(sorted(statuses.items())),
+        "rps": round(len(timings) / seconds, 2),
+        "p50_ms": p50 and round(p50, 2),
+        "p95_ms": p95 and round(p95, 2),
+        "p99_ms": p99 and round(p99, 2),
+    }
+
+
+def report(endpoints, stats, seconds):
+    results = {
+        endpoint.key: summarize(
+            endpoint.name,
+            stats.timings[endpoint.key],
+            stats.statuses[endpoint.key],
+            stats.skipped[endpoint.key],
+            seconds,
+        )
+        for endpoint in endpoints
+    }
+    total = summarize(
+        "total",
+        [ms for timings in stats.timings.values() for ms in timings],
+        sum(stats.statuses.values(), Counter()),
+        sum(stats.skipped.values()),
+        seconds,
+    )
+    return results, total
+
+
+def print_results(results, total, baseline=None):
+    for key, result in [*results.items(), ("total", total)]:
+        line = (
+            f"{key:<70} {result['rps']:>8.1f}/s "
+            f"p50={result['p50_ms'] or 0:>8.2f}ms "
+            f"p95={result['p95_ms'] or 0:>8.2f}ms "
+            f"p99={result['p99_ms'] or 0:>8.2f}ms "
+            f"errors={result['errors']} skipped={result['skipped']}"
+        )
+        before = (baseline or {}).get(key)
+        if before and before["rps"] and before["p95_ms"] and result["p95_ms"]:
+            line += (
+                f" | rps {result['rps'] / before['rps'] - 1:+.0%}"
+                f" p95 {result['p95_ms'] / before['p95_ms'] - 1:+.0%}"
+            )
+        print(line)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def daphne_server(port, env=None):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "daphne",
+            "-b",
+            "127.0.0.1",
+            "-p",
+            str(port),
+            "config.asgi:application",
+        ],
+        cwd=BASE_DIR,
+        env={"ALLOWED_HOSTS": "127.0.0.1", **os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise SystemExit(f"daphne exited with status {process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise SystemExit("daphne did not start in 30s")
+                time.sleep(0.2)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+async def run_load(args, endpoints, dataset, url):
+    parts = urlsplit(url)
+    address = (parts.hostname, parts.port or 80)
+    connections = [Connection(*address) for _ in dataset.sessions]
+    await asyncio.gather(
+        *(
+            login(connection, session, dataset.password)
+            for session, connection in zip(dataset.sessions, connections)
+        )
+    )
+
+    stats = Stats()
+    loop = asyncio.get_running_loop()
+    measured_from = loop.time() + args.warmup
+    times = (measured_from, measured_from + args.duration)
+    await asyncio.gather(
+        *(
+            worker(index, session, connection, endpoints, dataset, stats, times)
+            for index, (session, connection) in enumerate(
+                zip(dataset.sessions, connections)
+            )
+        )
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Server to load, a daphne is started if unset")
+    parser.add_argument("--collection", default=COLLECTION)
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="Workers, one user each"
+    )
+    parser.add_argument("--duration", type=float, default=30, help="Seconds measured")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds not measured")
+    parser.add_argument(
+        "--only", help="Replay only the requests whose name or key matches"
+    )
+    parser.add_argument("--prefix", default="load", help="Prefix of the seeded users")
+    parser.add_argument("--password", default="tickethub")
+    parser.add_argument(
+        "--sample", type=int, default=200, help="Tasks and comments used per project"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to compare with")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    endpoints = load_collection(args.collection)
+    if args.only:
+        endpoints = [
+            endpoint
+            for endpoint in endpoints
+            if re.search(args.only, endpoint.name) or re.search(args.only, endpoint.key)
+        ]
+    dataset = load_dataset(args, rng)
+
+    with contextlib.ExitStack() as stack:
+        url = args.url or stack.enter_context(daphne_server(free_port()))
+        stats = asyncio.run(run_load(args, endpoints, dataset, url))
+
+    results, total = report(endpoints, stats, args.duration)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            before = json.load(f)
+        baseline = {**before["endpoints"], "total": before["total"]}
+    print_results(results, total, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "concurrency": args.concurrency,
+                    "duration_s": args.duration,
+                    "endpoints": results,
+                    "total": total,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Full-text search latency and write overhead at scale (1M comments by default).
+
+Builds a throwaway SQLite database with the migrations applied, inserts tasks
+and comments of generated text (Zipf distributed vocabulary) through the
+search triggers, then times `SearchResults` queries of the endpoint for
+frequent, rare, prefix and multi-word terms, with the `SEARCH_RANK_WINDOW`
+and ranking all matches, against a `LIKE` scan of the comments as a baseline.
+
+Usage:
+    python -m benchmarks.search_fts --comments 1000000 --repeat 20
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+
+from benchmarks import setup_django
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.common.models import CustomUser  # noqa: E402
+from apps.v1.projects.models import Project, ProjectMembership  # noqa: E402
+from apps.v1.search.index import (  # noqa: E402
+    SearchResults,
+    match_expression,
+    optimize_index,
+)
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "de", "van", "tor", "lis"]
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def make_text(vocabulary, cum_weights, rng, words):
+    return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=words))
+
+
+def populate(args, rng):
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    # Zipf: the n-th most frequent word appears ~1/n as often as the first one
+    cum_weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1))
+    )
+
+    user = CustomUser.objects.create(username="bench", email="bench@example.com")
+    projects = Project.objects.bulk_create(
+        Project(
+            title=f"Project {i}",
+            description=make_text(vocabulary, cum_weights, rng, 20),
+        )
+        for i in range(args.projects)
+    )
+    # The user sees a fraction of the projects, as on a shared instance
+    ProjectMembership.objects.bulk_create(
+        ProjectMembership(user=user, project=project)
+        for project in projects[: max(len(projects) // 5, 1)]
+    )
+
+    now = timezone.now().isoformat()
+    task_ids = [uuid.uuid4().hex for _ in range(args.tasks)]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO tasks_task (id, created_at, updated_at, project_id, "
+            "creator_id, title, description, description_rendered, status) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, '', 'TODO')",
+            [
+                (
+                    task_id,
+                    now,
+                    now,
+                    rng.choice(projects).id.hex,
+                    user.id.hex,
+                    make_text(vocabulary, cum_weights, rng, 6),
+                    make_text(vocabulary, cum_weights, rng, 40),
+                )
+                for task_id in task_ids
+            ],
+        )
+
+    insert_seconds = 0
+    batch = 10_000
+    with connection.cursor() as cursor:
+        for offset in range(0, args.comments, batch):
+            rows = [
+                (
+                    uuid.uuid4().hex,
+                    now,
+                    now,
+                    rng.choice(task_ids),
+                    user.id.hex,
+                    make_text(vocabulary, cum_weights, rng, rng.randint(5, 60)),
+                )
+                for _ in range(min(batch, args.comments - offset))
+            ]
+            started = time.perf_counter()
+            with transaction.atomic():
+                cursor.executemany(
+                    "INSERT INTO comments_comment (id, created_at, updated_at, "
+                    "task_id, author_id, content, content_rendered) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, '')",
+                    rows,
+                )
+            insert_seconds += time.perf_counter() - started
+        optimize_index(cursor)
+
+    return user, vocabulary, insert_seconds
+
+
+def timed(function, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, timings
+
+
+def like_scan(word):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id FROM comments_comment WHERE content LIKE %s LIMIT 21",
+            [f"%{word}%"],
+        )
+        return cursor.fetchall()
+
+
+def run(args, rng):
+    call_command("migrate", verbosity=0)
+    user, vocabulary, insert_seconds = populate(args, rng)
+    print(
+        f"inserted {args.comments} comments in {insert_seconds:.1f}s "
+        f"({args.comments / insert_seconds:,.0f} rows/s with index triggers)"
+    )
+
+    queries = {
+        "frequent": vocabulary[0],
+        "common": vocabulary[100],
+        "rare": vocabulary[-1],
+        "prefix": vocabulary[50][:3],
+        "two_words": f"{vocabulary[10]} {vocabulary[200]}",
+    }
+    results = []
+    windows = (settings.SEARCH_RANK_WINDOW, 0)
+    for name, text in queries.items():
+        search = SearchResults(user, match_expression(text))
+        for window, (page, offset) in itertools.product(
+            windows, (("first", 0), ("deep", 200))
+        ):
+            settings.SEARCH_RANK_WINDOW = window
+            rows, timings = timed(lambda: search[offset : offset + 21], args.repeat)
+            result = {
+                "query": name,
+                "text": text,
+                "window": window,
+                "page": page,
+                "rows": len(rows),
+                "p50_ms": round(statistics.median(timings), 2),
+                "max_ms": round(max(timings), 2),
+            }
+            results.append(result)
+            print(
+                f"{name:>10} window={window or 'all':<5} {page:>5} "
+                f"rows={result['rows']:<3} "
+                f"p50={result['p50_ms']:>8.2f}ms max={result['max_ms']:>8.2f}ms"
+            )
+        settings.SEARCH_RANK_WINDOW = windows[0]
+
+    rows, timings = timed(lambda: like_scan(vocabulary[-1]), max(args.repeat // 4, 1))
+    results.append(
+        {
+            "query": "like_scan_rare",
+            "rows": len(rows),
+            "p50_ms": round(statistics.median(timings), 2),
+        }
+    )
+    print(f"LIKE scan (rare word) p50={statistics.median(timings):.2f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "comments": args.comments,
+                    "insert_s": insert_seconds,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--comments", type=int, default=1_000_000)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    directory = tempfile.mkdtemp()
+    settings.DATABASES["default"]["NAME"] = os.path.join(directory, "search.sqlite3")
+    try:
+        run(args, rng)
+    finally:
+        connection.close()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Mixed read and write load under daphne with the development and production
+SQLite profiles (`DATABASE_PROFILE`, see `config/settings.py`).
+
+The Postman collection, but sign up and log in, is replayed as in
+`benchmarks.http_load` against a daphne server started with each profile, on
+the configured database seeded with `manage.py seed_load`. The journal mode is
+stored in the database file, so it is reset to the rollback journal before the
+development run and restored at the end. Reported per profile: throughput, latency percentiles and server
+errors, mostly "database is locked" without the production profile.
+
+Results are written as JSON with `--output`, `--baseline` compares a run with
+a previous one, e.g. `benchmarks/baselines/sqlite_profile.json`.
+
+Usage:
+    python manage.py seed_load --users 1000 --projects 100 --tasks 20000 --comments 100000
+    python -m benchmarks.sqlite_profile --concurrency 50 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+
+from django.db import connection
+
+from benchmarks.http_load import (
+    COLLECTION,
+    daphne_server,
+    free_port,
+    load_collection,
+    load_dataset,
+    print_results,
+    report,
+    run_load,
+)
+
+PROFILES = ["development", "production"]
+
+# Sign up and log in hash the password, which takes most of the CPU time of a
+# run and hides the database
+EXCLUDE = r"^POST /api/(v1/users|token)/$"
+
+
+def journal_mode(mode=None):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode={mode}" if mode else "PRAGMA journal_mode")
+        current = cursor.fetchone()[0]
+    connection.close()
+    return current
+
+
+def measure(args, endpoints, dataset, profile):
+    with daphne_server(free_port(), {"DATABASE_PROFILE": profile}) as url:
+        stats = asyncio.run(run_load(args, endpoints, dataset, url))
+    results, total = report(endpoints, stats, args.duration)
+    total["server_errors"] = sum(
+        count
+        for status, count in total["statuses"].items()
+        if status != "error" and int(status) >= 500
+    )
+    return {"profile": profile, "endpoints": results, "total": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="Workers, one user each"
+    )
+    parser.add_argument("--duration", type=float, default=20, help="Seconds measured")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds not measured")
+    parser.add_argument(
+        "--exclude",
+        default=EXCLUDE,
+        help="Skip the requests whose key matches, password hashing by default",
+    )
+    parser.add_argument("--prefix", default="load", help="Prefix of the seeded users")
+    parser.add_argument("--password", default="tickethub")
+    parser.add_argument(
+        "--sample", type=int, default=200, help="Tasks and comments used per project"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to compare with")
+    args = parser.parse_args()
+
+    endpoints = [
+        endpoint
+        for endpoint in load_collection(COLLECTION)
+        if not (args.exclude and re.match(args.exclude, endpoint.key))
+    ]
+    dataset = load_dataset(args, random.Random(args.seed))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["runs"]
+
+    runs = {}
+    initial_mode = journal_mode()
+    try:
+        for profile in PROFILES:
+            if profile == "development":
+                journal_mode("DELETE")
+            run = measure(args, endpoints, dataset, profile)
+            runs[profile] = run
+            before = baseline.get(profile)
+            print(f"\n{profile}")
+            print_results(
+                run["endpoints"],
+                run["total"],
+                before and {**before["endpoints"], "total": before["total"]},
+            )
+    finally:
+        journal_mode(initial_mode)
+
+    print()
+    for profile, run in runs.items():
+        total = run["total"]
+        print(
+            f"{profile:<12} {total['rps']:>8.1f}/s p95={total['p95_ms'] or 0:>8.2f}ms "
+            f"p99={total['p99_ms'] or 0:>8.2f}ms server errors={total['server_errors']}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "cpus": os.cpu_count(),
+                    "concurrency": args.concurrency,
+                    "duration_s": args.duration,
+                    "runs": runs,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
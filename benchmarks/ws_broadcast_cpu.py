@@ -0,0 +1,150 @@
+"""
+CPU time per project event as a function of the number of subscribers.
+
+Compares the previous behaviour, where every ProjectConsumer JSON encodes the
+event itself, with encoding the event once at publish time
+(apps.common.broadcast). Events go through the in-memory channel layer to
+real ProjectConsumer instances whose WebSocket send is stubbed out.
+
+Usage:
+    python -m benchmarks.ws_broadcast_cpu --subscribers 1 10 100 500 --events 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from benchmarks import setup_django
+
+setup_django()
+
+from channels.layers import InMemoryChannelLayer  # noqa: E402
+from django.core.serializers.json import DjangoJSONEncoder  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.common.broadcast import (  # noqa: E402
+    encode_event,
+    frame_message,
+    project_group_name,
+)
+from apps.common.consumers import ProjectConsumer  # noqa: E402
+
+
+def make_task_payload():
+    """
+    Task as serialized by TaskSerializer with a comment preview.
+    """
+    now = timezone.now()
+    description = "## Steps\n\n" + "- reproduce the *issue* with `code`\n" * 60
+    return {
+        "id": str(uuid.uuid4()),
+        "project": uuid.uuid4(),
+        "creator": uuid.uuid4(),
+        "assignee": uuid.uuid4(),
+        "title": "Investigate slow task list",
+        "description": description,
+        "description_rendered": f"<p>{description}</p>",
+        "status": "IN_PROGRESS",
+        "due_date": now.date(),
+        "created_at": now,
+        "updated_at": now,
+        "deleted_at": None,
+        "unread_comments": 3,
+        "comments": [
+            {
+                "id": str(uuid.uuid4()),
+                "task": uuid.uuid4(),
+                "author": uuid.uuid4(),
+                "content": "Looks good to me " * 10,
+                "content_rendered": "<p>" + "Looks good to me " * 10 + "</p>",
+                "created_at": now,
+                "updated_at": now,
+                "deleted_at": None,
+            }
+            for _ in range(5)
+        ],
+    }
+
+
+async def legacy_task_updated(consumer, event):
+    # ProjectConsumer.task_updated before events were encoded at publish time
+    payload = {"type": "task_updated", "task": event["task"]}
+    await consumer.send(text_data=json.dumps(payload, cls=DjangoJSONEncoder))
+
+
+async def run(subscribers, events, encode_once, payload):
+    channel_layer = InMemoryChannelLayer(capacity=events + 1)
+    project_id = uuid.uuid4()
+    group = project_group_name(project_id)
+    sent_bytes = 0
+
+    async def send(text_data=None, bytes_data=None, close=False):
+        nonlocal sent_bytes
+        sent_bytes += len(text_data)
+
+    consumers = []
+    for _ in range(subscribers):
+        consumer = ProjectConsumer()
+        consumer.channel_layer = channel_layer
+        consumer.channel_name = await channel_layer.new_channel()
+        consumer.project_id = project_id
+        consumer.project_group_name = group
+        consumer.send = send
+        await channel_layer.group_add(group, consumer.channel_name)
+        consumers.append(consumer)
+
+    started = time.process_time()
+    for _ in range(events):
+        if encode_once:
+            message = frame_message(encode_event("task_updated", task=payload))
+        else:
+            message = {"type": "task_updated", "task": payload}
+        await channel_layer.group_send(group, message)
+
+        for consumer in consumers:
+            event = await channel_layer.receive(consumer.channel_name)
+            if encode_once:
+                await consumer.broadcast_frame(event)
+            else:
+                await legacy_task_updated(consumer, event)
+    cpu_seconds = time.process_time() - started
+
+    return {
+        "subscribers": subscribers,
+        "events": events,
+        "cpu_ms_per_event": round(cpu_seconds * 1000 / events, 3),
+        "cpu_us_per_delivery": round(cpu_seconds * 1e6 / (events * subscribers), 2),
+        "bytes_per_delivery": sent_bytes // (events * subscribers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--subscribers", type=int, nargs="+", default=[1, 10, 100, 500, 1000]
+    )
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    payload = make_task_payload()
+    results = []
+    for subscribers in args.subscribers:
+        for mode, encode_once in (("per_consumer", False), ("encode_once", True)):
+            result = asyncio.run(run(subscribers, args.events, encode_once, payload))
+            results.append({"mode": mode, **result})
+            print(
+                f"{mode:>12} subscribers={subscribers:<6} "
+                f"cpu/event={result['cpu_ms_per_event']:>9.3f}ms "
+                f"cpu/delivery={result['cpu_us_per_delivery']:>8.2f}us"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+WebSocket fan-out of project events by number of connected members.
+
+Opens N `WebsocketCommunicator` connections of distinct members to one project
+through `JwtAuthMiddlewareStack` and `ProjectConsumer`, on a throwaway SQLite
+database, then publishes task and comment events to the project group as the
+outbox does. Reported per N:
+
+- delivery latency, from the publish to the frame reaching each client, with
+  one event in flight (`latency`) and with `--window` events in flight
+  (`throughput`, which also gives events and deliveries per second)
+- Python memory allocated per connection while connecting (tracemalloc)
+
+Events go through the configured channel layer. The in-memory layer scans
+every channel on each receive, which dominates from ~1000 members on.
+
+Results are written as JSON with `--output`, `--baseline` compares a run with
+a previous one, e.g. `benchmarks/baselines/ws_fanout.json`.
+
+Usage:
+    python -m benchmarks.ws_fanout --members 10 100 1000 5000 --events 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from benchmarks import setup_django
+
+setup_django()
+
+from channels.layers import get_channel_layer  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from apps.common.broadcast import (  # noqa: E402
+    encode_event,
+    frame_message,
+    project_group_name,
+)
+from apps.common.models import CustomUser  # noqa: E402
+from apps.v1.projects import membership  # noqa: E402
+from apps.v1.projects.models import Project, ProjectMembership  # noqa: E402
+from benchmarks.ws_broadcast_cpu import make_task_payload  # noqa: E402
+from config.channels_auth import JwtAuthMiddlewareStack  # noqa: E402
+from config.routing import websocket_urlpatterns  # noqa: E402
+
+CONNECT_BATCH = 100
+
+# Sequence number of the measured events, encoded right after their type
+SEQ_RE = re.compile(r'{"type": "\w+", "seq": (\d+)')
+
+
+def make_comment_payload():
+    """
+    Comment as serialized by CommentSerializer.
+    """
+    now = timezone.now()
+    content = "Reproduced on *staging*, see the logs below.\n\n" * 3
+    return {
+        "id": str(uuid.uuid4()),
+        "task": uuid.uuid4(),
+        "author": uuid.uuid4(),
+        "content": content,
+        "content_rendered": f"<p>{content}</p>",
+        "created_at": now,
+        "updated_at": now,
+        "deleted_at": None,
+    }
+
+
+def create_members(project, count, offset):
+    users = CustomUser.objects.bulk_create(
+        CustomUser(username=f"member_{i}", email=f"member_{i}@example.com")
+        for i in range(offset, offset + count)
+    )
+    ProjectMembership.objects.bulk_create(
+        ProjectMembership(user=user, project=project) for user in users
+    )
+    return [str(AccessToken.for_user(user)) for user in users]
+
+
+class Deliveries:
+    """
+    Publish times of the events and arrival times of their frames.
+    """
+
+    def __init__(self, members):
+        self.members = members
+        self.published_at = {}
+        self.latencies = []
+        self.remaining = {}
+        self.delivered = {}
+
+    def publish(self, seq):
+        self.remaining[seq] = self.members
+        self.delivered[seq] = asyncio.Event()
+        self.published_at[seq] = time.perf_counter()
+
+    def receive(self, seq):
+        self.latencies.append(time.perf_counter() - self.published_at[seq])
+        self.remaining[seq] -= 1
+        if not self.remaining[seq]:
+            self.delivered[seq].set()
+
+
+async def receive_events(communicator, deliveries, events):
+    received = 0
+    while received < events:
+        frame = await communicator.receive_from(timeout=60)
+        # Clients are not measured, the frame is not decoded. Presence
+        # snapshots have no sequence number.
+        match = SEQ_RE.match(frame)
+        if match:
+            deliveries.receive(int(match[1]))
+            received += 1
+
+
+async def publish_events(project_id, payloads, deliveries, window, first_seq):
+    channel_layer = get_channel_layer()
+    group = project_group_name(project_id)
+    started = time.perf_counter()
+    for i, (event_type, data) in enumerate(payloads):
+        if i >= window:
+            await deliveries.delivered[first_seq + i - window].wait()
+        seq = first_seq + i
+        deliveries.publish(seq)
+        await channel_layer.group_send(
+            group, frame_message(encode_event(event_type, seq=seq, **data), seq=seq)
+        )
+    await deliveries.delivered[first_seq + len(payloads) - 1].wait()
+    return time.perf_counter() - started
+
+
+def percentile_ms(latencies):
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+async def measure(communicators, project_id, payloads, window, first_seq):
+    deliveries = Deliveries(len(communicators))
+    receivers = [
+        asyncio.create_task(receive_events(communicator, deliveries, len(payloads)))
+        for communicator in communicators
+    ]
+    seconds = await publish_events(project_id, payloads, deliveries, window, first_seq)
+    await asyncio.gather(*receivers)
+    return {
+        **percentile_ms(deliveries.latencies),
+        "events_per_s": round(len(payloads) / seconds, 3),
+        "deliveries_per_s": round(len(deliveries.latencies) / seconds),
+    }
+
+
+async def connect(application, project_id, tokens):
+    communicators = [
+        WebsocketCommunicator(application, f"/ws/projects/{project_id}/?token={token}")
+        for token in tokens
+    ]
+    for i in range(0, len(communicators), CONNECT_BATCH):
+        batch = communicators[i : i + CONNECT_BATCH]
+        results = await asyncio.gather(
+            *(communicator.connect(timeout=30) for communicator in batch)
+        )
+        if not all(connected for connected, _ in results):
+            raise RuntimeError("WebSocket connection refused")
+    return communicators
+
+
+async def run(application, project, tokens, args):
+    membership.membership_cache.clear()
+    tracemalloc.start()
+    allocated_before = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        communicators = await connect(application, project.id, tokens)
+    allocated = tracemalloc.get_traced_memory()[0] - allocated_before
+    tracemalloc.stop()
+
+    # Alternating task and comment events, as a busy project board
+    task, comment = make_task_payload(), make_comment_payload()
+    payloads = [
+        (
+            ("task_updated", {"task": task})
+            if i % 2
+            else ("comment_added", {"comment": comment})
+        )
+        for i in range(args.events)
+    ]
+    result = {
+        "members": len(tokens),
+        "events": args.events,
+        "kib_per_connection": round(allocated / len(tokens) / 1024, 2),
+        "latency": await measure(communicators, project.id, payloads, 1, 1),
+        "throughput": await measure(
+            communicators, project.id, payloads, args.window, args.events + 1
+        ),
+    }
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for communicator in communicators:
+            await communicator.disconnect()
+    return result
+
+
+def print_result(result, before=None):
+    latency, throughput = result["latency"], result["throughput"]
+    line = (
+        f"members={result['members']:<6} "
+        f"latency p50={latency['p50_ms']:>8.2f}ms p99={latency['p99_ms']:>8.2f}ms "
+        f"window p99={throughput['p99_ms']:>8.2f}ms "
+        f"{throughput['events_per_s']:>8.1f} events/s "
+        f"{throughput['deliveries_per_s']:>8} deliveries/s "
+        f"{result['kib_per_connection']:>6.1f}KiB/connection"
+    )
+    if before:
+        p99 = latency["p99_ms"] / before["latency"]["p99_ms"] - 1
+        events = throughput["events_per_s"] / before["throughput"]["events_per_s"] - 1
+        line += f" | p99 {p99:+.0%} events/s {events:+.0%}"
+    print(line)
+
+
+async def run_all(args):
+    application = JwtAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["members"]: result for result in json.load(f)["results"]}
+
+    results = []
+    project = await Project.objects.acreate(title="Fan-out")
+    tokens = []
+    for members in sorted(args.members):
+        tokens += await asyncio.to_thread(
+            create_members, project, members - len(tokens), len(tokens)
+        )
+        result = await run(application, project, tokens, args)
+        results.append(result)
+        print_result(result, baseline.get(members))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--members", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument(
+        "--window", type=int, default=20, help="Events in flight for the throughput"
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to compare with")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    settings.DATABASES["default"]["NAME"] = os.path.join(directory, "fanout.sqlite3")
+    try:
+        call_command("migrate", verbosity=0)
+        results = asyncio.run(run_all(args))
+    finally:
+        connection.close()
+        shutil.rmtree(directory)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "cpus": os.cpu_count(),
+                    "channel_layer": settings.CHANNEL_LAYERS["default"]["BACKEND"],
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
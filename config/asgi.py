@@ -14,13 +14,18 @@ from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 
-from config.channels_auth import JwtAuthMiddlewareStack
-
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Hot reads are served from the database executor under ASGI only
+os.environ.setdefault("ASYNC_READ_VIEWS", "True")
+# Sync requests run in a thread of their own, their connections cannot be reused
+os.environ.setdefault("DATABASE_REQUEST_CONN_MAX_AGE", "0")
 # Initialize Django ASGI application early to ensure the AppRegistry
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+from config.channels_auth import JwtAuthMiddlewareStack
+from apps.common.executor import DatabaseExecutorMiddleware
+from apps.common.outbox import OutboxDispatcherMiddleware
 from .routing import websocket_urlpatterns
 
 application = ProtocolTypeRouter(
@@ -36,3 +41,8 @@ application = ProtocolTypeRouter(
         ),
     }
 )
+
+# Outbox events are published from the server event loop
+application = OutboxDispatcherMiddleware(application)
+# Database work of async code on the server event loop runs on the executor
+application = DatabaseExecutorMiddleware(application)
@@ -4,8 +4,7 @@ from django.contrib.auth.models import AnonymousUser
 from django.db import close_old_connections
 from django.conf import settings
 from urllib.parse import parse_qs
-from channels.db import database_sync_to_async
-
+from apps.common.executor import database_sync_to_async
 from apps.common.models import CustomUser
 
 
@@ -10,9 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Choices, Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,7 +29,8 @@ SECRET_KEY = config("SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config("DEBUG", default=False, cast=bool)
 
-ALLOWED_HOSTS = []
+# Comma separated host names the site can serve
+ALLOWED_HOSTS = config("ALLOWED_HOSTS", default="", cast=Csv())
 
 
 # Application definition
@@ -51,6 +53,7 @@ INSTALLED_APPS = [
     "apps.v1.projects",
     "apps.v1.comments",
     "apps.v1.tasks",
+    "apps.v1.search",
     "apps.common",
 ]
 
@@ -64,7 +67,9 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-if DEBUG:
+# Profiling in development. Not while running tests: silk's own queries would
+# count against the query budgets and assertNumQueries.
+if DEBUG and "test" not in sys.argv:
     MIDDLEWARE += [
         "silk.middleware.SilkyMiddleware",
     ]
@@ -104,6 +109,43 @@ DATABASES = {
     }
 }
 
+# "production" tunes SQLite for concurrent requests: WAL journal so that readers
+# and the writer do not block each other, synchronous=NORMAL (a power loss may
+# lose the last commits, not corrupt the database), memory mapped reads, a
+# 64 MiB page cache per connection, and write transactions taking the lock
+# upfront, waiting up to DATABASE_BUSY_TIMEOUT seconds for it instead of
+# failing with "database is locked". Connections of the threads living across
+# requests, WSGI workers and the database executor (apps.common.executor), are
+# kept open for DATABASE_CONN_MAX_AGE seconds and checked before being reused.
+# Under ASGI other sync code runs in a thread created for each request, whose
+# connection cannot be reused: config.asgi sets DATABASE_REQUEST_CONN_MAX_AGE
+# to 0 so that it is closed at the end of the request instead of left open.
+DATABASE_PROFILE = config(
+    "DATABASE_PROFILE",
+    default="development",
+    cast=Choices(["development", "production"]),
+)
+SQLITE_PRODUCTION_OPTIONS = {
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+    ),
+    "transaction_mode": "IMMEDIATE",
+    "timeout": config("DATABASE_BUSY_TIMEOUT", default=5, cast=float),  # seconds
+}
+DATABASE_CONN_MAX_AGE = 0
+if DATABASE_PROFILE == "production":
+    DATABASE_CONN_MAX_AGE = config("DATABASE_CONN_MAX_AGE", default=600, cast=int)
+    DATABASES["default"].update(
+        CONN_MAX_AGE=config(
+            "DATABASE_REQUEST_CONN_MAX_AGE", default=DATABASE_CONN_MAX_AGE, cast=int
+        ),
+        CONN_HEALTH_CHECKS=True,
+        OPTIONS=SQLITE_PRODUCTION_OPTIONS,
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -172,6 +214,81 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
 }
 
+# Fail read requests whose serializer lazily loads a relation which is not part
+# of its eager loading plan (see apps.common.serializers.EagerLoadingMixin).
+# Always enabled while running tests to catch N+1 queries.
+EAGER_LOADING_STRICT = config(
+    "EAGER_LOADING_STRICT", default="test" in sys.argv, cast=bool
+)
+
+# In-process cache of project membership and role lookups
+# (see apps.v1.projects.membership), invalidated by signals in the process
+# making the change. Other processes pick up changes after the TTL.
+MEMBERSHIP_CACHE_SIZE = config("MEMBERSHIP_CACHE_SIZE", default=10000, cast=int)
+MEMBERSHIP_CACHE_TTL = config("MEMBERSHIP_CACHE_TTL", default=60, cast=int)  # seconds
+
+# Real-time events outbox (see apps.common.outbox), events published per batch
+# and dispatched events kept for the given number of seconds.
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=100, cast=int)
+OUTBOX_RETENTION = config("OUTBOX_RETENTION", default=24 * 60 * 60, cast=int)
+# Latest events per project replayed to reconnecting WebSocket clients,
+# clients missing older events are asked to resync.
+OUTBOX_REPLAY_SIZE = config("OUTBOX_REPLAY_SIZE", default=1000, cast=int)
+
+# Retention (see apps.v1.projects.retention): soft deleted projects, tasks and
+# comments are moved to the archive table the given number of seconds after
+# their deletion, archived projects once not updated for the given number of
+# seconds. 0 disables a policy. Roots moved per transaction.
+RETENTION_DELETED_AFTER = config(
+    "RETENTION_DELETED_AFTER", default=30 * 24 * 60 * 60, cast=int
+)
+RETENTION_ARCHIVED_PROJECT_AFTER = config(
+    "RETENTION_ARCHIVED_PROJECT_AFTER", default=180 * 24 * 60 * 60, cast=int
+)
+RETENTION_BATCH_SIZE = config("RETENTION_BATCH_SIZE", default=100, cast=int)
+
+# Threads running the database work of async code (see apps.common.executor):
+# consumers, the outbox dispatcher and, with ASYNC_READ_VIEWS, the GET requests
+# of the hot read views. ASYNC_READ_VIEWS is enabled by default by config.asgi
+# only, under WSGI async views would add a hop to every GET for no gain.
+DATABASE_EXECUTOR_THREADS = config("DATABASE_EXECUTOR_THREADS", default=4, cast=int)
+ASYNC_READ_VIEWS = config("ASYNC_READ_VIEWS", default=False, cast=bool)
+
+# WebSocket client messages allowed per second per connection, and burst size
+WS_INBOUND_RATE = config("WS_INBOUND_RATE", default=5, cast=float)
+WS_INBOUND_BURST = config("WS_INBOUND_BURST", default=20, cast=int)
+# User activity (see apps.common.presence), in seconds: at most one broadcast per
+# user, task and activity per interval, presence snapshot period and the time
+# activity is considered current.
+PRESENCE_COALESCE_INTERVAL = config("PRESENCE_COALESCE_INTERVAL", default=2, cast=float)
+PRESENCE_SNAPSHOT_INTERVAL = config("PRESENCE_SNAPSHOT_INTERVAL", default=5, cast=float)
+PRESENCE_TTL = config("PRESENCE_TTL", default=30, cast=float)
+
+# Rendered GET responses cached per process (see apps.common.views.ResponseCacheMixin),
+# bounded by number of entries and total size in bytes.
+RESPONSE_CACHE_SIZE = config("RESPONSE_CACHE_SIZE", default=5000, cast=int)
+RESPONSE_CACHE_MAX_BYTES = config(
+    "RESPONSE_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int
+)
+
+# Rendered markdown cached per process by content hash (see apps.common.fields)
+MARKDOWN_RENDER_CACHE_SIZE = config("MARKDOWN_RENDER_CACHE_SIZE", default=2048, cast=int)
+# Render markdown of at least the given length in a background thread pool after
+# commit, with MARKDOWN_RENDER_WORKERS threads (0 renders right after commit).
+MARKDOWN_RENDER_ASYNC = config("MARKDOWN_RENDER_ASYNC", default=False, cast=bool)
+MARKDOWN_RENDER_ASYNC_MIN_LENGTH = config(
+    "MARKDOWN_RENDER_ASYNC_MIN_LENGTH", default=2000, cast=int
+)
+MARKDOWN_RENDER_WORKERS = config("MARKDOWN_RENDER_WORKERS", default=2, cast=int)
+
+# Full-text search ranks the most recently indexed matches only (see
+# apps.v1.search.index.SearchResults), bounding the cost of frequent terms.
+# 0 ranks all matches.
+SEARCH_RANK_WINDOW = config("SEARCH_RANK_WINDOW", default=5000, cast=int)
+
+# Maximum number of operations of a task batch request
+TASK_BATCH_MAX_SIZE = config("TASK_BATCH_MAX_SIZE", default=500, cast=int)
+
 STATIC_ROOT = BASE_DIR / "static"
 MEDIA_ROOT = BASE_DIR / "media"
 
@@ -26,6 +26,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from apps.common.views import CacheStatsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     # Auth
@@ -37,6 +39,10 @@ urlpatterns = [
     path("api/v1/projects/", include("apps.v1.projects.urls", namespace="projects")),
     path("api/v1/projects/", include("apps.v1.tasks.urls", namespace="tasks")),
     path("api/v1/projects/", include("apps.v1.comments.urls", namespace="comments")),
+    # Search
+    path("api/v1/search/", include("apps.v1.search.urls", namespace="search")),
+    # Cache metrics
+    path("api/v1/cache-stats/", CacheStatsView.as_view(), name="cache_stats"),
     # App based API versioning used currently
     # But, We also have support for View level versioning, so you can use the same View for different versions of the API.
     # path('api/<str:version>/projects/', include('apps.v1.projects.urls', namespace='projects')),
@@ -67,4 +73,5 @@ if settings.DEBUG:
 
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += [path("silk/", include("silk.urls", namespace="silk"))]
+    if "silk" in settings.INSTALLED_APPS:
+        urlpatterns += [path("silk/", include("silk.urls", namespace="silk"))]